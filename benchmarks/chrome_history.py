@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark of the reader of Chrome History files.
+It creates a synthetic History database and compares the throughput in visits per second of the reader slogviz used before,
+which fetched all rows at once, looked up the index of each row and decoded formatted dates with datetime.strptime,
+to the batched reader of slogviz.logfileparser. Both have to return the same entries.
+
+Execute it from the root directory of the project:
+>>> python3 benchmarks/chrome_history.py [number of visits]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import sqlite3
+import datetime
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import slogviz.config
+from slogviz.logfileparser import readin
+
+def _create_history(path, number):
+	"""Creates a History database at path with number visits of 5000 urls on 200 domains, one visit every 7 seconds."""
+	con = sqlite3.connect(path)
+	con.execute("CREATE TABLE urls(id INTEGER PRIMARY KEY, url LONGVARCHAR, title LONGVARCHAR, visit_count INTEGER DEFAULT 0 NOT NULL, typed_count INTEGER DEFAULT 0 NOT NULL, last_visit_time INTEGER NOT NULL, hidden INTEGER DEFAULT 0 NOT NULL)")
+	con.execute("CREATE TABLE visits(id INTEGER PRIMARY KEY, url INTEGER NOT NULL, visit_time INTEGER NOT NULL, from_visit INTEGER, transition INTEGER DEFAULT 0 NOT NULL, segment_id INTEGER, visit_duration INTEGER DEFAULT 0 NOT NULL)")
+	con.executemany("INSERT INTO urls VALUES (?,?,?,?,?,?,?)", [(i, 'https://www.domain{}.com/page{}'.format(i % 200, i), 'title', 1, 0, 0, 0) for i in range(1, 5001)])
+	start = 13150000000000000
+	con.executemany("INSERT INTO visits VALUES (?,?,?,?,?,?,?)", [(i, random.randint(1, 5000), start + i * 7000000, 0, 0, 0, 0) for i in range(1, number + 1)])
+	con.commit()
+	con.close()
+
+def _readin_before(file):
+	"""The Chrome reader as slogviz implemented it before, returns the tuples of id, url, timestamp and source of all visits."""
+	con = sqlite3.connect(file)
+	ret = []
+	with con:
+		cur = con.cursor()
+		cur.execute("SELECT visits.id, urls.url, datetime(visits.visit_time / 1000000 + (strftime('%s', '1601-01-01')), 'unixepoch'), * FROM urls, visits WHERE urls.id = visits.url;")
+		rows = cur.fetchall()
+		for row in rows:
+			rows.index(row)
+			date = datetime.datetime.strptime(row[2],"%Y-%m-%d %H:%M:%S")
+			source = ''
+			pattern = re.compile(r'.*(www\.|http[s]{0,1}:\/\/)([^\.]+)\..*')
+			m = pattern.match(row[1])
+			if m:
+				source = m.group(2)
+			ret.append((row[0], row[1], date, source))
+	con.close()
+	return ret
+
+def main():
+	number = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+	slogviz.config.interactive = False
+	slogviz.config.cache = False
+	directory = tempfile.mkdtemp()
+	path = os.path.join(directory, 'History')
+	_create_history(path, number)
+	try:
+		begin = time.perf_counter()
+		before = _readin_before(path)
+		duration = time.perf_counter() - begin
+		print('{:<35} {:>12.0f} visits/sec'.format('fetchall and strptime (before)', number / duration))
+
+		begin = time.perf_counter()
+		lf = readin(path)
+		duration = time.perf_counter() - begin
+		print('{:<35} {:>12.0f} visits/sec'.format('readin (after)', number / duration))
+
+		after = [(x.id, x.message, x.timestamp, x.source) for x in lf.content]
+		print('same entries: {}'.format(before == after))
+	finally:
+		os.remove(path)
+		os.rmdir(directory)
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark of the startup time of slogviz.
+It imports slogviz.core in a fresh interpreter with python -X importtime, prints the slowest imports
+and fails if the import takes longer than the budget or if a module that is only needed for plotting
+or for certain file formats is imported, which happened before the imports were deferred.
+Afterwards it reads in a small syslog file in a fresh interpreter and checks that none of these modules is imported then either.
+
+Execute it from the root directory of the project:
+>>> python3 benchmarks/startup_time.py [budget in milliseconds]
+"""
+
+import os
+import sys
+import subprocess
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# modules that must not be imported before they are used
+_DEFERRED = ('matplotlib', 'Evtx', 'untangle', 'sqlite3', 'numpy')
+
+# the amount of fresh interpreters the import time is measured in, the fastest run counts
+_RUNS = 5
+
+def _importtime():
+	"""Imports slogviz.core in a fresh interpreter and returns a list of tuples of the cumulative import time in microseconds and the name of each imported module."""
+	result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import slogviz.core'], cwd=ROOT, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+	ret = []
+	for line in result.stderr.splitlines():
+		if not line.startswith('import time:'):
+			continue
+		fields = line[len('import time:'):].split('|')
+		try:
+			ret.append((int(fields[1]), fields[2].strip()))
+		except ValueError:
+			# the header line
+			continue
+	return ret
+
+def _deferred(modules):
+	"""Returns the names of all modules in modules that belong to one of the packages in _DEFERRED."""
+	return sorted(x for x in modules if x.split('.')[0] in _DEFERRED)
+
+def main():
+	budget = float(sys.argv[1]) if len(sys.argv) > 1 else 150.0
+	failed = False
+
+	runs = [_importtime() for _ in range(_RUNS)]
+	imports = min(runs, key=lambda x: dict((name, time) for time, name in x)['slogviz.core'])
+	total = dict((name, time) for time, name in imports)['slogviz.core'] / 1000
+	print('slowest imports:')
+	for time, name in sorted(imports, reverse=True)[:10]:
+		print('{:<45} {:>10.1f} ms'.format(name, time / 1000))
+	print('{:<45} {:>10.1f} ms (budget {:.1f} ms)'.format('import of slogviz.core', total, budget))
+	if total > budget:
+		print('FAILED: the import of slogviz.core exceeds the budget')
+		failed = True
+	deferred = _deferred(name for _, name in imports)
+	if deferred:
+		print('FAILED: imported by slogviz.core: ' + ', '.join(deferred))
+		failed = True
+
+	fd, path = tempfile.mkstemp(suffix='.log')
+	with os.fdopen(fd, 'w') as f:
+		f.write('Mar  1 00:00:00 hostA sshd[42]: session opened for user root\n')
+	try:
+		code = 'import sys, slogviz.config; slogviz.config.interactive = False; slogviz.config.cache = False; from slogviz.logfileparser import readin; readin(sys.argv[1]); print(",".join(sys.modules))'
+		result = subprocess.run([sys.executable, '-c', code, path], cwd=ROOT, stdout=subprocess.PIPE, universal_newlines=True, check=True)
+	finally:
+		os.remove(path)
+	deferred = _deferred(result.stdout.strip().split(','))
+	if deferred:
+		print('FAILED: imported when reading in a syslog file: ' + ', '.join(deferred))
+		failed = True
+	sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+	main()
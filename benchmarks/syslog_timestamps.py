@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark of the timestamp decoding of syslog files.
+It compares the throughput in lines per second of decoding syslog timestamps with datetime.strptime,
+as slogviz did before, to the slogviz.timestampdecoder sub module, and measures the whole syslog parser.
+
+Execute it from the root directory of the project:
+>>> python3 benchmarks/syslog_timestamps.py [number of lines]
+"""
+
+import os
+import sys
+import time
+import datetime
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import slogviz.config
+from slogviz import timestampdecoder
+from slogviz.logfileparser import readin
+
+def _create_lines(number):
+	"""Returns number syslog timestamps, where every 10 consecutive lines share the same second."""
+	start = datetime.datetime(2017, 3, 1)
+	ret = []
+	for i in range(number):
+		ret.append((start + datetime.timedelta(seconds=i // 10)).strftime('%b %d %H:%M:%S').replace(' 0', '  ', 1))
+	return ret
+
+def _measure(name, function, values):
+	"""Prints the lines per second that function achieves on all values."""
+	begin = time.perf_counter()
+	for v in values:
+		function(v)
+	duration = time.perf_counter() - begin
+	print('{:<35} {:>12.0f} lines/sec'.format(name, len(values) / duration))
+
+def main():
+	number = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+	slogviz.config.interactive = False
+	slogviz.config.cache = False
+	timestamps = _create_lines(number)
+
+	_measure('strptime (before)', lambda x: datetime.datetime.strptime('2017 ' + x + '+0000', "%Y %b %d %H:%M:%S%z"), timestamps)
+	timestampdecoder.decode_syslog_timestamp.cache_clear()
+	_measure('decode_syslog_timestamp (after)', timestampdecoder.decode_syslog_timestamp, timestamps)
+
+	fd, path = tempfile.mkstemp(suffix='.log')
+	with os.fdopen(fd, 'w') as f:
+		for x in timestamps:
+			f.write('{} hostA sshd[42]: session opened for user root\n'.format(x))
+	try:
+		begin = time.perf_counter()
+		readin(path)
+		duration = time.perf_counter() - begin
+		print('{:<35} {:>12.0f} lines/sec'.format('readin of a syslog file', number / duration))
+	finally:
+		os.remove(path)
+
+if __name__ == '__main__':
+	main()
@@ -9,5 +9,7 @@ core -- the main routine of the package running a command line interface
 config.py -- the module which defines global variables
 logfileclasses -- the module which defines classes that are used in every other sub module
 logfileparser -- the module which consists of various parsers for common log files
+timestampdecoder -- the module which turns timestamps found in log files into datetime objects
+correlate -- the module which provides time window joins for correlation rules
 plotter -- the moduel which is used to plot log file entries with matplotlib
 """
\ No newline at end of file
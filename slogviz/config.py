@@ -1,10 +1,22 @@
 # -*- coding: utf-8 -*-
 
 """This sub module provides a global variable to check for checking if the non-interactive argument was set
+and the global variables configuring the parse cache of the logfileparser sub module and the columnar storage of the logfileclasses sub module.
 
 Exported variable:
 interactive -- False, if the main the non-interactive argument was set, True, if it was not set
+cache -- True, if logfileparser.readin stores parsed files in the parse cache and loads unchanged files from it
+cache_dir -- the directory of the parse cache, by default slogviz inside the user's cache directory
+cache_size -- the maximum size of the parse cache in bytes, the least recently used files are removed when it is exceeded
+columnar -- True, if logfile objects compute their plot data from numpy arrays instead of lists of entries
 """
+import os
 
 global interactive 
-interactive = True;
\ No newline at end of file
+interactive = True;
+
+cache = True
+cache_dir = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'slogviz')
+cache_size = 1 << 30
+
+columnar = True
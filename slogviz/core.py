@@ -10,6 +10,12 @@ In this file, the Command Line Arguments of SLogVIZ are defined:
 	optional:
 		-j -- an integer, if set to 1, one JSON file per logfile will be created, if set to 2 the structured_data field will be left empty in order to save place
 			example: -j 1
+		-b -- an integer, if set to 1, one binary columnar file (.slogviz.bin) per logfile will be created, which is read in a lot faster than a JSON file,
+			if set to 2 the structured_data field will be left empty in order to save place
+			example: -b 1
+		-l -- an integer, if set to 1, one line delimited JSON file (.slogviz.ndjson) per logfile will be created entry by entry,
+			if set to 2 the structured_data field will be left empty in order to save place
+			example: -l 1
 		-t -- a string representing an offset that shall be added to all timestamps without timezone information (default '+0000'),
 			'+0100' equals UTC plus one hour
 			example: -t +0100
@@ -20,6 +26,25 @@ In this file, the Command Line Arguments of SLogVIZ are defined:
 			example: -s sudo,sshd,su
 		-n -- if set to a number between 0 and 4 the corresponding timeline will be plotted without the interactive loop
 			example: -n 0
+		-w -- an integer, the amount of processes used for parsing one syslog or evtx file (default 1),
+			if several files are given they are parsed concurrently by up to one process per CPU instead, each file by one process
+			example: -w 8
+		-m -- a binary digit, when set to 1, syslog files are memory mapped and messages are only read from the file when needed, which saves memory
+			example: -m 1
+		--follow -- a binary digit, when set to 1, lines appended to syslog files are added before each action of the interactive loop,
+			only the new lines are parsed
+			example: --follow 1
+		--cache -- an integer, if set to 1, parsed files are stored in the parse cache and unchanged files are loaded from there (default 1),
+			if set to 0 the parse cache is bypassed, if set to 2 the parse cache is cleared before the files are read in
+			example: --cache 0
+		--since -- a date like '2017-03-23' or a timestamp like '2017-03-23T22:17:40+01:00', only entries at or after this time are analyzed,
+			timestamps without timezone information are taken as UTC
+			example: --since 2017-03-23
+		--until -- a date or a timestamp like for --since, only entries at or before this time are analyzed
+			example: --until 2017-03-24T06:00:00
+		--grep -- a string of words, phrases in double quotes or regular expressions between slashes that all have to be contained in a message,
+			alternatives are separated by OR, only the matching entries are analyzed, words are compared without regard to case
+			example: --grep '"Failed password" root OR "Invalid user"'
 
 Exported functions:
 main -- the main loop of SLogVIZ
@@ -30,12 +55,17 @@ import time
 import importlib
 import argparse
 import platform
+import concurrent.futures
 from inspect import getmembers, isfunction
 
 from .logfileclasses import *
 from .logfileparser import *
+from .logfileparser import _is_syslog, _is_browser_history, _evict_cache
 from .plotter import *
+from .correlate import load_rules
+from .timestampdecoder import decode_iso_timestamp
 import slogviz.config
+import slogviz.logfileparser
 
 # START internal functions
 def _transform_select_string(select_string, logfiles):
@@ -49,16 +79,145 @@ def _transform_select_string(select_string, logfiles):
 	a list of strings, representing  the intersection of all sources that are found in the selected_string
 	and in the elements of the logfiles list.
 	"""
-	selected_sources = []
+	# the keys of a dict keep their order and are looked up in constant time, just like the source_table of each logfile
+	selected_sources = {}
+	tmp = select_string.split(',')
 	for log in logfiles:
-		tmp = select_string.split(',')
 		for s in tmp:
-			if s in log.sources and s not in selected_sources:
-				selected_sources.append(s)
+			if s in log.source_table:
+				selected_sources[s] = None
 	if len(selected_sources) == 0:
 		for log in logfiles:
-			selected_sources += [x for x in log.sources if x not in selected_sources]
-	return selected_sources
+			selected_sources.update(dict.fromkeys(log.sources))
+	return list(selected_sources)
+
+def _decode_time_bound(text):
+	"""Returns a datetime object for a date like '2017-03-23', meaning its beginning, or a timestamp like '2017-03-23T22:17:40+01:00'.
+	Used as the type of the --since and --until arguments, raises an argparse.ArgumentTypeError for other strings.
+
+	Positional Arguments:
+	text -- the date or timestamp as a string
+	"""
+	text = text.strip()
+	try:
+		return decode_iso_timestamp(text + 'T00:00:00' if len(text) == 10 else text)
+	except (ValueError, IndexError):
+		raise argparse.ArgumentTypeError("invalid date or timestamp: '{}'".format(text))
+
+def _restrict(logfiles, since, until, query):
+	"""Returns a list of logfile objects holding only the entries of the logfile objects in logfiles between since and until,
+	whose messages match query, or logfiles itself if since, until and query are all None or empty.
+	When a filter is given, logfile objects without such entries are left out.
+
+	Positional Arguments:
+	logfiles -- a list of logfile objects
+	since -- a datetime object, the beginning of the window or None
+	until -- a datetime object, the end of the window or None
+	query -- a string, a query as described for the logfileclasses.message_index class, or None or an empty string
+	"""
+	if since is None and until is None and not query:
+		return logfiles
+	ret = logfiles
+	if since is not None or until is not None:
+		ret = [x.slice(since, until) for x in ret]
+	if query:
+		ret = [x.grep(query) for x in ret]
+	return [x for x in ret if x.lines]
+
+def _edit_query(query):
+	"""This function provides the user a possibility to interactively change the --grep argument.
+
+	Positional Arguments:
+	query -- a string or None, the current query
+
+	Returns:
+	the new query as a string, an empty one if the messages shall not be filtered
+	"""
+	print("please enter words, \"phrases\" or /regular expressions/ all messages have to contain, alternatives are separated by OR,")
+	print("leave it empty to show all messages (current: {})".format(query or 'none'))
+	ret = input("$ ").strip()
+	_delete_print(3)
+	return ret
+
+def _edit_time_window(since, until):
+	"""This function provides the user a possibility to interactively change the --since and --until arguments.
+	An empty input keeps the bound open, an invalid one is asked for again.
+	The files of the interactive loop are read in completely, so the window may be widened beyond --since and --until as well.
+
+	Positional Arguments:
+	since -- a datetime object or None, the current beginning of the window
+	until -- a datetime object or None, the current end of the window
+
+	Returns:
+	a tuple of the new since and until
+	"""
+	ret = []
+	for name, current in (('beginning', since), ('end', until)):
+		print("please enter the {} of the time window as a date or an ISO timestamp, leave it empty for no bound (current: {})".format(name, current.isoformat() if current else 'none'))
+		while True:
+			line = input("$ ")
+			if not line.strip():
+				ret.append(None)
+				break
+			try:
+				ret.append(_decode_time_bound(line))
+				break
+			except argparse.ArgumentTypeError:
+				_delete_print(2)
+		_delete_print(3)
+	return tuple(ret)
+
+def _init_reader(cache):
+	"""Prepares a process of the pool used by _readin_files, the parsers must not print their progress there and the parse cache is configured like in the main process.
+	Files of the parse cache are only removed by the main process, which knows the files its logfile objects are read from.
+	"""
+	slogviz.config.interactive = False
+	slogviz.config.cache = cache
+	slogviz.logfileparser._cache_eviction = False
+
+def _readin_files(file_names, time_offset, workers, mapped, follow=False, since=None, until=None, sources=None):
+	"""Reads in all files and returns a list of the logfile objects, or None for files that can not be parsed, in the order of file_names.
+	If more than one file is given and more than one CPU is available, they are parsed concurrently by a pool of up to one process per CPU, each file by one process,
+	and a line is printed whenever a file is read in, errors raised by the parser of a file in the pool count as a file that can not be parsed. Otherwise the files are parsed one after the other in this process, each by up to workers processes.
+	Syslog files in follow mode are always read in by this process, since it has to keep them open.
+
+	Positional Arguments:
+	file_names -- a list of strings, the names of the files
+	time_offset -- a offset that shall be added to all timestamps without timezone information, '+0100' equals UTC plus one hour
+	workers -- the amount of processes used for parsing a single syslog or evtx file
+	mapped -- if True, syslog files are memory mapped
+
+	Keyword Arguments:
+	follow -- if True, syslog files are read in follow mode (default False)
+	since -- a datetime object, only entries at or after this time are read in, not used for files in follow mode (default None)
+	until -- a datetime object, only entries at or before this time are read in, not used for files in follow mode (default None)
+	sources -- a list of strings, only the visits with these sources are read from browser histories, a browser history containing none of them
+		is read in completely, since the plots show all sources of such a logfile, if None or empty all visits are read (default None)
+	"""
+	ret = {x: None for x in file_names}
+	pending = [x for x in ret if os.path.isfile(x) and not (follow and _is_syslog(x))]
+	processes = min(len(pending), os.cpu_count() or 1)
+	for x in ret:
+		if os.path.isfile(x) and (x not in pending or processes < 2):
+			ret[x] = readin(x, time_offset=time_offset, workers=workers, mapped=mapped, follow=follow, since=since, until=until, sources=sources)
+	if processes > 1:
+		with concurrent.futures.ProcessPoolExecutor(max_workers=processes, initializer=_init_reader, initargs=(slogviz.config.cache,)) as executor:
+			futures = {executor.submit(readin, x, time_offset=time_offset, mapped=mapped, since=since, until=until, sources=sources): x for x in pending}
+			for counter, future in enumerate(concurrent.futures.as_completed(futures), 1):
+				x = futures[future]
+				if future.exception() is None:
+					ret[x] = future.result()
+				if(slogviz.config.interactive):
+					print('read in file {} of {}: {}'.format(counter, len(pending), x))
+		if(slogviz.config.interactive):
+			_delete_print(len(pending))
+		if slogviz.config.cache:
+			_evict_cache()
+	if sources:
+		for x in ret:
+			if ret[x] is not None and ret[x].lines == 0 and _is_browser_history(x):
+				ret[x] = readin(x, time_offset=time_offset, since=since, until=until)
+	return [ret[x] for x in file_names]
 
 def _print_action_list(list, exit=True):
 	"""Prints a list of possible actions and their related indices.
@@ -175,7 +334,12 @@ def _change_remove_redundant():
 
 def _correlate(logfiles):
 	"""This function implements an interactive menu where the user may correlate logfile object with
-	correlation rules present in a file called 'rules.py', that must be present in the current working directory.
+	correlation rules present in a file called 'rules.py' or declarative rules in a file called 'rules.json',
+	one of which must be present in the current working directory.
+	The rules are given a logfileclasses.merged_timeline of all entries, ordered by their timestamps across all logfiles.
+	Rules may use the functions of the correlate sub module, functions imported by rules.py are not offered as rules themselves.
+	Rules of rules.json named like a function of rules.py are reported as an error and left out.
+	All rules of rules.json are evaluated together in one pass when the first one of them is chosen, see correlate.load_rules.
 
 	Positional Arguments:
 	logfiles -- a list of logfile objecs, which shall be correlated
@@ -183,15 +347,30 @@ def _correlate(logfiles):
 	try:
 		module = importlib.import_module("rules")
 	except ImportError:
-		print("rules.py needs to be present in this directory")
+		module = None
+	rules = None
+	if os.path.isfile("rules.json"):
+		try:
+			rules = load_rules("rules.json")
+		except (OSError, ValueError) as e:
+			print("rules.json can not be used: {}".format(e))
+			time.sleep(2)
+			_delete_print(2)
+	if module is None and rules is None:
+		print("rules.py or rules.json needs to be present in this directory")
 		time.sleep(2)
 		_delete_print(2)
 		return
 	else:
-		list_of_actions = [x for x,y in getmembers(module, isfunction) if not x.startswith('_')]
-		list_of_entries = []
-		for log in logfiles:
-			list_of_entries += log.content
+		functions = dict((x,y) for x,y in getmembers(module, isfunction) if not x.startswith('_') and y.__module__ == module.__name__) if module else {}
+		collisions = [x for x in rules.names if x in functions] if rules else []
+		if collisions:
+			print("rules of rules.json named like functions of rules.py are left out: {}".format(", ".join(collisions)))
+			time.sleep(2)
+			_delete_print(2)
+		list_of_actions = list(functions) + ([x for x in rules.names if x not in functions] if rules else [])
+		list_of_entries = merged_timeline(logfiles)
+		results = None
 		while True:
 			_print_action_list(list_of_actions)
 			line = input("$ ")
@@ -201,8 +380,12 @@ def _correlate(logfiles):
 				if line == len(list_of_actions):
 					break
 				elif line in [list_of_actions.index(x) for x in list_of_actions]:
-					func = getattr(module, list_of_actions[line])
-					ret = func(list_of_entries)
+					if list_of_actions[line] in functions:
+						ret = functions[list_of_actions[line]](list_of_entries)
+					else:
+						if results is None:
+							results = rules.evaluate(list_of_entries)
+						ret = results[list_of_actions[line]]
 					if not ret or len(ret) == 0:
 						print("The result is empty!")
 						time.sleep(1)
@@ -237,23 +420,54 @@ def main():
 	parser.add_argument("-f", "--file_names", required=True, help="a string containing the names of files to visualize, trailed by a ','")
 	parser.add_argument("-r", "--remove_redundant_entries", type=int, default=0, help="a binary digit, when set to 1, all entries from the same logfile with the same timestamp will be removed, except for one, in most plots")
 	parser.add_argument("-j", "--export_to_JSON", type=int, default=0, help="if set to 1, one JSON file per logfile will be created, if set to 2 the structured_data field will be left empty in order to save place")
+	parser.add_argument("-b", "--export_to_binary", type=int, default=0, help="if set to 1, one binary columnar file (.slogviz.bin) per logfile will be created, which is read in a lot faster than a JSON file, if set to 2 the structured_data field will be left empty in order to save place")
+	parser.add_argument("-l", "--export_to_NDJSON", type=int, default=0, help="if set to 1, one line delimited JSON file (.slogviz.ndjson) per logfile will be created entry by entry, if set to 2 the structured_data field will be left empty in order to save place")
 	parser.add_argument("-s", "--select_by_sources",default='', help="a string containing the name sources, trailed by a ',' used for filtering out all entries that have sources which are NOT in the select_string")
 	parser.add_argument("-t", "--time_offset", default='', help="A string containing the time offset from UTC, may be used if syslog files are saved without timezone information. The format needs to be: + or - followed by 4 digits, example: '+0100' means UTC plus one hour ")
 	parser.add_argument("-n", "--non_interactive", type=int, default=-1, help="if set to a number between 0 and 4 the corresponding timeline will be plotted without the interactive loop")
+	parser.add_argument("-w", "--workers", type=int, default=1, help="the amount of processes used for parsing one syslog or evtx file, large files are split and parsed in parallel if greater than 1, if several files are given they are parsed concurrently by up to one process per CPU instead, each file by one process")
+	parser.add_argument("-m", "--memory_map", type=int, default=0, help="a binary digit, when set to 1, syslog files are memory mapped and messages are only read from the file when needed, which saves memory for large files")
+	parser.add_argument("--follow", type=int, default=0, help="a binary digit, when set to 1, lines appended to syslog files are added before each action of the interactive loop, only the new lines are parsed")
+	parser.add_argument("--cache", type=int, default=1, help="if set to 1, parsed files are stored in a parse cache of up to 1 GiB in ~/.cache/slogviz and unchanged files are loaded from there, if set to 0 the parse cache is bypassed, if set to 2 the parse cache is cleared before the files are read in")
+	parser.add_argument("--since", type=_decode_time_bound, default=None, help="a date like '2017-03-23' or a timestamp like '2017-03-23T22:17:40+01:00', only entries at or after this time are analyzed, timestamps without timezone information are taken as UTC")
+	parser.add_argument("--until", type=_decode_time_bound, default=None, help="a date or a timestamp like for --since, only entries at or before this time are analyzed")
+	parser.add_argument("--grep", default=None, help="a string of words, \"phrases\" or /regular expressions/, all of them have to be contained in a message, alternatives are separated by OR, only the matching entries are analyzed")
 	args = parser.parse_args()
 
 	if(args.non_interactive != -1):
 		slogviz.config.interactive = False;
 	if(slogviz.config.interactive):
 		_print_welcome()
+	slogviz.config.cache = args.cache != 0
+	if args.cache == 2:
+		clear_cache()
 	file_names = args.file_names.split(',')
 	p = re.compile(r'^[+-]{1}(\d){4}$')
 	m = p.match(args.time_offset)
-	if m:
-		logfiles = [readin(x, time_offset=args.time_offset) for x in file_names if os.path.isfile(x) ]
-	else:
-		logfiles = [readin(x) for x in file_names]
+
+	if args.export_to_JSON or args.export_to_binary or args.export_to_NDJSON:
+		# the files are exported one by one without keeping them in memory
+		time_offset = args.time_offset if m else '+0000'
+		if args.export_to_JSON:
+			failed = [x for x in file_names if not (os.path.isfile(x) and export_to_JSON(x, time_offset=time_offset, sparse=(args.export_to_JSON == 2)))]
+		elif args.export_to_binary:
+			failed = [x for x in file_names if not (os.path.isfile(x) and export_to_binary(x, time_offset=time_offset, sparse=(args.export_to_binary == 2)))]
+		else:
+			failed = [x for x in file_names if not (os.path.isfile(x) and export_to_NDJSON(x, time_offset=time_offset, sparse=(args.export_to_NDJSON == 2)))]
+		if(slogviz.config.interactive):
+			_delete_print(4)
+		for x in failed:
+			print("file " + x + " can not be parsed or does not exist!")
+		return
+
+	# the window can only be passed to readin without the interactive loop, where it can not be widened later on,
+	# otherwise the files are read in completely and all plots only see the selected entries, just like files in follow mode
+	window = (args.since, args.until) if args.non_interactive != -1 else (None, None)
+	# the same holds for the sources, which are only used by the plots filtering by them
+	sources = [x for x in args.select_by_sources.split(',') if x] if args.non_interactive in (0, 1, 3) else None
+	logfiles = _readin_files(file_names, args.time_offset if m else '+0000', args.workers, bool(args.memory_map), bool(args.follow), *window, sources=sources)
 	logfiles = [x for x in logfiles if x ]
+	selected = _restrict(logfiles, args.since, args.until, args.grep)
 	if(slogviz.config.interactive):
 		_delete_print(4)
 
@@ -274,47 +488,52 @@ def main():
 			_print_bye()
 		return
 
-	if args.export_to_JSON:
-		for x in logfiles:
-			x.export_to_JSON(sparse=(args.export_to_JSON == 2))
-	elif args.non_interactive != -1:
+	if len(selected) == 0 and args.non_interactive != -1 and (args.since is not None or args.until is not None or args.grep):
+		print("No entries match --since, --until and --grep")
+		return
+
+	if args.non_interactive != -1:
 		if args.non_interactive == 0:
-			for log in logfiles:
+			for log in selected:
 				plot_single(log,args.remove_redundant_entries, args.select_by_sources)
 			show()
 			return
 		elif args.non_interactive == 1: #TODO: Option haeufige vorne/hinten
-			for log in logfiles:
+			for log in selected:
 				plot_single_file_colored(log, args.remove_redundant_entries, args.select_by_sources)
 			show()
 			return
 		elif args.non_interactive == 2:
-			for log in logfiles:
+			for log in selected:
 				plot_bar_chart(log)
 			show()
 			return
 		elif args.non_interactive == 3:
-			plot_multiple_timeline(logfiles,args.remove_redundant_entries,args.select_by_sources)
+			plot_multiple_timeline(selected,args.remove_redundant_entries,args.select_by_sources)
 			show()
 			return
 		elif args.non_interactive == 4:
-			plot_timeline_overview(logfiles)
+			plot_timeline_overview(selected)
 			show()
 			return
 		elif args.non_interactive == 5:
-			superplot(logfiles,args.remove_redundant_entries, args.select_by_sources)
+			superplot(selected,args.remove_redundant_entries, args.select_by_sources)
 			show()
 			return
 		else: 
 			print("No available plot parameter given. See slogviz -h.")
 			return
 	else:
-		list_of_actions = ["plot single timeline(s)", "plot single timeline(s), colorcoded by source", "plot single timeline bar chart(s)", "plot multiple timeline", "plot overview timeline", "produce all plots", "filter by sources (does not affect option 2 and 4)", "filter redundant timestamps (does not affect option 2 and 4)", "correlate with rules.py"]
+		list_of_actions = ["plot single timeline(s)", "plot single timeline(s), colorcoded by source", "plot single timeline bar chart(s)", "plot multiple timeline", "plot overview timeline", "produce all plots", "filter by sources (does not affect option 2 and 4)", "filter redundant timestamps (does not affect option 2 and 4)", "correlate with rules.py or rules.json", "restrict to a time window", "filter by message"]
 		while True:
 			_print_action_list(list_of_actions)
 			line = input("$ ")
-			if line == "0":
+			if args.follow:
 				for log in logfiles:
+					refresh(log)
+				selected = _restrict(logfiles, args.since, args.until, args.grep)
+			if line == "0":
+				for log in selected:
 					plot_single(log,args.remove_redundant_entries, args.select_by_sources)
 				show()
 				_delete_print(len(list_of_actions)+5)
@@ -332,13 +551,13 @@ def main():
 						break
 					else:
 						_delete_print(len(new_list)+4)
-				for log in logfiles:
+				for log in selected:
 					plot_single_file_colored(log, args.remove_redundant_entries, args.select_by_sources, rev=background)
 				show()
 				_delete_print(len(new_list)+4)
 			elif line == "2":
 				frame_seconds = None
-				print("please define a frame in seconds")
+				print("please define a frame in seconds, 0 chooses it by the visible time span whenever you zoom")
 				while True:
 					frame_seconds = input("$ ")
 					if frame_seconds.isdigit():
@@ -347,20 +566,20 @@ def main():
 					else:
 						_delete_print(2)
 				_delete_print(3)
-				for log in logfiles:
+				for log in selected:
 					plot_bar_chart(log, frame_seconds=frame_seconds)
 				show()
 				_delete_print(len(list_of_actions)+5)
 			elif line == "3":
-				plot_multiple_timeline(logfiles,args.remove_redundant_entries,args.select_by_sources)
+				plot_multiple_timeline(selected,args.remove_redundant_entries,args.select_by_sources)
 				show()
 				_delete_print(len(list_of_actions)+5)
 			elif line == "4":
-				plot_timeline_overview(logfiles)
+				plot_timeline_overview(selected)
 				show()
 				_delete_print(len(list_of_actions)+5)
 			elif line == "5":
-				superplot(logfiles,args.remove_redundant_entries, args.select_by_sources)
+				superplot(selected,args.remove_redundant_entries, args.select_by_sources)
 				show()
 				_delete_print(len(list_of_actions)+5)
 			elif line == "6":
@@ -375,8 +594,24 @@ def main():
 				args.remove_redundant_entries = _change_remove_redundant()
 			elif line == "8":
 				_delete_print(len(list_of_actions)+5)
-				_correlate(logfiles)
+				_correlate(selected)
 			elif line == "9":
+				_delete_print(len(list_of_actions)+5)
+				args.since, args.until = _edit_time_window(args.since, args.until)
+				selected = _restrict(logfiles, args.since, args.until, args.grep)
+				if len(selected) == 0:
+					print("No entries were found in this time window, all plots will be empty")
+					time.sleep(2)
+					_delete_print(2)
+			elif line == "10":
+				_delete_print(len(list_of_actions)+5)
+				args.grep = _edit_query(args.grep)
+				selected = _restrict(logfiles, args.since, args.until, args.grep)
+				if len(selected) == 0:
+					print("No message matches this filter, all plots will be empty")
+					time.sleep(2)
+					_delete_print(2)
+			elif line == "11":
 				_delete_print(len(list_of_actions)+5)
 				break
 			else:
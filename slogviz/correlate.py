@@ -0,0 +1,376 @@
+# -*- coding: utf-8 -*-
+
+"""The sub module of slogviz that provides building blocks for correlation rules, see testfiles/rules.py for an example.
+Each function takes a list of logfile_entry objects, like the logfileclasses.merged_timeline given to the rules,
+functions deciding whether an entry is of interest (predicates) and a time tolerance, either a datetime.timedelta or an amount of seconds.
+The matching entries are sorted by their timestamps once and then joined by two pointers running through them,
+so a rule built from these functions takes O(n log n) time instead of the O(n²) of nested loops over all entries.
+Timestamps without timezone information are taken as UTC, entries with the same timestamp keep the order of list_of_entries.
+All functions return lists of entries ordered by their timestamps.
+
+Exported functions:
+within -- returns the entries matching one predicate that have an entry matching another one at most a tolerance before or after them
+not_within -- returns the entries matching one predicate that have no entry matching another one at most a tolerance before or after them
+followed_by -- returns the entries matching one predicate that are followed by an entry matching another one within a tolerance
+count_in_window -- returns the entries matching a predicate that lie in a window of a tolerance holding at least a certain amount of such entries
+union -- returns the entries of several results ordered by their timestamps, each entry only once
+load_rules -- compiles a file of declarative rules into a rule_set
+
+Exported classes:
+rule_set -- a set of declarative rules, which are evaluated together in a single pass over the entries ordered by their timestamps
+"""
+
+import collections
+import datetime
+import functools
+import heapq
+import itertools
+import json
+import re
+
+from .timestampdecoder import unix_microseconds
+
+# the keys of a predicate in a rule file and the attributes of logfile_entry objects they are compared with
+_FIELDS = {'source': 'source', 'origin': 'origin_name', 'hostname': 'hostname', 'message': 'message'}
+
+# the temporal operators of a rule in a rule file
+_OPERATORS = ('within', 'not_within', 'followed_by', 'count_in_window')
+
+#START internal functions
+def _microseconds(tolerance):
+	"""Returns a tolerance given as datetime.timedelta or as an amount of seconds in microseconds as an integer."""
+	if isinstance(tolerance, datetime.timedelta):
+		return (tolerance.days * 86400 + tolerance.seconds) * 1000000 + tolerance.microseconds
+	return int(round(tolerance * 1000000))
+
+def _matching(list_of_entries, *predicates):
+	"""Returns one list for each predicate, holding tuples of the timestamp in microseconds, the position in list_of_entries and the entry
+	of all entries matching the predicate, ordered by the timestamps. list_of_entries is iterated only once,
+	since a logfileclasses.merged_timeline may create new objects for the same entries each time.
+	"""
+	ret = [[] for _ in predicates]
+	for position, entry in enumerate(list_of_entries):
+		time = None
+		for matches, predicate in zip(ret, predicates):
+			if predicate(entry):
+				if time is None:
+					time = unix_microseconds(entry.timestamp)
+				matches.append((time, position, entry))
+	for matches in ret:
+		matches.sort(key=lambda x: x[0])
+	return ret
+
+def _partners(list_of_entries, first, second, before, after):
+	"""Yields a tuple of each entry matching first, ordered by the timestamps, and whether another entry matching second
+	has a timestamp at most before microseconds before and at most after microseconds after its timestamp.
+	"""
+	candidates, partners = _matching(list_of_entries, first, second)
+	index = 0
+	for time, position, entry in candidates:
+		# the timestamps of the candidates ascend, so partners too early for one of them are too early for all following ones
+		while index < len(partners) and partners[index][0] < time - before:
+			index += 1
+		found = False
+		for partner_time, partner_position, _ in partners[index:index + 2]:
+			# the entry itself is the only partner that has to be skipped, the next one decides then
+			if partner_time > time + after:
+				break
+			if partner_position != position:
+				found = True
+				break
+		yield entry, found
+
+def _key(entry):
+	"""Returns a tuple identifying an entry, used instead of the object, since the same entry may be created several times."""
+	return entry.origin_name, entry.id
+
+def _predicate(spec, predicates):
+	"""Returns a function deciding whether an entry matches a predicate of a rule file, as described for load_rules.
+
+	Positional arguments:
+	spec -- the predicate, a dict or the name of a predicate in predicates
+	predicates -- a dict of the named predicates of the rule file
+	"""
+	if isinstance(spec, str):
+		if spec not in predicates:
+			raise ValueError("unknown predicate '{}'".format(spec))
+		spec = predicates[spec]
+	if not isinstance(spec, dict) or not spec or set(spec) - set(_FIELDS):
+		raise ValueError("a predicate must be an object with some of the keys {}: {}".format(', '.join(_FIELDS), json.dumps(spec)))
+	tests = []
+	for key, value in sorted(spec.items()):
+		attribute = _FIELDS[key]
+		if key == 'message':
+			tests.append(functools.partial(_search, re.compile(value), attribute))
+		else:
+			tests.append(functools.partial(_member, frozenset([value] if isinstance(value, str) else value), attribute))
+	return json.dumps(spec, sort_keys=True), tests
+
+def _search(pattern, attribute, entry):
+	"""Returns True if pattern is found in the attribute of entry."""
+	return pattern.search(getattr(entry, attribute) or '') is not None
+
+def _member(values, attribute, entry):
+	"""Returns True if the attribute of entry is one of values."""
+	return getattr(entry, attribute) in values
+
+class _filter(object):
+	"""The state of a rule without a temporal operator while a rule_set is evaluated, it keeps all entries matching its predicate."""
+	def __init__(self, first):
+		self.first = first
+		self.results = []
+
+	def feed(self, position, time, entry, matches):
+		if matches[self.first]:
+			self.results.append((position, entry))
+
+	def finish(self):
+		return self.results
+
+class _join(object):
+	"""The state of a rule with the within, not_within or followed_by operator while a rule_set is evaluated.
+	Entries matching the first predicate wait in pending until an entry matching the second one arrives or they are too old to find one,
+	so only the entries of the last tolerance are kept.
+	"""
+	def __init__(self, first, second, before, after, found):
+		self.first = first
+		self.second = second
+		self.before = before
+		self.after = after
+		self.found = found
+		self.last = None
+		self.pending = collections.deque()
+		self.results = []
+
+	def feed(self, position, time, entry, matches):
+		pending = self.pending
+		while pending and pending[0][0] + self.after < time:
+			_, x, y = pending.popleft()
+			if not self.found:
+				self.results.append((x, y))
+		last = self.last
+		if matches[self.second]:
+			# all waiting entries are at most after microseconds older than this one
+			if self.found:
+				self.results.extend((x, y) for _, x, y in pending)
+			pending.clear()
+			self.last = time
+		if matches[self.first]:
+			if last is not None and last >= time - self.before:
+				if self.found:
+					self.results.append((position, entry))
+			else:
+				pending.append((time, position, entry))
+
+	def finish(self):
+		if not self.found:
+			self.results.extend((x, y) for _, x, y in self.pending)
+		self.pending.clear()
+		self.results.sort(key=lambda x: x[0])
+		return self.results
+
+class _count(object):
+	"""The state of a rule with the count_in_window operator while a rule_set is evaluated, it keeps the matching entries of the last tolerance."""
+	def __init__(self, first, tolerance, minimum):
+		self.first = first
+		self.tolerance = tolerance
+		self.minimum = minimum
+		self.window = collections.deque()
+		self.returned = -1
+		self.results = []
+
+	def feed(self, position, time, entry, matches):
+		if not matches[self.first]:
+			return
+		window = self.window
+		window.append((time, position, entry))
+		while window[0][0] < time - self.tolerance:
+			window.popleft()
+		if len(window) >= self.minimum:
+			self.results.extend((x, y) for _, x, y in window if x > self.returned)
+			self.returned = position
+
+	def finish(self):
+		return self.results
+#END internal functions
+
+#START exported functions
+def within(list_of_entries, first, second, tolerance):
+	"""Returns a list of all entries matching first for which an other entry matching second exists,
+	whose timestamp is at most tolerance before or after their own.
+
+	Positional arguments:
+	list_of_entries -- a list or any other iterable of logfile_entry objects
+	first -- a function taking a logfile_entry and returning True for the entries that are returned
+	second -- a function taking a logfile_entry and returning True for the entries that are looked for around them
+	tolerance -- a datetime.timedelta or an amount of seconds
+	"""
+	tolerance = _microseconds(tolerance)
+	return [entry for entry, found in _partners(list_of_entries, first, second, tolerance, tolerance) if found]
+
+def not_within(list_of_entries, first, second, tolerance):
+	"""Returns a list of all entries matching first for which no other entry matching second exists,
+	whose timestamp is at most tolerance before or after their own.
+
+	Positional arguments:
+	list_of_entries -- a list or any other iterable of logfile_entry objects
+	first -- a function taking a logfile_entry and returning True for the entries that are returned
+	second -- a function taking a logfile_entry and returning True for the entries that are looked for around them
+	tolerance -- a datetime.timedelta or an amount of seconds
+	"""
+	tolerance = _microseconds(tolerance)
+	return [entry for entry, found in _partners(list_of_entries, first, second, tolerance, tolerance) if not found]
+
+def followed_by(list_of_entries, first, second, tolerance):
+	"""Returns a list of all entries matching first for which an other entry matching second exists,
+	whose timestamp is the same as their own or at most tolerance later.
+
+	Positional arguments:
+	list_of_entries -- a list or any other iterable of logfile_entry objects
+	first -- a function taking a logfile_entry and returning True for the entries that are returned
+	second -- a function taking a logfile_entry and returning True for the entries that have to follow them
+	tolerance -- a datetime.timedelta or an amount of seconds
+	"""
+	return [entry for entry, found in _partners(list_of_entries, first, second, 0, _microseconds(tolerance)) if found]
+
+def count_in_window(list_of_entries, predicate, tolerance, minimum):
+	"""Returns a list of all entries matching predicate that lie in a time window of the length tolerance
+	holding at least minimum entries matching predicate, for example all failed logins in bursts of at least 5 within a minute.
+
+	Positional arguments:
+	list_of_entries -- a list or any other iterable of logfile_entry objects
+	predicate -- a function taking a logfile_entry and returning True for the entries that are counted
+	tolerance -- a datetime.timedelta or an amount of seconds, the length of the window
+	minimum -- the amount of entries a window has to hold at least
+	"""
+	tolerance = _microseconds(tolerance)
+	entries = _matching(list_of_entries, predicate)[0]
+	ret = []
+	start = 0
+	returned = 0
+	for end, (time, _, _) in enumerate(entries):
+		while entries[start][0] < time - tolerance:
+			start += 1
+		if end - start + 1 >= minimum:
+			# the entries of overlapping windows are only returned once
+			ret.extend(x for _, _, x in entries[max(start, returned):end + 1])
+			returned = end + 1
+	return ret
+
+def union(*results):
+	"""Returns a list of the entries in all results ordered by their timestamps, an entry contained in several results is returned once.
+
+	Positional arguments:
+	results -- lists of logfile_entry objects, each one ordered by the timestamps, as returned by the other functions of this module
+	"""
+	ret = []
+	seen = set()
+	streams = [zip(map(unix_microseconds, (x.timestamp for x in result)), itertools.repeat(number), result) for number, result in enumerate(results)]
+	for _, _, entry in heapq.merge(*streams, key=lambda x: x[:2]):
+		if _key(entry) not in seen:
+			seen.add(_key(entry))
+			ret.append(entry)
+	return ret
+
+class rule_set(object):
+	"""A set of declarative correlation rules compiled by load_rules, which are all evaluated together in one pass over the entries.
+	Each distinct predicate is evaluated once per entry, no matter how many rules use it,
+	and each rule only keeps the entries of its last time tolerance while the entries are passed.
+
+	Attributes:
+	names -- a list of the names of the rules, in the order of the rule file
+	predicates -- a list of lists of the tests of each distinct predicate, an entry matches a predicate if it passes all its tests
+
+	Exported Functions:
+	evaluate -- returns the entries found by each rule
+	"""
+	def __init__(self, names, predicates, rules):
+		self.names = names
+		self.predicates = predicates
+		self._rules = rules
+
+	def evaluate(self, list_of_entries):
+		"""Returns a dict mapping the name of each rule to a list of the entries it found, in the order of list_of_entries.
+
+		Positional arguments:
+		list_of_entries -- an iterable of logfile_entry objects ordered by their timestamps, like a logfileclasses.merged_timeline,
+			it is iterated only once
+		"""
+		states = [x() for x in self._rules]
+		predicates = self.predicates
+		for position, entry in enumerate(list_of_entries):
+			matches = [all(test(entry) for test in tests) for tests in predicates]
+			if not any(matches):
+				continue
+			time = unix_microseconds(entry.timestamp)
+			for state in states:
+				state.feed(position, time, entry, matches)
+		return {name: [entry for _, entry in state.finish()] for name, state in zip(self.names, states)}
+
+def load_rules(file):
+	"""Reads a rule file and returns a rule_set holding its compiled rules.
+	Raises a ValueError if the file is not valid JSON or a rule is not valid.
+
+	A rule file is a JSON object with the key "rules", a list of rules, and optionally the key "predicates",
+	an object of named predicates that rules may refer to by their names.
+	A predicate is an object with some of the keys "source", "origin", "hostname" and "message".
+	The values of the first three are a string or a list of strings, the entry has to have one of them,
+	the value of "message" is a regular expression that has to be found in the message. An entry matches if it fulfils all keys.
+	Each rule is an object with the keys "name" and "match", the predicate of the entries it returns,
+	and at most one of the following temporal operators, which work like the functions of this module with the same name:
+		"within": {"match": <predicate>, "seconds": <tolerance>}
+		"not_within": {"match": <predicate>, "seconds": <tolerance>}
+		"followed_by": {"match": <predicate>, "seconds": <tolerance>}
+		"count_in_window": {"seconds": <tolerance>, "minimum": <amount of entries>}
+	A rule without an operator returns all entries matching its predicate.
+
+	Positional arguments:
+	file -- the name of the rule file
+	"""
+	with open(file, encoding='utf-8') as f:
+		document = json.load(f)
+	if not isinstance(document, dict) or not isinstance(document.get('rules'), list):
+		raise ValueError('a rule file must be an object with a list of "rules"')
+	named = document.get('predicates', {})
+	keys = {}
+	predicates = []
+	names = []
+	rules = []
+
+	def index(spec):
+		"""Returns the index of a predicate in predicates, which it is added to, unless an equal one is there already."""
+		key, tests = _predicate(spec, named)
+		if key not in keys:
+			keys[key] = len(predicates)
+			predicates.append(tests)
+		return keys[key]
+
+	for rule in document['rules']:
+		if not isinstance(rule, dict) or not isinstance(rule.get('name'), str) or 'match' not in rule:
+			raise ValueError('each rule must be an object with a "name" and a "match": {}'.format(json.dumps(rule)))
+		name = rule['name']
+		if name in names:
+			raise ValueError("the rule name '{}' is used twice".format(name))
+		operators = [x for x in _OPERATORS if x in rule]
+		if len(operators) > 1 or set(rule) - set(_OPERATORS) - {'name', 'match'}:
+			raise ValueError("the rule '{}' may only have the keys name, match and one of {}".format(name, ', '.join(_OPERATORS)))
+		try:
+			first = index(rule['match'])
+			if not operators:
+				rules.append(functools.partial(_filter, first))
+			elif operators[0] == 'count_in_window':
+				arguments = rule['count_in_window']
+				rules.append(functools.partial(_count, first, _microseconds(arguments['seconds']), int(arguments['minimum'])))
+			else:
+				arguments = rule[operators[0]]
+				tolerance = _microseconds(arguments['seconds'])
+				second = index(arguments['match'])
+				before = 0 if operators[0] == 'followed_by' else tolerance
+				rules.append(functools.partial(_join, first, second, before, tolerance, operators[0] != 'not_within'))
+		except KeyError as e:
+			raise ValueError("the rule '{}' misses the key {}".format(name, e))
+		except (TypeError, ValueError, re.error) as e:
+			raise ValueError("the rule '{}' is not valid: {}".format(name, e))
+		names.append(name)
+	return rule_set(names, predicates, rules)
+#END exported functions
@@ -1,186 +1,1396 @@
-# -*- coding: utf-8 -*-
-
-"""This sub module defines the logfile and logfile_entry classes that are used by all other sub modules of SLogVIZ.
-This module has no exported functions.
-
-Exported classes:
-logfile_entry -- holds the data of one single log file entry
-logfile -- holds the data of a whole log file
-"""
-
-import datetime
-import json
-import collections
-
-#START internal functions
-def _give_dates(list):
-	"""Returns all timestamps of a list of logfile_entry objects."""
-	return [x.timestamp for x in list]
-
-def _give_full_lines(list):
-	"""Returns all structured_data fields of a list of logfile_entry objects."""
-	return [x.structured_data for x in list]
-
-def _give_messages(list):
-	"""Returns all messages of a list of logfile_entry objects."""
-	return [x.message for x in list]
-
-def _give_ids(list, remove_redundant_entries):
-	"""Returns all ids of a list of logfile_entry objects.
-	If the remove_redundant_entries argument is 1, then simply the range
-	of from 1 to length(list+1) is returned.
-	"""
-	if remove_redundant_entries == 1:
-		return [x for x in range(1,len(list)+1)]
-	else:
-		return [x.id for x in list]
-
-def _select_entries_param(list, param):
-	"""Takes a list of logfile_entry objects and returns a sub set of it.
-	The sub set includes a entries that have a source attribute that occurs in the param argument.
-
-	Positional arguments:
-	list -- a list of logfile_entry objects
-	param -- a list of strings, representing sources
-	"""
-	if not param or len(param) == 0:
-		return [x for x in list]
-	return [x for x in list if x.source in param]
-
-
-def _remove_redundant_entries(list):
-	"""Returns the sub set of list, where all entries will have different timestamps.
-	This is achieved by keeping the first occurrence of each timestamp.
-
-	Positional arguments:
-	list -- a list of logfile_entry objects
-	"""
-	dict = {x: list[x] for x in range(0, len(list))}
-	oldvalue = None
-	for counter in range(0, len(list)):
-		v = dict[counter]
-		if counter>1 and oldvalue == v.timestamp:
-			del dict[counter]
-		oldvalue = v.timestamp
-	return [v for k,v in dict.items()]
-
-#END internal functions
-
-#START exported classes
-class logfile_entry(object):
-	"""A class for storing one single log file entry.
-
-	Attributes:
-	id -- a numerical id, assumed to be assigned sequentially in time
-	      the id shall be unique among all entries from one file
-	origin_name -- a string containing the name of the origin log file
-	message -- the message of an entry, a string
-	structured_data -- the whole data of an entry, kept in the original structure
-	timestamp -- a datetime object assumed to be in UTC format
-	hostname -- a string representing the hostname that logged the entry
-	source --  string representing the application/other source that logged the entry
-	"""
-	def __init__(self, id, origin_name, message, structured_data, timestamp, hostname, source):
-		self.id = id
-		self.origin_name = origin_name
-		self.message = message
-		self.structured_data = structured_data
-		self.timestamp = timestamp
-		self.hostname = hostname
-		self.source = source
-
-	def __str__(self):
-		return 'Entry {0.id} at {0.timestamp} from file {0.origin_name}, hostname {0.hostname} and source {0.source} with the message:\n {0.message}'.format(self)
-
-class logfile(object):
-	"""A class for storing content and meta data of one log file.
-
-	Attributes:
-	name -- a string, the name of the original file
-	lines -- a number counting the amount of logfile_entry object inside the content attribute
-	type -- the file format of the original file
-	content --  a list of logfile_entry objects that represent the content of the original file
-	sources --  a list of strings representing the various source attribute occurring in all elements of the content list
-
-	Exported Functions:
-	give_plot_data -- returns the necessary data for plotting, called by the plotter sub module
-	give_plot_data_bar --  returns the necessary data for plotting a bar chart, called by the plotter sub module
-	export_to_JSON -- saves the object as a JSON file for future analysis
-	"""
-	def __init__(self, name, lines, type, content, sources):
-		self.name = name
-		self.lines = lines
-		self.type = type
-		self.content = content
-		self.sources = sources
-
-	def __str__(self):
-		return 'File of the type {0.type} with the name {0.name} and {0.lines} lines'.format(self)
-
-	def give_plot_data(self, remove_redundant_entries=0, sources=[]):
-		"""Filters the entries in the self.content attribute and returns the filtered list, their respective ids, timestamps and messages.
-		All list returned are sorted by the id of their respective log file entry.
-
-		Keyword arguments:
-		remove_redundant_entries -- If set to 1, all entries with the same timestamp will be condensed to one (default 0)
-		sources -- A list of sources, entries not in this list will be filtered out. If this list is empty, no filtering will occur. (default [])
-		"""
-		ret = _select_entries_param(self.content, sources)
-		if remove_redundant_entries:
-			ret = _remove_redundant_entries(ret)
-		ret.sort(key=lambda x: x.id)
-		return ret, _give_ids(ret, remove_redundant_entries), _give_dates(ret), _give_messages(ret)
-
-	def give_plot_data_bar(self, frame_seconds=0):
-		"""Counts how many entries in self.content in frames of the size frame_seconds exist and returns three lists.
-		The first list is an ascending list of all found frames ([1,2,3,...n] where n is the amount of found frames).
-		The second list stores the timestamp of the beginning of each frame in the first list.
-		The third list represents the amounts of entries in the frames of the first list
-
-		Example: ([1,2],[X,Y],[99,10]) would mean that in frame 1, beginning at time X there are 99 entries and
-		in frame 2, beginning at time Y, there are 10 entries.
-
-		Keyword arguments:
-		frame_seconds -- the size of each time frame in seconds (default 0)
-		"""
-		dict = collections.OrderedDict()
-		oldvalue = None
-		counter = 1
-		ret = []
-		time_delta = datetime.timedelta(seconds=frame_seconds)
-
-		for v in self.content:
-			if oldvalue and v.timestamp - oldvalue <= time_delta:
-				dict[oldvalue] += 1
-			else:
-				dict[v.timestamp] = 1
-				oldvalue = v.timestamp
-				ret.append(counter)
-				counter += 1
-		return ret,list(dict.keys()),[v for k,v in dict.items()]
-
-	def export_to_JSON(self, sparse=False):
-		"""Stores the log file object as an JSON file with the name <self.name>.slogviz.json
-		The file created by this function can use up to 5 times the space the original file took, therefore there is the sparse argument.
-
-		Keyword arguments:
-		sparse -- if set to True, the self.structured_data not stored inside the JSON file in order to save space (default False)
-		"""
-		class CustomEncoder(json.JSONEncoder):
-			def default(self, o):
-				try:
-					if sparse:
-						o.structured_data = ''
-				except AttributeError:
-					pass
-				if isinstance(o, datetime.datetime):
-					return {'datetime': o.replace().isoformat()}
-				if isinstance(o, str):
-					return json.JSONEncoder.default(self,o)
-				return {'{}'.format(o.__class__.__name__): o.__dict__}
-		pathname='{}.slogviz.json'.format(self.name)
-		ret = open(pathname,'w')
-		json.dump(self, ret, indent=4, cls=CustomEncoder)
-		ret.close()
-
+# -*- coding: utf-8 -*-
+
+"""This sub module defines the logfile and logfile_entry classes that are used by all other sub modules of SLogVIZ.
+This module has no exported functions.
+
+Exported classes:
+string_table -- assigns small integer codes to strings, used for the sources and hostnames of a log file
+logfile_entry -- holds the data of one single log file entry
+mapped_file -- gives access to the text of a file through a memory map
+mapped_logfile_entry -- a logfile_entry that reads its message and structured_data from a mapped_file when needed
+lazy_logfile_entry -- a mapped_logfile_entry that holds its message and only reads its structured_data when needed
+entry_columns -- holds the ids, timestamps, hostname codes and source codes of all entries of a log file as numpy arrays
+lazy_list -- a read only list whose items are only created when they are accessed
+message_index -- an inverted index of the words in the messages of a log file
+logfile -- holds the data of a whole log file
+merged_timeline -- a read only list of the entries of several log files ordered by their timestamps, merged when they are accessed
+"""
+
+import datetime
+import json
+import collections
+import collections.abc
+import locale
+import mmap
+import os
+import array
+import shutil
+import struct
+import sys
+import tempfile
+import operator
+import itertools
+import heapq
+import bisect
+import functools
+import re
+
+from .timestampdecoder import unix_microseconds, _UNIX_EPOCH
+import slogviz.config
+
+# the first bytes of files written by _write_binary, followed by the format version and the length of the JSON header
+_BINARY_MAGIC = b'SLOGVIZB'
+_BINARY_VERSION = 1
+_BINARY_PREFIX = struct.Struct('<8sII')
+
+# the columns of files written by _write_binary: name, numpy dtype and array typecode, message and structured_data hold offsets into their heap,
+# structured_data_kind tells how each structured_data field is stored
+_BINARY_COLUMNS = (('id', '<i8', 'q'), ('timestamp', '<i8', 'q'), ('utcoffset', '<i4', 'i'), ('hostname', '<i4', 'i'), ('source', '<i4', 'i'), ('message', '<i8', 'q'), ('structured_data', '<i8', 'q'), ('structured_data_kind', '|u1', 'B'))
+
+# the kinds of structured_data fields stored by _write_binary: strings as they are, tuples, like the rows of browser histories, as JSON arrays
+# and linked fields not at all, they are read from the original file at the location stored in the additional location column
+_BINARY_TEXT = 0
+_BINARY_TUPLE = 1
+_BINARY_LINKED = 2
+_BINARY_LOCATION = ('location', '<i8', 'q')
+
+# the utcoffset stored for timestamps without timezone information
+_BINARY_NAIVE = -(1 << 31)
+
+# the amount of results of give_plot_data and give_plot_data_bar each logfile keeps, the least recently used one is dropped first
+_PLOT_DATA_CACHE_SIZE = 16
+
+# the words of messages and queries stored by message_index
+_WORD = re.compile(r'\w+')
+
+# a term of a query, either a phrase in double quotes, a regular expression between slashes or anything up to the next space
+_QUERY_TERM = re.compile(r'"([^"]*)"?|/(.+?)/(?=\s|$)|(\S+)')
+
+# the amount of items a lazy_list creates at once when it is iterated over
+_LAZY_LIST_CHUNK = 4096
+
+# the frame sizes in seconds for which logfile.count_levels counts the entries, each one a multiple of the one before
+_COUNT_LEVELS = (1, 60, 3600, 86400)
+
+#START internal functions
+def _give_dates(list):
+	"""Returns all timestamps of a list of logfile_entry objects."""
+	return [x.timestamp for x in list]
+
+def _give_full_lines(list):
+	"""Returns all structured_data fields of a list of logfile_entry objects."""
+	return [x.structured_data for x in list]
+
+def _give_messages(list):
+	"""Returns all messages of a list of logfile_entry objects."""
+	return [x.message for x in list]
+
+def _give_ids(list, remove_redundant_entries):
+	"""Returns all ids of a list of logfile_entry objects.
+	If the remove_redundant_entries argument is 1, then simply the range
+	of from 1 to length(list+1) is returned.
+	"""
+	if remove_redundant_entries == 1:
+		return [x for x in range(1,len(list)+1)]
+	else:
+		return [x.id for x in list]
+
+def _remove_redundant_entries(list):
+	"""Returns the sub set of list, where all entries will have different timestamps.
+	This is achieved by keeping the first occurrence of each timestamp.
+
+	Positional arguments:
+	list -- a list of logfile_entry objects
+	"""
+	dict = {x: list[x] for x in range(0, len(list))}
+	oldvalue = None
+	for counter in range(0, len(list)):
+		v = dict[counter]
+		if counter>1 and oldvalue == v.timestamp:
+			del dict[counter]
+		oldvalue = v.timestamp
+	return [v for k,v in dict.items()]
+
+def _JSON_default(o):
+	"""Used as the default argument of json.dumps for objects the json module can not serialize on its own."""
+	if isinstance(o, datetime.datetime):
+		return {'datetime': o.replace().isoformat()}
+	return '{}'.format(o)
+
+def _entry_to_JSON(entry, sparse):
+	"""Returns the JSON representation of one logfile_entry object as a string, without changing the object itself.
+
+	Positional arguments:
+	entry -- the logfile_entry object
+	sparse -- if True, the structured_data field is left empty
+	"""
+	obj = {'logfile_entry': {
+		'id': entry.id,
+		'origin_name': entry.origin_name,
+		'message': entry.message,
+		'structured_data': '' if sparse else entry.structured_data,
+		'timestamp': {'datetime': entry.timestamp.replace().isoformat()},
+		'hostname': entry.hostname,
+		'source': entry.source}}
+	return json.dumps(obj, indent=4, default=_JSON_default)
+
+def _write_JSON(name, type, entries, sparse=False, sources=None):
+	"""Writes a JSON file with the name <name>.slogviz.json entry by entry.
+	Since entries is only iterated once, it may be a generator, so that a log file can be exported without holding it in memory.
+	Returns the amount of written entries.
+
+	Positional arguments:
+	name -- the name of the original file
+	type -- the file format of the original file
+	entries -- an iterable of logfile_entry objects
+
+	Keyword arguments:
+	sparse -- if set to True, the structured_data fields are not stored inside the JSON file in order to save space (default False)
+	sources -- the list of sources to store, if None it is collected from entries while writing (default None)
+	"""
+	lines = 0
+	collect_sources = sources is None
+	if collect_sources:
+		sources = string_table()
+	pathname='{}.slogviz.json'.format(name)
+	with open(pathname,'w') as fp:
+		fp.write('{{\n    "logfile": {{\n        "name": {},\n        "type": {},\n        "content": ['.format(json.dumps(name), json.dumps(type)))
+		for entry in entries:
+			if lines > 0:
+				fp.write(',')
+			fp.write('\n            ')
+			fp.write(_entry_to_JSON(entry, sparse).replace('\n', '\n            '))
+			lines += 1
+			if collect_sources and entry.source:
+				sources.add(entry.source)
+		fp.write('\n        ],\n        "lines": {},\n        "sources": {}\n    }}\n}}\n'.format(lines, json.dumps(list(sources))))
+	return lines
+
+def _entry_to_NDJSON(entry, sparse):
+	"""Returns the representation of one logfile_entry object as a single line of JSON, without changing the object itself.
+
+	Positional arguments:
+	entry -- the logfile_entry object
+	sparse -- if True, the structured_data field is left empty
+	"""
+	return json.dumps({
+		'id': entry.id,
+		'origin_name': entry.origin_name,
+		'message': entry.message,
+		'structured_data': '' if sparse else entry.structured_data,
+		'timestamp': entry.timestamp.isoformat(),
+		'hostname': entry.hostname,
+		'source': entry.source}, default=_JSON_default)
+
+def _last_NDJSON_id(pathname):
+	"""Returns the id of the last entry in the line delimited JSON file at pathname, or 0 if it holds no entries.
+	Only the end of the file is read, going back in growing blocks until the last line is complete.
+	"""
+	with open(pathname, 'rb') as fp:
+		end = fp.seek(0, os.SEEK_END)
+		size = 4096
+		while True:
+			start = max(0, end - size)
+			fp.seek(start)
+			lines = fp.read(end - start).rstrip(b'\n').split(b'\n')
+			if len(lines) > 1 or start == 0:
+				break
+			size *= 2
+	last = json.loads(lines[-1].decode('utf-8'))
+	return last.get('id', 0) if 'logfile' not in last else 0
+
+def _write_NDJSON(name, type, entries, sparse=False, append=False):
+	"""Writes a line delimited JSON file with the name <name>.slogviz.ndjson entry by entry.
+	The first line is a header holding the name and type of the original file, every following line holds one entry.
+	Since each entry is written as soon as it is taken from entries, which may be a generator, the file can be read while it is written.
+	Returns the amount of written entries.
+
+	Positional arguments:
+	name -- the name of the original file
+	type -- the file format of the original file
+	entries -- an iterable of logfile_entry objects
+
+	Keyword arguments:
+	sparse -- if set to True, the structured_data fields are left empty in order to save space (default False)
+	append -- if set to True and the file exists already, only the entries with ids above the id of the last entry in the file
+		are appended to it instead of replacing it, so that the file can be brought up to date after new lines were added (default False)
+	"""
+	lines = 0
+	pathname = '{}.slogviz.ndjson'.format(name)
+	append = append and os.path.isfile(pathname) and os.path.getsize(pathname) > 0
+	if append:
+		last_id = _last_NDJSON_id(pathname)
+		entries = (x for x in entries if x.id > last_id)
+	with open(pathname, 'a' if append else 'w', encoding='utf-8') as fp:
+		if not append:
+			fp.write(json.dumps({'logfile': {'name': name, 'type': type}}))
+			fp.write('\n')
+		for entry in entries:
+			fp.write(_entry_to_NDJSON(entry, sparse))
+			fp.write('\n')
+			lines += 1
+	return lines
+
+def _write_binary(name, type, entries, sparse=False, sources=(), hostnames=(), pathname=None, linked=False):
+	"""Writes a binary columnar file with the name <name>.slogviz.bin.
+	After a JSON header, the ids, timestamps in microseconds since 1970 UTC, UTC offsets in seconds, hostname and source codes
+	and the kinds of the structured_data fields are stored as little endian arrays, followed by two heaps holding the UTF-8 encoded messages and structured_data fields one after another.
+	The message and structured_data columns hold the offset of each field inside its heap plus the end of the last one.
+	All parts start at multiples of 8 bytes, so that they can be used as arrays directly from a memory map.
+	Since entries is only iterated once, it may be a generator, the heaps are written to temporary files meanwhile.
+	Returns the amount of written entries.
+
+	Positional arguments:
+	name -- the name of the original file
+	type -- the file format of the original file
+	entries -- an iterable of logfile_entry objects
+
+	Keyword arguments:
+	sparse -- if set to True, the structured_data fields are not stored in order to save space (default False)
+	sources -- the sources the codes start with, all other sources are added in the order of their first occurrence (default ())
+	hostnames -- the hostnames the codes start with, all other hostnames are added in the order of their first occurrence (default ())
+	pathname -- the name of the written file, None means <name>.slogviz.bin (default None)
+	linked -- if set to True, the structured_data of mapped_logfile_entry objects is not stored, but the location and the mapped_file they
+		refer to, so that it is read from the original file again, which must therefore stay unchanged (default False)
+	"""
+	sources = string_table(sources)
+	hostnames = string_table(hostnames)
+	layout = _BINARY_COLUMNS + (_BINARY_LOCATION,) if linked else _BINARY_COLUMNS
+	columns = {column: array.array(typecode) for column, _, typecode in layout}
+	mapping = None
+	ids = columns['id']
+	timestamps = columns['timestamp']
+	utcoffsets = columns['utcoffset']
+	hostname_codes = columns['hostname']
+	source_codes = columns['source']
+	kinds = columns['structured_data_kind']
+	heaps = {'message': tempfile.TemporaryFile(), 'structured_data': tempfile.TemporaryFile()}
+	sizes = {'message': 0, 'structured_data': 0}
+	try:
+		for entry in entries:
+			ids.append(entry.id)
+			timestamps.append(unix_microseconds(entry.timestamp))
+			offset = entry.timestamp.utcoffset()
+			utcoffsets.append(_BINARY_NAIVE if offset is None else offset.days * 86400 + offset.seconds)
+			hostname_codes.append(hostnames.add(entry.hostname))
+			source_codes.append(sources.add(entry.source) if entry.source else -1)
+			location = -1
+			if linked:
+				if isinstance(entry, mapped_logfile_entry) and (mapping is None or entry.mapping is mapping):
+					mapping = entry.mapping
+					location = entry.location
+				columns['location'].append(location)
+			if location >= 0:
+				# the structured_data is not even created, which is the costly part for evtx records
+				kinds.append(_BINARY_LINKED)
+				structured_data = ''
+			else:
+				structured_data = '' if sparse else entry.structured_data
+				if isinstance(structured_data, str):
+					kinds.append(_BINARY_TEXT)
+				else:
+					kinds.append(_BINARY_TUPLE)
+					structured_data = json.dumps(structured_data, default=_JSON_default)
+			for field, text in (('message', entry.message), ('structured_data', structured_data)):
+				columns[field].append(sizes[field])
+				data = text.encode('utf-8', 'surrogatepass')
+				heaps[field].write(data)
+				sizes[field] += len(data)
+		lines = len(ids)
+		for field in heaps:
+			columns[field].append(sizes[field])
+		header = {'name': name, 'type': type, 'lines': lines, 'sparse': bool(sparse), 'sources': sources.values, 'hostnames': hostnames.values, 'columns': {}, 'heaps': {}}
+		if mapping is not None:
+			header['mapping'] = [mapping.__class__.__name__, os.path.abspath(mapping.name), mapping.encoding]
+		# the header states the offsets of all parts, which depend on its own length, so the length is assumed first and corrected if needed
+		header_size = 0
+		while True:
+			position = _aligned(_BINARY_PREFIX.size + header_size)
+			for column, dtype, typecode in layout:
+				header['columns'][column] = [dtype, position, len(columns[column])]
+				position = _aligned(position + len(columns[column]) * columns[column].itemsize)
+			for field in ('message', 'structured_data'):
+				header['heaps'][field] = [position, sizes[field]]
+				position = _aligned(position + sizes[field])
+			encoded = json.dumps(header).encode('utf-8')
+			if len(encoded) <= header_size:
+				break
+			header_size = len(encoded)
+		encoded = encoded.ljust(header_size)
+		with open(pathname or '{}.slogviz.bin'.format(name), 'wb') as fp:
+			fp.write(_BINARY_PREFIX.pack(_BINARY_MAGIC, _BINARY_VERSION, header_size))
+			fp.write(encoded)
+			for column, _, _ in layout:
+				_pad(fp)
+				values = columns[column]
+				if sys.byteorder == 'big':
+					values.byteswap()
+				values.tofile(fp)
+			for field in ('message', 'structured_data'):
+				_pad(fp)
+				heaps[field].seek(0)
+				shutil.copyfileobj(heaps[field], fp)
+	finally:
+		for heap in heaps.values():
+			heap.close()
+	return lines
+
+def _datetimes(timestamps, utcoffsets):
+	"""Returns a list of the datetime objects of numpy arrays of timestamps in microseconds since 1970 UTC and their UTC offsets in seconds,
+	as stored by _write_binary. The conversion is done by numpy for all timestamps with the same UTC offset at once, each distinct timestamp
+	is only turned into a datetime object once and shared by all entries, just as the cached decoders of the parsers do.
+	"""
+	import numpy
+	result = numpy.empty(len(timestamps), dtype=object)
+	for offset in numpy.unique(utcoffsets).tolist():
+		selected = utcoffsets == offset
+		if offset == _BINARY_NAIVE:
+			distinct, inverse = numpy.unique(timestamps[selected], return_inverse=True)
+			dates = distinct.astype('datetime64[us]').astype(object)
+		else:
+			tzinfo = datetime.timezone(datetime.timedelta(seconds=offset))
+			distinct, inverse = numpy.unique(timestamps[selected] + offset * 1000000, return_inverse=True)
+			dates = numpy.empty(len(distinct), dtype=object)
+			dates[:] = [x.replace(tzinfo=tzinfo) for x in distinct.astype('datetime64[us]').astype(object)]
+		result[selected] = dates[inverse]
+	return result.tolist()
+
+def _add_up_frames(frames, counts):
+	"""Returns numpy arrays of the distinct frame numbers of an ascending numpy array of frame numbers and the sums of their counts.
+
+	Positional arguments:
+	frames -- an ascending numpy array of frame numbers, which may repeat
+	counts -- a numpy array of the amounts of entries in each element of frames
+	"""
+	import numpy
+	if not len(frames):
+		return frames, counts
+	starts = numpy.flatnonzero(numpy.diff(frames, prepend=frames[0] - 1))
+	return frames[starts], numpy.add.reduceat(counts, starts)
+
+def _words(text):
+	"""Returns a list of the words in text in lower case, as they are stored in a message_index."""
+	return _WORD.findall(text.lower()) if text else []
+
+def _phrase_pattern(text):
+	"""Returns a compiled regular expression matching text case insensitively, where it begins or ends with a word character
+	only at the boundaries of words, so that the phrase "number 12" does not match the message "number 123".
+	"""
+	pattern = re.escape(text)
+	if _WORD.match(text):
+		pattern = r'\b' + pattern
+	if _WORD.match(text[-1:]):
+		pattern += r'\b'
+	return re.compile(pattern, re.IGNORECASE)
+
+def _parse_query(query):
+	"""Returns the alternatives of a query as described for the message_index class, as a list of lists of tuples,
+	one tuple for each term of an alternative, holding a list of the words of the term and a compiled regular expression,
+	which the message has to match as well, or None if containing the words is enough.
+	"""
+	ret = [[]]
+	for phrase, pattern, term in _QUERY_TERM.findall(query):
+		if term == 'OR':
+			ret.append([])
+		elif pattern:
+			ret[-1].append(([], re.compile(pattern)))
+		elif term != 'AND':
+			text = phrase or term
+			words = _words(text)
+			ret[-1].append((words, None if [text.lower()] == words else _phrase_pattern(text)))
+	return [x for x in ret if x]
+
+def _contains(posting, position):
+	"""Returns True if the ascending array posting contains position."""
+	index = bisect.bisect_left(posting, position)
+	return index < len(posting) and posting[index] == position
+
+def _chunked(sequence, size=65536):
+	"""Yields the items of an iterable, numpy arrays are turned into lists of python objects in chunks of size items,
+	which is a lot faster than iterating over them, without creating a list of all of them at once.
+	"""
+	if not hasattr(sequence, 'tolist'):
+		yield from sequence
+		return
+	for start in range(0, len(sequence), size):
+		yield from sequence[start:start + size].tolist()
+
+def _aligned(position):
+	"""Returns the smallest multiple of 8 not below position."""
+	return (position + 7) & ~7
+
+def _pad(fp):
+	"""Writes zero bytes to the file object fp until its position is a multiple of 8."""
+	position = fp.tell()
+	fp.write(bytes(_aligned(position) - position))
+
+#END internal functions
+
+#START exported classes
+class string_table(object):
+	"""A class that assigns small integer codes to strings, in the order of their first occurrence.
+	Each string is stored only once, so that entries can share it and store its code instead of comparing strings.
+	Adding and looking up a string takes constant time.
+
+	Attributes:
+	values -- a list of all added strings, the index of each string is its code
+	codes -- a dictionary mapping each added string to its code
+
+	Exported Functions:
+	add -- adds a string, if it is not known yet, and returns its code
+	select -- returns the set of codes of all known strings in an iterable
+	"""
+	def __init__(self, values=()):
+		self.values = []
+		self.codes = {}
+		for x in values:
+			self.add(x)
+
+	def __len__(self):
+		return len(self.values)
+
+	def __iter__(self):
+		return iter(self.values)
+
+	def __contains__(self, value):
+		return value in self.codes
+
+	def __getitem__(self, code):
+		return self.values[code]
+
+	def add(self, value):
+		"""Returns the code of value, value is added first if it is not known yet."""
+		code = self.codes.get(value)
+		if code is None:
+			code = len(self.values)
+			self.codes[value] = code
+			self.values.append(value)
+		return code
+
+	def select(self, values):
+		"""Returns the set of codes of all strings in values that are known, unknown strings are ignored."""
+		return {self.codes[x] for x in values if x in self.codes}
+
+class logfile_entry(object):
+	"""A class for storing one single log file entry.
+
+	Attributes:
+	id -- a numerical id, assumed to be assigned sequentially in time
+	      the id shall be unique among all entries from one file
+	origin_name -- a string containing the name of the origin log file
+	message -- the message of an entry, a string
+	structured_data -- the whole data of an entry, kept in the original structure
+	timestamp -- a datetime object assumed to be in UTC format
+	hostname -- a string representing the hostname that logged the entry
+	source --  string representing the application/other source that logged the entry
+	hostname_code -- the code of the hostname in the hostname_table of the logfile holding the entry, None if unknown
+	source_code -- the code of the source in the source_table of the logfile holding the entry, None if unknown or if the source is empty
+	"""
+	# no __dict__ is created for the attributes stored in slots, which saves most of the memory of an entry
+	__slots__ = ('id', 'origin_name', 'message', 'structured_data', 'timestamp', 'hostname', 'source', 'hostname_code', 'source_code')
+
+	def __init__(self, id, origin_name, message, structured_data, timestamp, hostname, source, hostname_code=None, source_code=None):
+		self.id = id
+		self.origin_name = origin_name
+		self.message = message
+		self.structured_data = structured_data
+		self.timestamp = timestamp
+		self.hostname = hostname
+		self.source = source
+		self.hostname_code = hostname_code
+		self.source_code = source_code
+
+	def __str__(self):
+		return 'Entry {0.id} at {0.timestamp} from file {0.origin_name}, hostname {0.hostname} and source {0.source} with the message:\n {0.message}'.format(self)
+
+class mapped_file(object):
+	"""A class for reading the text of a file through a memory map.
+	The file is only mapped when text is requested for the first time and the map is not pickled,
+	so that objects of this class can be passed to other processes.
+	Sub classes, which know the format of the file, find the message and structured_data of the entry at a certain location.
+
+	Attributes:
+	name -- a string, the name of the mapped file
+	encoding -- the encoding used to decode the text, by default the same that open() uses
+
+	Exported Functions:
+	open -- maps the file into memory and returns the mmap object
+	close -- closes the memory map
+	text -- returns the text between two byte offsets
+	entry -- returns the message and structured_data of the entry at a location, implemented by sub classes
+	last_entry -- returns the same as entry, but keeps the result for the last location
+	"""
+	def __init__(self, name, encoding=None):
+		self.name = name
+		self.encoding = encoding or locale.getpreferredencoding(False)
+		self._file = None
+		self._map = None
+		self._last = (None, None)
+
+	def __getstate__(self):
+		return {'name': self.name, 'encoding': self.encoding}
+
+	def __setstate__(self, state):
+		self.__init__(state['name'], state['encoding'])
+
+	def open(self):
+		"""Maps the file into memory, if it is not mapped already, and returns the mmap object."""
+		if self._map is None:
+			self._file = open(self.name, 'rb')
+			self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+		return self._map
+
+	def close(self):
+		"""Closes the memory map, it is opened again when text is requested."""
+		if self._map is not None:
+			self._map.close()
+			self._file.close()
+			self._map = None
+			self._file = None
+
+	def text(self, start, end):
+		"""Returns the text between the byte offsets start and end, line breaks are translated to '\\n' just as open() does."""
+		return self.open()[start:end].decode(self.encoding).replace('\r\n', '\n')
+
+	def entry(self, location):
+		"""Returns a tuple of the message and the structured_data of the entry at location."""
+		raise NotImplementedError
+
+	def last_entry(self, location):
+		"""Returns the same as entry, the result for the last location is kept,
+		so that reading the message and then the structured_data of one entry decodes it only once.
+		"""
+		if self._last[0] != location:
+			self._last = (location, self.entry(location))
+		return self._last[1]
+
+class mapped_logfile_entry(logfile_entry):
+	"""A logfile_entry that does not store its message and structured_data, but reads them from a mapped_file whenever they are accessed.
+	The message and structured_data attributes are therefore read only.
+
+	Attributes in addition to those of logfile_entry:
+	mapping -- the mapped_file holding the text of the entry
+	location -- the location of the entry inside the mapped_file, for syslog files the byte offset of its first line
+	"""
+	# the slots of message and structured_data in logfile_entry are hidden by the properties below
+	__slots__ = ('mapping', 'location')
+
+	# the attributes passed to other processes, the properties are left out, since they can not be set
+	_pickled = ('id', 'origin_name', 'mapping', 'location', 'timestamp', 'hostname', 'source', 'hostname_code', 'source_code')
+
+	def __init__(self, id, origin_name, mapping, location, timestamp, hostname, source, hostname_code=None, source_code=None):
+		self.id = id
+		self.origin_name = origin_name
+		self.mapping = mapping
+		self.location = location
+		self.timestamp = timestamp
+		self.hostname = hostname
+		self.source = source
+		self.hostname_code = hostname_code
+		self.source_code = source_code
+
+	@property
+	def message(self):
+		return self.mapping.last_entry(self.location)[0]
+
+	@property
+	def structured_data(self):
+		return self.mapping.last_entry(self.location)[1]
+
+	def __getstate__(self):
+		return {x: getattr(self, x) for x in self._pickled}
+
+	def __setstate__(self, state):
+		for name, value in state.items():
+			setattr(self, name, value)
+
+class lazy_logfile_entry(mapped_logfile_entry):
+	"""A mapped_logfile_entry that stores its message, only the structured_data is read from the mapped_file whenever it is accessed.
+	It is used for formats whose messages are short, but whose structured_data is costly to create, like the XML of evtx records.
+	The structured_data attribute is therefore read only.
+	"""
+	__slots__ = ()
+
+	# the slot of logfile_entry, hidden by the property of mapped_logfile_entry
+	message = logfile_entry.message
+	_pickled = mapped_logfile_entry._pickled + ('message',)
+
+	def __init__(self, id, origin_name, message, mapping, location, timestamp, hostname, source, hostname_code=None, source_code=None):
+		super(lazy_logfile_entry, self).__init__(id, origin_name, mapping, location, timestamp, hostname, source, hostname_code, source_code)
+		self.message = message
+
+class entry_columns(object):
+	"""A class storing the ids, timestamps, hostname codes and source codes of all entries of a log file as numpy arrays.
+	The plot data of a logfile is computed from these arrays by vectorized numpy operations instead of loops over its entries.
+	The arrays are either built from a list of logfile_entry objects or taken from the columns of a binary columnar file,
+	whose entries are then only created when they are accessed.
+	Objects of this class are created by the class methods from_entries and from_mapping.
+
+	Attributes:
+	ids -- the ids of the entries
+	timestamps -- the timestamps of the entries in microseconds since 1970 UTC, timestamps without timezone information are taken as UTC
+	hostnames -- the hostname codes of the entries
+	sources -- the source codes of the entries, -1 for entries without source
+
+	Exported Functions:
+	from_entries -- builds the arrays from a list of logfile_entry objects
+	from_mapping -- takes the arrays of a binary columnar file
+	entry -- returns the logfile_entry at an index
+	message -- returns the message of the entry at an index
+	entries_at -- returns the logfile_entry objects at certain indices, creating the missing ones at once
+	messages_at -- returns the messages of the entries at certain indices
+	entries -- returns a list of all logfile_entry objects
+	postings -- returns the index of the sources, the ascending indices of the entries of each source code
+	select -- returns the indices of all entries having one of certain source codes
+	remove_redundant -- removes the indices of entries having the same timestamp as the entry before
+	dates -- returns the timestamps at certain indices as numpy datetime64 array
+	"""
+	def __init__(self, ids, timestamps, hostnames, sources):
+		self.ids = ids
+		self.timestamps = timestamps
+		self.hostnames = hostnames
+		self.sources = sources
+		self._entries = None
+		self._created = {}
+		self._postings = None
+		self._utcoffsets = None
+		self._mapping = None
+		self._origin_name = None
+		self._hostname_values = None
+		self._source_values = None
+
+	def __len__(self):
+		return len(self.ids)
+
+	@classmethod
+	def from_entries(cls, entries):
+		"""Returns an entry_columns object of a list of logfile_entry objects, whose codes must be assigned."""
+		import numpy
+		count = len(entries)
+		# the parsers let entries share their datetime objects, so each distinct object is converted only once
+		dates = list(map(operator.attrgetter('timestamp'), entries))
+		_, first, inverse = numpy.unique(numpy.fromiter(map(id, dates), dtype=numpy.uint64, count=count), return_index=True, return_inverse=True)
+		timestamps = numpy.fromiter((unix_microseconds(dates[x]) for x in first.tolist()), dtype=numpy.int64, count=len(first))[inverse.reshape(-1)]
+		ret = cls(numpy.fromiter(map(operator.attrgetter('id'), entries), dtype=numpy.int64, count=count),
+			timestamps,
+			numpy.fromiter(map(operator.attrgetter('hostname_code'), entries), dtype=numpy.int32, count=count),
+			numpy.fromiter((-1 if x.source_code is None else x.source_code for x in entries), dtype=numpy.int32, count=count))
+		ret._entries = entries
+		return ret
+
+	@classmethod
+	def from_mapping(cls, mapping, origin_name, hostnames, sources):
+		"""Returns an entry_columns object using the columns of a binary columnar file, its entries are created as mapped_logfile_entry objects.
+
+		Positional arguments:
+		mapping -- the mapped_file of the binary columnar file, whose columns function returns its columns as numpy arrays
+		origin_name -- the origin_name of the entries
+		hostnames -- the string_table of the hostnames the codes refer to
+		sources -- the string_table of the sources the codes refer to
+		"""
+		columns = mapping.columns()
+		ret = cls(columns['id'], columns['timestamp'], columns['hostname'], columns['source'])
+		ret._utcoffsets = columns['utcoffset']
+		ret._mapping = mapping
+		ret._origin_name = origin_name
+		ret._hostname_values = hostnames.values
+		ret._source_values = sources.values + ['']
+		return ret
+
+	def _create(self, index, timestamp):
+		"""Creates the mapped_logfile_entry at index, each entry is created only once."""
+		entry = self._created.get(index)
+		if entry is None:
+			hostname_code = int(self.hostnames[index])
+			source_code = int(self.sources[index])
+			entry = self._created[index] = mapped_logfile_entry(int(self.ids[index]), self._origin_name, self._mapping, index, timestamp,
+				self._hostname_values[hostname_code], self._source_values[source_code], hostname_code, None if source_code < 0 else source_code)
+		return entry
+
+	def entry(self, index):
+		"""Returns the logfile_entry at index."""
+		if self._entries is not None:
+			return self._entries[index]
+		return self._create(index, _datetimes(self.timestamps[index:index + 1], self._utcoffsets[index:index + 1])[0])
+
+	def message(self, index):
+		"""Returns the message of the entry at index."""
+		return self.entry(index).message
+
+	def entries_at(self, indices):
+		"""Returns a list of the logfile_entry objects at indices, a numpy array or a list of integers.
+		The timestamps of all entries that were not created yet are converted by one call of _datetimes,
+		which takes a lot less time than converting them one by one as the entry function does.
+		"""
+		if hasattr(indices, 'tolist'):
+			indices = indices.tolist()
+		if self._entries is not None:
+			entries = self._entries
+			return [entries[x] for x in indices]
+		created = self._created
+		missing = sorted(set(x for x in indices if x not in created))
+		if missing:
+			for index, timestamp in zip(missing, _datetimes(self.timestamps[missing], self._utcoffsets[missing])):
+				self._create(index, timestamp)
+		return [created[x] for x in indices]
+
+	def messages_at(self, indices):
+		"""Returns a list of the messages of the entries at indices, see entries_at."""
+		return [x.message for x in self.entries_at(indices)]
+
+	def entries(self):
+		"""Returns a list of all logfile_entry objects."""
+		if self._entries is None:
+			self._entries = [self._create(index, timestamp) for index, timestamp in enumerate(_datetimes(self.timestamps, self._utcoffsets))]
+			self._created = {}
+		return self._entries
+
+	def postings(self):
+		"""Returns a dict mapping each source code to a numpy array of the ascending indices of all entries with this source code.
+		The dict is built by one stable sort of the source codes when it is requested for the first time, the arrays must not be changed.
+		"""
+		if self._postings is None:
+			import numpy
+			order = numpy.argsort(self.sources, kind='stable')
+			codes, starts = numpy.unique(self.sources[order], return_index=True)
+			self._postings = dict(zip(codes.tolist(), numpy.split(order, starts[1:].tolist())))
+		return self._postings
+
+	def select(self, codes=None):
+		"""Returns a numpy array of the ascending indices of all entries whose source code is in the set codes, of all entries if codes is None.
+		The indices are merged from the postings of the codes, so the time needed depends on the amount of selected entries, not on all entries.
+		"""
+		import numpy
+		if codes is None:
+			return numpy.arange(len(self.ids))
+		postings = self.postings()
+		parts = [postings[x] for x in codes if x in postings]
+		if not parts:
+			return numpy.empty(0, dtype=numpy.intp)
+		if len(parts) == 1:
+			return parts[0]
+		return numpy.sort(numpy.concatenate(parts))
+
+	def remove_redundant(self, indices):
+		"""Returns the indices without those of entries having the same timestamp as the entry at the index before.
+		Just like _remove_redundant_entries, the first two entries are always kept.
+		"""
+		import numpy
+		timestamps = self.timestamps[indices]
+		keep = numpy.ones(len(indices), dtype=bool)
+		keep[2:] = timestamps[2:] != timestamps[1:-1]
+		return indices[keep]
+
+	def dates(self, indices):
+		"""Returns the timestamps of the entries at indices as numpy datetime64 array in UTC, which matplotlib plots just like datetime objects."""
+		return self.timestamps[indices].astype('datetime64[us]')
+
+class lazy_list(collections.abc.Sequence):
+	"""A read only list, whose item at each position is created by a function when it is accessed.
+	It is returned by logfile.give_plot_data instead of lists of entries and messages, so that only the displayed ones are created.
+	When it is iterated over, the items are created in chunks of _LAZY_LIST_CHUNK by the batch function, if there is one.
+
+	Attributes:
+	function -- the function creating an item from its index in indices
+	indices -- a numpy array of the indices passed to function
+	batch -- None or a function creating a list of the items of a numpy array of indices
+	"""
+	def __init__(self, function, indices, batch=None):
+		self.function = function
+		self.indices = indices
+		self.batch = batch
+
+	def __len__(self):
+		return len(self.indices)
+
+	def __getitem__(self, position):
+		if isinstance(position, slice):
+			return lazy_list(self.function, self.indices[position], self.batch)
+		return self.function(int(self.indices[operator.index(position)]))
+
+	def __iter__(self):
+		indices = self.indices
+		if self.batch is None:
+			function = self.function
+			for index in indices.tolist():
+				yield function(index)
+			return
+		for start in range(0, len(indices), _LAZY_LIST_CHUNK):
+			yield from self.batch(indices[start:start + _LAZY_LIST_CHUNK])
+
+class message_index(object):
+	"""An inverted index of the words in the messages of all entries of a log file, used to find the entries matching a query.
+	Words are the runs of letters, digits and underscores in a message, compared without regard to case.
+
+	A query consists of terms, an entry matches if its message contains all terms, 'AND' between terms may be written but is not needed.
+	Terms separated by 'OR' form alternatives, an entry matches if it matches one of them.
+	A term is a word, a phrase in double quotes like "Failed password" or a regular expression between slashes like /port \\d+/.
+	The candidates of each alternative are found by intersecting the postings of the words of all its terms,
+	afterwards the messages of the candidates are checked for the phrases, terms that are not a single word and the regular expressions,
+	which are therefore only applied to the entries containing all words of the alternative, or to all entries, if it contains no word at all.
+	Like single words, phrases and such terms only match whole words at their ends, "number 12" does not match "number 123".
+
+	Attributes:
+	lines -- the amount of indexed messages
+	postings -- a dict mapping each word in lower case to an array of the ascending positions of the messages containing it
+
+	Exported Functions:
+	search -- returns the ascending positions of all messages matching a query
+	"""
+	def __init__(self, messages):
+		postings = collections.defaultdict(functools.partial(array.array, 'I'))
+		lines = 0
+		for position, message in enumerate(messages):
+			for word in set(_words(message)):
+				postings[word].append(position)
+			lines += 1
+		self.postings = dict(postings)
+		self.lines = lines
+
+	def search(self, query, message):
+		"""Returns a list of the ascending positions of all messages matching query.
+
+		Positional arguments:
+		query -- a string, the query as described for the message_index class
+		message -- a function returning the message at a position, used to check the candidates
+		"""
+		ret = set()
+		for alternative in _parse_query(query):
+			words = set(itertools.chain.from_iterable(words for words, _ in alternative))
+			patterns = [x for _, x in alternative if x is not None]
+			if words:
+				postings = sorted((self.postings.get(x, ()) for x in words), key=len)
+				candidates = postings[0]
+				for posting in postings[1:]:
+					candidates = [x for x in candidates if _contains(posting, x)]
+			else:
+				candidates = range(self.lines)
+			if patterns:
+				candidates = [x for x in candidates if all(y.search(message(x) or '') for y in patterns)]
+			ret.update(candidates)
+		return sorted(ret)
+
+class logfile(object):
+	"""A class for storing content and meta data of one log file.
+
+	Attributes:
+	name -- a string, the name of the original file
+	lines -- a number counting the amount of logfile_entry object inside the content attribute
+	type -- the file format of the original file
+	content --  a list of logfile_entry objects that represent the content of the original file,
+		if the logfile was created with columns but without content, the list is only created when it is accessed for the first time
+	source_table -- a string_table of the various source attribute occurring in all elements of the content list
+	hostname_table -- a string_table of the various hostname attribute occurring in all elements of the content list
+	sources --  a list of strings representing the various source attribute occurring in all elements of the content list,
+		derived from source_table and therefore not meant to be changed
+	follow_state -- None, unless the file was read in follow mode by the logfileparser sub module, then it stores how far the file was read
+
+	If the sources and hostnames arguments of the constructor are string_table objects, the hostname_code and source_code attributes
+	of all entries in content must refer to them, as the parsers of the logfileparser sub module ensure.
+	Otherwise, sources is a list of strings and the codes of all entries are assigned by the constructor.
+	Empty sources are never added to the source_table, such entries have the source_code None.
+
+	Unless slogviz.config.columnar is False or numpy is not installed, the plot data is computed from an entry_columns object,
+	which is built from content when it is needed for the first time and again after content was changed.
+	The results of give_plot_data and give_plot_data_bar are kept for each combination of arguments, so they must not be changed by the caller.
+	Bar charts are counted on a fixed grid of frames, from the count_levels if the frame size is a whole multiple of one of them.
+	Whoever changes the entries in content without replacing the list must call invalidate afterwards.
+
+	Exported Functions:
+	columns -- returns the entry_columns object of the content
+	invalidate -- drops the plot data and columns computed from the content, called after the content was changed
+	give_plot_data -- returns the necessary data for plotting, called by the plotter sub module
+	give_plot_data_bar --  returns the necessary data for plotting a bar chart, called by the plotter sub module
+	give_frame_counts -- returns the beginnings of all frames of a certain size holding entries and their amounts of entries, called by the plotter sub module
+	count_levels -- returns the amounts of entries per second, minute, hour and day
+	give_time_span -- returns the seconds between the earliest and the latest entry, called by the plotter sub module
+	give_plot_data_by_source -- returns the timestamps and ids of the plot data of each source, called by the plotter sub module
+	postings -- returns the index of the sources, the ascending positions of the entries of each source code in content
+	time_index -- returns the index of the timestamps, the positions of the entries in content sorted by their timestamps
+	slice -- returns a new logfile object holding only the entries within a time window
+	message_index -- returns the message_index of the messages of all entries in content
+	grep -- returns a new logfile object holding only the entries whose messages match a query
+	export_to_JSON -- saves the object as a JSON file for future analysis
+	export_to_NDJSON -- saves the object as a line delimited JSON file, entry by entry
+	export_to_binary -- saves the object as a binary columnar file, which is read in faster than a JSON file
+	"""
+	def __init__(self, name, lines, type, content, sources, hostnames=None, columns=None):
+		self.name = name
+		self.lines = lines
+		self.type = type
+		self.content = content
+		self._columns = columns
+		self.follow_state = None
+		self._plot_data = collections.OrderedDict()
+		self._sorted = None
+		self._postings = None
+		self._time_index = None
+		self._count_levels = None
+		self._message_index = None
+		if isinstance(sources, string_table) and isinstance(hostnames, string_table):
+			self.source_table = sources
+			self.hostname_table = hostnames
+		else:
+			self.source_table = string_table(sources)
+			self.hostname_table = string_table()
+			self._encode_entries()
+
+	def __str__(self):
+		return 'File of the type {0.type} with the name {0.name} and {0.lines} lines'.format(self)
+
+	def __getstate__(self):
+		state = self.__dict__.copy()
+		# columns built from the content are not passed to other processes, they are built again when needed
+		if self._content is not None:
+			state['_columns'] = None
+		state['_plot_data'] = collections.OrderedDict()
+		state['_postings'] = None
+		state['_time_index'] = None
+		state['_count_levels'] = None
+		state['_message_index'] = None
+		return state
+
+	@property
+	def sources(self):
+		return self.source_table.values
+
+	@property
+	def content(self):
+		if self._content is None:
+			self._content = self._columns.entries()
+		return self._content
+
+	@content.setter
+	def content(self, content):
+		self._content = content
+		self._columns = None
+		self._plot_data = collections.OrderedDict()
+		self._sorted = None
+		self._postings = None
+		self._time_index = None
+		self._count_levels = None
+		self._message_index = None
+
+	def invalidate(self):
+		"""Drops the cached results of give_plot_data and give_plot_data_bar, the indices and the columns built from the content,
+		so that they are computed again from the current content. Has to be called after entries were added to or changed in content.
+		"""
+		if self._content is not None:
+			self._columns = None
+		self._plot_data.clear()
+		self._sorted = None
+		self._postings = None
+		self._time_index = None
+		self._count_levels = None
+		self._message_index = None
+
+	def _cached(self, key, function, *args):
+		"""Returns the result of function for args that is stored under key, function is only called if no result is stored yet."""
+		cache = self._plot_data
+		if key in cache:
+			cache.move_to_end(key)
+			return cache[key]
+		ret = cache[key] = function(*args)
+		if len(cache) > _PLOT_DATA_CACHE_SIZE:
+			cache.popitem(last=False)
+		return ret
+
+	def postings(self):
+		"""Returns a dict mapping each source code to the ascending positions of all entries in content with this source code,
+		as numpy array if the columns function returns an entry_columns object, as list otherwise.
+		It is built when it is requested for the first time and again after the content was changed. The lists must not be changed.
+		"""
+		columns = self.columns()
+		if columns is not None:
+			return columns.postings()
+		if self._postings is None:
+			postings = {}
+			for position, x in enumerate(self.content):
+				if x.source_code is not None:
+					postings.setdefault(x.source_code, []).append(position)
+			self._postings = postings
+		return self._postings
+
+	def _ids_sorted(self):
+		"""Returns True if the entries in content are sorted by their id, which is usually the case, so that filtered entries need no sorting either."""
+		if self._sorted is None:
+			columns = self.columns()
+			if columns is not None:
+				ids = columns.ids
+				self._sorted = bool((ids[1:] >= ids[:-1]).all())
+			else:
+				ids = [x.id for x in self.content]
+				self._sorted = all(map(operator.le, ids, itertools.islice(ids, 1, None)))
+		return self._sorted
+
+	def columns(self):
+		"""Returns the entry_columns object of the content, or None if slogviz.config.columnar is False or numpy is not installed.
+		It is built when it is requested for the first time, after the content was replaced or entries were appended.
+		"""
+		if not slogviz.config.columnar:
+			return None
+		if self._columns is None or (self._content is not None and len(self._columns) != len(self._content)):
+			try:
+				self._columns = entry_columns.from_entries(self._content)
+			except ImportError:
+				return None
+		return self._columns
+
+	def _encode_entries(self):
+		"""Assigns the codes of the source_table and hostname_table to all entries and lets them share the stored strings."""
+		sources = self.source_table
+		hostnames = self.hostname_table
+		for x in self.content:
+			if x.source:
+				x.source_code = sources.add(x.source)
+				x.source = sources[x.source_code]
+			else:
+				x.source_code = None
+			x.hostname_code = hostnames.add(x.hostname)
+			x.hostname = hostnames[x.hostname_code]
+
+	def give_plot_data(self, remove_redundant_entries=0, sources=[]):
+		"""Filters the entries in the self.content attribute and returns the filtered list, their respective ids, timestamps and messages.
+		All list returned are sorted by the id of their respective log file entry.
+
+		Keyword arguments:
+		remove_redundant_entries -- If set to 1, all entries with the same timestamp will be condensed to one (default 0)
+		sources -- A list of sources, entries not in this list will be filtered out. If this list is empty, no filtering will occur. (default [])
+
+		If the columns function returns an entry_columns object, the entries are filtered and sorted by numpy,
+		the ids and timestamps are returned as numpy arrays and the entries and messages as lazy_list objects.
+		The result is kept until the content changes and returned again for the same arguments.
+		"""
+		codes = frozenset(self.source_table.select(sources)) if sources else None
+		return self._cached(('plot', bool(remove_redundant_entries), remove_redundant_entries == 1, codes), self._give_plot_data, remove_redundant_entries, codes)
+
+	def _give_plot_data(self, remove_redundant_entries, codes):
+		"""Computes the result of give_plot_data for the set of source codes codes, None means all sources."""
+		columns = self.columns()
+		if columns is not None:
+			import numpy
+			indices = columns.select(codes)
+			if remove_redundant_entries:
+				indices = columns.remove_redundant(indices)
+			if not self._ids_sorted():
+				indices = indices[columns.ids[indices].argsort(kind='stable')]
+			ids = numpy.arange(1, len(indices) + 1) if remove_redundant_entries == 1 else columns.ids[indices]
+			return lazy_list(columns.entry, indices, columns.entries_at), ids, columns.dates(indices), lazy_list(columns.message, indices, columns.messages_at)
+		if codes is None:
+			ret = list(self.content)
+		else:
+			postings = self.postings()
+			content = self.content
+			ret = [content[x] for x in heapq.merge(*(postings[x] for x in codes if x in postings))]
+		if remove_redundant_entries:
+			ret = _remove_redundant_entries(ret)
+		if not self._ids_sorted():
+			ret.sort(key=lambda x: x.id)
+		return ret, _give_ids(ret, remove_redundant_entries), _give_dates(ret), _give_messages(ret)
+
+	def give_plot_data_by_source(self, remove_redundant_entries=0, sources=[]):
+		"""Splits the result of give_plot_data with the same arguments by the sources of the entries.
+		Returns a list of one tuple per source in sources, consisting of the timestamps of its entries and their ids,
+		or their indices in the list of entries returned by give_plot_data if remove_redundant_entries is 1.
+		The entries of each source are found by the postings, the result is kept until the content changes.
+
+		Keyword arguments:
+		remove_redundant_entries -- If set to 1, all entries with the same timestamp will be condensed to one (default 0)
+		sources -- A list of sources, entries not in this list will be filtered out. If this list is empty, no filtering will occur. (default [])
+		"""
+		return self._cached(('sources', bool(remove_redundant_entries), remove_redundant_entries == 1, tuple(sources)), self._give_plot_data_by_source, remove_redundant_entries, sources)
+
+	def _give_plot_data_by_source(self, remove_redundant_entries, sources):
+		"""Computes the result of give_plot_data_by_source."""
+		entries, ids, dates, _ = self.give_plot_data(remove_redundant_entries, sources)
+		columns = self.columns()
+		postings = self.postings()
+		ret = []
+		if columns is not None:
+			import numpy
+			indices = entries.indices
+			ascending = self._ids_sorted()
+			for s in sources:
+				posting = postings.get(self.source_table.codes.get(s), numpy.empty(0, dtype=numpy.intp))
+				if ascending:
+					# the selected indices are ascending as well, so the positions of the entries of the source are found by a binary search
+					positions = numpy.searchsorted(indices, posting)
+					positions = positions[indices[numpy.minimum(positions, len(indices) - 1)] == posting] if len(indices) else positions[:0]
+				else:
+					positions = numpy.flatnonzero(columns.sources[indices] == self.source_table.codes.get(s, -2))
+				ret.append((dates[positions], positions if remove_redundant_entries == 1 else ids[positions]))
+			return ret
+		content = self.content
+		positions = {id(x): position for position, x in enumerate(entries)}
+		for s in sources:
+			posting = postings.get(self.source_table.codes.get(s), ())
+			selected = sorted((positions[id(x)], x) for x in (content[i] for i in posting) if id(x) in positions)
+			ret.append(([x.timestamp for _, x in selected], [position for position, _ in selected] if remove_redundant_entries == 1 else [x.id for _, x in selected]))
+		return ret
+
+	def time_index(self):
+		"""Returns a tuple of the timestamps of all entries in content as microseconds since 1970 UTC in ascending order
+		and the positions of the respective entries in content, entries with the same timestamp keep their order.
+		Both are numpy arrays if the columns function returns an entry_columns object, lists otherwise.
+		The index is built when it is requested for the first time and again after the content was changed, it must not be changed.
+		"""
+		if self._time_index is None:
+			columns = self.columns()
+			if columns is not None:
+				import numpy
+				timestamps = columns.timestamps
+				if len(timestamps) < 2 or bool((timestamps[1:] >= timestamps[:-1]).all()):
+					positions = numpy.arange(len(timestamps))
+				else:
+					positions = numpy.argsort(timestamps, kind='stable')
+				self._time_index = (timestamps[positions], positions)
+			else:
+				keys = [unix_microseconds(x.timestamp) for x in self.content]
+				positions = sorted(range(len(keys)), key=keys.__getitem__)
+				self._time_index = ([keys[x] for x in positions], positions)
+		return self._time_index
+
+	def slice(self, start=None, end=None):
+		"""Returns a new logfile object with the same name, type, source_table and hostname_table,
+		holding only the entries whose timestamps are at or after start and at or before end, in the order of content.
+		The window is found by a binary search in the time_index, so the time needed depends on the amount of entries within it.
+		Timestamps without timezone information are taken as UTC, just like the timestamps of the entries.
+
+		Keyword arguments:
+		start -- a datetime object, None means no lower bound (default None)
+		end -- a datetime object, None means no upper bound (default None)
+		"""
+		keys, positions = self.time_index()
+		first = 0 if start is None else bisect.bisect_left(keys, unix_microseconds(start))
+		last = len(keys) if end is None else bisect.bisect_right(keys, unix_microseconds(end))
+		if isinstance(positions, list):
+			return self._subset(sorted(positions[first:last]))
+		import numpy
+		return self._subset(numpy.sort(positions[first:last]).tolist())
+
+	def message_index(self):
+		"""Returns the message_index of the messages of all entries in content.
+		It is built when it is requested for the first time and again after the content was changed.
+		"""
+		if self._message_index is None:
+			self._message_index = message_index(x.message for x in self.content)
+		return self._message_index
+
+	def grep(self, query):
+		"""Returns a new logfile object with the same name, type, source_table and hostname_table,
+		holding only the entries whose messages match query, in the order of content.
+		The candidates are found in the message_index, only their messages are checked for phrases and regular expressions.
+
+		Positional arguments:
+		query -- a string, a query as described for the message_index class
+		"""
+		content = self.content
+		return self._subset(self.message_index().search(query, lambda x: content[x].message))
+
+	def _subset(self, positions):
+		"""Returns a new logfile object with the same name, type, source_table and hostname_table, holding the entries at the ascending positions in content."""
+		content = self._entries_function()(positions)
+		return logfile(self.name, len(content), self.type, content, self.source_table, self.hostname_table)
+
+	def _entries_function(self):
+		"""Returns a function returning a list of the entries at a list of positions in content,
+		which does not create the content list if only the columns exist.
+		"""
+		columns = self.columns()
+		if columns is not None and self._content is None:
+			return columns.entries_at
+		content = self.content
+		return lambda positions: [content[x] for x in positions]
+
+	def give_time_span(self):
+		"""Returns the amount of seconds between the earliest and the latest timestamp of the entries in self.content as a float,
+		taken from the time_index, so that it is correct even if content is not ordered by time.
+		"""
+		keys = self.time_index()[0]
+		return (int(keys[-1]) - int(keys[0])) / 1000000
+
+	def count_levels(self):
+		"""Returns a list of tuples, one for each frame size in _COUNT_LEVELS, of the frame size in microseconds,
+		the ascending numbers of all frames holding entries, counted from 1970 UTC on, and the amounts of entries in these frames.
+		The numbers and amounts are numpy arrays, each level is computed once in one pass over the level below,
+		the lowest one over the time_index. Returns None if the columns function returns None.
+		"""
+		if self._count_levels is None:
+			if self.columns() is None:
+				return None
+			import numpy
+			frames = self.time_index()[0]
+			counts = numpy.ones(len(frames), dtype=numpy.int64)
+			size = 1
+			ret = []
+			for seconds in _COUNT_LEVELS:
+				frames, counts = _add_up_frames(frames // (seconds * 1000000 // size), counts)
+				size = seconds * 1000000
+				ret.append((size, frames, counts))
+			self._count_levels = ret
+		return self._count_levels
+
+	def give_frame_counts(self, frame_seconds, start=None, end=None):
+		"""Returns the beginnings of all frames of the size frame_seconds holding entries and the amounts of entries in them.
+		The frames lie on a fixed grid, each one begins a whole multiple of frame_seconds after 1970-01-01 00:00:00 UTC,
+		so they do not drift with the timestamps of the entries. If start or end is given, only the frames overlapping the window between them are returned.
+		If the columns function returns an entry_columns object, the beginnings are a numpy datetime64 array and the amounts a numpy array,
+		which are added up from the largest of the count_levels that frame_seconds is a whole multiple of, otherwise from the time_index.
+		Otherwise they are a list of datetime objects without timezone information and a list of integers.
+
+		Positional arguments:
+		frame_seconds -- the size of each time frame in seconds, frames shorter than a microsecond are a microsecond long
+
+		Keyword arguments:
+		start -- a datetime object, None means no lower bound (default None)
+		end -- a datetime object, None means no upper bound (default None)
+		"""
+		frame = max(int(round(frame_seconds * 1000000)), 1)
+		levels = self.count_levels()
+		if levels is None:
+			keys = self.time_index()[0]
+			first = 0 if start is None else bisect.bisect_left(keys, unix_microseconds(start) // frame * frame)
+			last = len(keys) if end is None else bisect.bisect_left(keys, (unix_microseconds(end) // frame + 1) * frame)
+			ret = [(k, sum(1 for _ in g)) for k, g in itertools.groupby(itertools.islice(keys, first, last), key=lambda x: x // frame)]
+			return [_UNIX_EPOCH + datetime.timedelta(microseconds=k * frame) for k, _ in ret], [v for _, v in ret]
+		import numpy
+		for size, frames, counts in reversed(levels):
+			if frame % size == 0:
+				break
+		else:
+			size, frames = 1, self.time_index()[0]
+			counts = numpy.ones(len(frames), dtype=numpy.int64)
+		factor = frame // size
+		first = 0 if start is None else int(numpy.searchsorted(frames, unix_microseconds(start) // frame * factor))
+		last = len(frames) if end is None else int(numpy.searchsorted(frames, (unix_microseconds(end) // frame + 1) * factor))
+		frames, counts = _add_up_frames(frames[first:last] // factor, counts[first:last])
+		return (frames * frame).astype('datetime64[us]'), counts
+
+	def give_plot_data_bar(self, frame_seconds=0):
+		"""Counts how many entries in self.content in frames of the size frame_seconds exist and returns three lists.
+		The first list is an ascending list of all found frames ([1,2,3,...n] where n is the amount of found frames).
+		The second list stores the timestamp of the beginning of each frame in the first list.
+		The third list represents the amounts of entries in the frames of the first list
+		Only frames holding entries are found, they lie on the fixed grid described for give_frame_counts.
+
+		Example: ([1,2],[X,Y],[99,10]) would mean that in frame 1, beginning at time X there are 99 entries and
+		in frame 2, beginning at time Y, there are 10 entries.
+
+		Keyword arguments:
+		frame_seconds -- the size of each time frame in seconds (default 0)
+
+		If the columns function returns an entry_columns object, the second and third list are numpy arrays.
+		The result is kept until the content changes and returned again for the same frame_seconds.
+		"""
+		return self._cached(('bar', frame_seconds), self._give_plot_data_bar, frame_seconds)
+
+	def _give_plot_data_bar(self, frame_seconds):
+		"""Computes the result of give_plot_data_bar."""
+		dates, counts = self.give_frame_counts(frame_seconds)
+		return list(range(1, len(dates) + 1)), dates, counts
+
+	def export_to_JSON(self, sparse=False):
+		"""Stores the log file object as an JSON file with the name <self.name>.slogviz.json
+		The file created by this function can use up to 5 times the space the original file took, therefore there is the sparse argument.
+
+		Keyword arguments:
+		sparse -- if set to True, the self.structured_data not stored inside the JSON file in order to save space (default False)
+		"""
+		_write_JSON(self.name, self.type, self.content, sparse=sparse, sources=self.sources)
+
+	def export_to_NDJSON(self, sparse=False, append=False):
+		"""Stores the log file object as a line delimited JSON file with the name <self.name>.slogviz.ndjson, one line per entry.
+		Unlike export_to_JSON, the entries are written one by one, so that no copy of the whole object is built in memory.
+
+		Keyword arguments:
+		sparse -- if set to True, the structured_data of the entries is not stored in order to save space (default False)
+		append -- if set to True, only the entries with ids above the last id in an existing file are appended to it,
+			for instance after new lines were added by a refresh (default False)
+		"""
+		_write_NDJSON(self.name, self.type, self.content, sparse=sparse, append=append)
+
+	def export_to_binary(self, sparse=False):
+		"""Stores the log file object as a binary columnar file with the name <self.name>.slogviz.bin, which is read in a lot faster than a JSON file.
+		The codes of the sources and hostnames of the entries are kept.
+
+		Keyword arguments:
+		sparse -- if set to True, the structured_data of the entries is not stored in order to save space (default False)
+		"""
+		_write_binary(self.name, self.type, self.content, sparse=sparse, sources=self.source_table.values, hostnames=self.hostname_table.values)
+
+class merged_timeline(collections.abc.Sequence):
+	"""A read only list of the entries of several logfile objects, ordered by their timestamps across all of them.
+	The entries are merged lazily from the time_index of each logfile by a heap, so iterating over it takes memory
+	for one entry per logfile only, no combined list of all entries is created.
+	Timestamps without timezone information are taken as UTC, so they are ordered consistently with timezone aware ones.
+	Entries with the same timestamp keep the order of the logfile objects and, within one of them, the order of its content.
+
+	Accessing an item or a slice iterates over the merged entries from the beginning or, if it is closer, from the end,
+	so the first and the last entries are found fast, while a loop over all indices takes quadratic time, iterating is meant to be used instead.
+
+	Attributes:
+	logfiles -- the list of the merged logfile objects, they must not be changed while the merged_timeline is used
+	"""
+	def __init__(self, logfiles):
+		self.logfiles = list(logfiles)
+
+	def __len__(self):
+		return sum(len(x.time_index()[0]) for x in self.logfiles)
+
+	def __iter__(self):
+		return self._merge(False)
+
+	def __reversed__(self):
+		return self._merge(True)
+
+	def __getitem__(self, index):
+		length = len(self)
+		if isinstance(index, slice):
+			indices = range(length)[index]
+			if not indices:
+				return []
+			first = min(indices[0], indices[-1])
+			items = self._items(first, max(indices[0], indices[-1]) + 1, length)
+			return [items[x - first] for x in indices]
+		index = operator.index(index)
+		if index < 0:
+			index += length
+		if not 0 <= index < length:
+			raise IndexError('merged_timeline index out of range')
+		return self._items(index, index + 1, length)[0]
+
+	def _items(self, first, last, length):
+		"""Returns a list of the merged entries from the index first up to, but not including, the index last."""
+		if length - last < first:
+			ret = list(itertools.islice(self._merge(True), length - last, length - first))
+			ret.reverse()
+			return ret
+		return list(itertools.islice(self._merge(False), first, last))
+
+	def _merge(self, reverse):
+		"""Yields the entries of all logfile objects ordered by their timestamps, descending if reverse is True."""
+		streams = []
+		functions = []
+		for number, log in enumerate(self.logfiles):
+			keys, positions = log.time_index()
+			if reverse:
+				# lists are not copied, numpy arrays are reversed as views
+				keys, positions = (reversed(keys), reversed(positions)) if isinstance(keys, list) else (keys[::-1], positions[::-1])
+			streams.append(zip(_chunked(keys), itertools.repeat(number), _chunked(positions)))
+			functions.append(log._entries_function())
+		merged = heapq.merge(*streams, reverse=reverse)
+		# the entries are created in chunks, growing up to _LAZY_LIST_CHUNK, so that the entries of each logfile
+		# in a chunk are created by one call, while accessing only the first items does not create many entries
+		size = 64
+		while True:
+			chunk = list(itertools.islice(merged, size))
+			if not chunk:
+				return
+			positions = [[] for _ in functions]
+			for _, number, position in chunk:
+				positions[number].append(position)
+			entries = [iter(function(x)) for function, x in zip(functions, positions)]
+			for _, number, _ in chunk:
+				yield next(entries[number])
+			size = min(size * 2, _LAZY_LIST_CHUNK)
 #END exported classes
\ No newline at end of file
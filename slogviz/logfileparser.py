@@ -3,22 +3,164 @@
 """The sub module of slogviz, that parses log files and returns logfileclasses.logfile objects.
 
 Exported functions:
-readin(file) -- Reads in a file and returns a logfileclasses.logfile object.
+readin(file) -- Reads in a file and returns a logfileclasses.logfile object, syslog and evtx files may be parsed by multiple processes.
+is_compressed(file) -- Returns True if a file is compressed with gzip, bzip2 or xz.
+refresh(logfile) -- Adds the entries appended to a syslog file since it was read in follow mode.
+readin_iter(file) -- Reads in a file and yields its entries as logfileclasses.logfile_entry objects one by one.
+export_to_JSON(file) -- Reads in a file and stores it as a JSON file, without holding syslog files in memory.
+export_to_NDJSON(file) -- Reads in a file and stores it as a line delimited JSON file, entry by entry.
+export_to_binary(file) -- Reads in a file and stores it as a binary columnar file, which is read in a lot faster than a JSON file.
+clear_cache() -- Removes all files of the parse cache used by readin.
 """
 
+import io
+import os
+import locale
+import gzip
+import bz2
+import lzma
 import platform
 import re
+import concurrent.futures
+import functools
+import hashlib
+import tempfile
+import itertools
+import heapq
+import operator
 import datetime
 import time
 import json
-import sqlite3 as lite
-import Evtx.Evtx as evtx
-import untangle
 
 from .logfileclasses import *
+from .logfileclasses import _write_JSON, _write_NDJSON, _write_binary, _datetimes, _BINARY_MAGIC, _BINARY_VERSION, _BINARY_PREFIX, _BINARY_TUPLE, _BINARY_LINKED
+from .timestampdecoder import decode_syslog_timestamp, decode_precise_timestamp, decode_iso_timestamp, decode_unix_timestamp, unix_microseconds
 import slogviz.config
 
+# the evtx parsers are imported by _import_evtx when the first evtx file is read in, numpy and sqlite3 are imported by the functions using them,
+# so that reading in syslog files or exporting them does not wait for these imports
+evtx = None
+evtx_nodes = None
+evtx_views = None
+untangle = None
+ElementTree = None
+
+# syslog files are only split into byte ranges of at least this size for parallel parsing
+_MIN_CHUNK_SIZE = 1 << 20
+
+# the version of the parsers, it is part of the keys of the parse cache and must be increased whenever a parser returns different results
+_PARSER_VERSION = 1
+
+# the key of the parse cache includes a hash of this amount of samples of this size, spread over the whole file, and of its last bytes
+_CACHE_SAMPLES = 16
+_CACHE_SAMPLE_SIZE = 1 << 16
+
+# the absolute paths of all binary columnar files mapped by this process, their entries read from them whenever messages are accessed,
+# so files of the parse cache among them are never removed by _evict_cache
+_BINARIES_IN_USE = set()
+
+# False in the processes of the pool used by core._readin_files, which do not know the files in use by the main process,
+# the main process removes the least recently used files of the parse cache once the pool is done instead
+_cache_eviction = True
+
+# the amount of rows fetched at once from SQLite databases
+_BATCH_SIZE = 10000
+
+# the seconds between 1601-01-01, the beginning of the timestamps used by Chrome, and 1970-01-01
+_CHROME_EPOCH_OFFSET = 11644473600
+
+_URL_SOURCE = re.compile(r'.*(www\.|http[s]{0,1}:\/\/)([^\.]+)\..*')
+
+# the magic bytes at the beginning of compressed files and the modules able to decompress them
+_COMPRESSIONS = ((b'\x1f\x8b', gzip), (b'BZh', bz2), (b'\xfd7zXZ\x00', lzma))
+
+# evtx files are made up of chunks of this size following the file header
+_EVTX_CHUNK_SIZE = 0x10000
+
+# the fields read from the System element of evtx records: name, element and attribute holding the value or None for the text
+_EVTX_FIELDS = (('id', 'EventRecordID', None), ('message', 'EventID', None), ('date', 'TimeCreated', 'SystemTime'), ('hostname', 'Computer', None), ('source', 'Provider', 'Name'))
+_EVTX_MARKER = '{{slogviz:{}}}'
+_EVTX_SUBSTITUTION = re.compile(r'^\{slogviz:(\d+)\}$')
+
+_SYSLOG_LINE = re.compile(r'^(\D{3}\s+\d+\s\d{2}:\d{2}:\d{2})\s(\S+)\s([^\][:]+)(\[\d+\]){0,1}([^:])*:\s(.*)$')
+_REPEATED_LINE = re.compile(r'^.*---\slast\smessage\srepeated\s\d+\stime[s]{0,1}\s---$')
+_PRECISE_LINE = re.compile(r'^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}.\d{1,6}\+\d{2}:\d{2})\s(\S+)\s([^\][:]+)(\[\d+\]){0,1}([^:])*:\s(.*)$')
+
 #START internal functions
+def _import_evtx():
+	"""Imports the modules needed for parsing evtx files into this module, if they are not imported yet."""
+	global evtx, evtx_nodes, evtx_views, untangle, ElementTree
+	if evtx is None:
+		import Evtx.Evtx as evtx
+		import Evtx.Nodes as evtx_nodes
+		import Evtx.Views as evtx_views
+		import untangle
+		from xml.etree import ElementTree
+
+def _is_browser_history(file):
+	"""Returns True if the name of file suits to a browser history of Chrome or Firefox."""
+	return bool(re.match(r'^.*History$', file) or re.match(r'^.*places.*\.sqlite$', file))
+
+def _is_syslog(file):
+	"""Returns True if the name of file suits to a syslog file, rotated files compressed by logrotate like syslog.2.gz are included."""
+	p = re.compile(r'^.*log\.?(\d)*(\.gz|\.bz2|\.xz)?$')
+	return bool(p.match(file))
+
+@functools.lru_cache(maxsize=4096)
+def _url_source(url):
+	"""Returns the source of a visited url, the part of the domain name following 'www.' or the scheme, or '' if it can not be found.
+	Since many visits share the same url, the results are cached.
+	"""
+	m = _URL_SOURCE.match(url)
+	return m.group(2) if m else ''
+
+def _visit_conditions(time_column, epoch_offset, url_column, since=None, until=None, sources=None):
+	"""Returns a tuple of a string and a list, the SQL conditions restricting the visits of a browser history and the parameters they need.
+	The visit times are compared to the bounds directly, so that SQLite may use an index and only the matching rows are returned.
+	Since visit times are truncated to seconds when decoded, the bounds are rounded to full seconds accordingly.
+	Sources are compared through the SQL function slogviz_source, which needs to be registered as _url_source.
+
+	Positional arguments:
+	time_column -- the name of the column holding the visit time in microseconds
+	epoch_offset -- the seconds between the beginning of the visit times and 1970-01-01
+	url_column -- the name of the column holding the url
+
+	Keyword arguments:
+	since -- a datetime object, only visits at or after this time are selected, None means no lower bound (default None)
+	until -- a datetime object, only visits at or before this time are selected, None means no upper bound (default None)
+	sources -- a list of strings, only visits of urls with these sources are selected, if None or empty all sources are selected (default None)
+	"""
+	conditions = ''
+	parameters = []
+	if since is not None:
+		conditions += ' AND {} >= ?'.format(time_column)
+		parameters.append((-(-unix_microseconds(since) // 1000000) + epoch_offset) * 1000000)
+	if until is not None:
+		conditions += ' AND {} < ?'.format(time_column)
+		parameters.append((unix_microseconds(until) // 1000000 + 1 + epoch_offset) * 1000000)
+	if sources:
+		conditions += ' AND slogviz_source({}) IN ({})'.format(url_column, ','.join('?' * len(sources)))
+		parameters += sources
+	return conditions, parameters
+
+def _compression(file):
+	"""Returns the module (gzip, bz2 or lzma) needed to decompress file, detected by its magic bytes, or None if file is not compressed."""
+	with open(file, 'rb') as f:
+		start = f.read(6)
+	for magic, module in _COMPRESSIONS:
+		if start.startswith(magic):
+			return module
+	return None
+
+def _open_syslog(file):
+	"""Opens a syslog file for reading text, compressed files are decompressed while they are read.
+	The same decoding and newline translation as open(file, 'r') is used.
+	"""
+	module = _compression(file)
+	if module:
+		return module.open(file, 'rt')
+	return open(file, 'r')
+
 def _print_progress(counter):
 	"""Prints one line with the number of the parsed entry if the interactive mode is used.
 	The line is ended by a carriage return.
@@ -39,61 +181,391 @@ def _delete_print(number=1):
 	if slogviz.config.interactive and not platform.system() == 'Windows':#Windows does not fully implement ANSI Control Characters, see README
 		print('\x1b[2K\x1b[1A'*number)
 
-def _readin_syslog(file, time_offset='+0000'):
-	"""Reads in a file of the syslog format.
-	Returns a logfileclasses.logfile object containg all the data.
+def _match_syslog_line(x, time_offset=None):
+	"""Matches one line of a syslog file against the known line formats.
+	Returns a tuple of the match object and the timestamp of the entry, if the line starts a new entry.
+	Otherwise, the match object is False for lines saying "last message repeated x times", which shall be ignored,
+	and None for lines that are added to the entry read before.
 
 	Positional arguments:
-	file -- the name of the file to be read in as a string, here name euqals path to the file
+	x -- the line as a string
+
+	Keyword arguments:
+	time_offset -- a offset that shall be added to all timestamps without timezone information, '+0100' equals UTC plus one hour,
+		if None, the timestamp is not decoded and None is returned instead (default None)
+	"""
+	m = _SYSLOG_LINE.search(x)
+	if m:
+		# default syslog line was read, herre we assign the year 2017 to all timestamps
+		return m, None if time_offset is None else decode_syslog_timestamp(m.group(1), time_offset)
+	if _REPEATED_LINE.search(x):
+		return False, None
+	m = _PRECISE_LINE.search(x)
+	if m:
+		# precise timestamps are detected
+		return m, None if time_offset is None else decode_precise_timestamp(m.group(1))
+	return None, None
+
+def _parse_syslog_lines(lines, file, time_offset='+0000', leading=None, progress=True, sources=None, hostnames=None):
+	"""Parses lines of the syslog format.
+	Yields one logfileclasses.logfile_entry object after the other, the ids are counted from 1 on.
+	Since following lines may still be added to an entry, each entry is yielded once the next entry or the end of lines is reached.
+
+	Positional arguments:
+	lines -- an iterable of strings, each one being a line including its line break
+	file -- the name of the file the lines belong to, stored as origin_name of each entry
 
 	Keyword arguments:
 	time_offset -- a offset that shall be added to all timestamps without timezone information (default '+0000')
 					'+0100' equals UTC plus one hour
+	leading -- a list, if given, all lines that would be added to an entry before the first entry was read are appended to it, otherwise they are ignored (default None)
+	progress -- if set to True, the number of each parsed entry is printed (default True)
+	sources -- the logfileclasses.string_table the sources of all entries are added to, if None a new one is used (default None)
+	hostnames -- the logfileclasses.string_table the hostnames of all entries are added to, if None a new one is used (default None)
 	"""
-	f = open(file, 'r')
 	counter = 0
-	content = []
-	sources = []
-	p = re.compile(r'^(\D{3}\s+\d+\s\d{2}:\d{2}:\d{2})\s(\S+)\s([^\][:]+)(\[\d+\]){0,1}([^:])*:\s(.*)$')
-	p2 = re.compile(r'^.*---\slast\smessage\srepeated\s\d+\stime[s]{0,1}\s---$')
-	precise_date = re.compile(r'^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}.\d{1,6}\+\d{2}:\d{2})\s(\S+)\s([^\][:]+)(\[\d+\]){0,1}([^:])*:\s(.*)$')
-
-	for x in f.readlines():
+	last = None
+	sources = string_table() if sources is None else sources
+	hostnames = string_table() if hostnames is None else hostnames
+	for x in lines:
 		counter+=1
-		m = p.search(x)
-		_print_progress(counter)
+		m, formatted_date = _match_syslog_line(x, time_offset)
+		if progress:
+			_print_progress(counter)
 		if m:
-			# default syslog line was read, herre we assign the year 2017 to all timestamps
-			formatted_date = datetime.datetime.strptime('2017 ' + m.group(1)+ time_offset,"%Y %b %d %H:%M:%S%z")
-			content.append(logfile_entry(counter, file, m.group(6), m.group(0), formatted_date, m.group(2),m.group(3)))
-			if not m.group(3) in sources:
-				sources.append(m.group(3))
-		elif p2.search(x):
+			if last:
+				yield last
+			hostname_code = hostnames.add(m.group(2))
+			source_code = sources.add(m.group(3))
+			last = logfile_entry(counter, file, m.group(6), m.group(0), formatted_date, hostnames[hostname_code], sources[source_code], hostname_code, source_code)
+		elif m is False:
 			# a message syaing "last message repeated x times" was read, here we simply ignore such lines
 			counter -= 1
 		else:
-			m3 = precise_date.search(x)
-			if m3:
-				# precise timestamps are detected
-				unformatted_date = m3.group(1)
-				unformatted_date = unformatted_date[:-3]+unformatted_date[-2:]
-				# this hack around is not needed in Python 3.7, see https://bugs.python.org/issue15873
-				formatted_date = datetime.datetime.strptime(unformatted_date,"%Y-%m-%dT%H:%M:%S.%f%z")
-				content.append(logfile_entry(counter, file, m3.group(6), m3.group(0), formatted_date, m3.group(2), m3.group(3)))
-				if not m3.group(3) in sources:
-					sources.append(m3.group(3))
+			# in case no prior regex matches, the line is added to the line read before
+			if last:
+				last.message += x
+				last.structured_data += x
+			elif leading is not None:
+				leading.append(x)
+			counter -= 1
+	if last:
+		yield last
+
+def _line_ranges(data, start, end):
+	"""Yields a tuple of the start, the end without the line break and the end including the line break of each line
+	between the byte offsets start and end of data, lines are split at '\\n'.
+
+	Positional arguments:
+	data -- a bytes like object, for example a mmap object
+	start -- the byte offset of the first line
+	end -- the byte offset of the end of the last line
+	"""
+	position = start
+	while position < end:
+		next_position = data.find(b'\n', position, end) + 1 or end
+		line_end = next_position
+		if data[line_end-1:line_end] == b'\n':
+			line_end -= 1
+		if line_end > position and data[line_end-1:line_end] == b'\r':
+			line_end -= 1
+		yield position, line_end, next_position
+		position = next_position
+
+class _mapped_syslog(mapped_file):
+	"""A logfileclasses.mapped_file of a syslog file.
+	The location of an entry is the byte offset of its first line, the message and structured_data are found by
+	matching this line and all following lines, that are added to the entry, just as _parse_syslog_lines does.
+	"""
+	def entry(self, location):
+		data = self.open()
+		ranges = _line_ranges(data, location, len(data))
+		start, line_end, _ = next(ranges)
+		m, _ = _match_syslog_line(data[start:line_end].decode(self.encoding))
+		message = m.group(6)
+		structured_data = m.group(0)
+		for start, _, next_position in ranges:
+			x = self.text(start, next_position)
+			following, _ = _match_syslog_line(x)
+			if following:
+				break
+			elif following is None:
+				message += x
+				structured_data += x
+		return message, structured_data
+
+def _scan_mapped_syslog(mapping, start, end, sources, hostnames, time_offset='+0000', progress=True):
+	"""Parses the lines of the syslog format between the byte offsets start and end of a memory mapped file.
+	Yields one tuple of id, byte offset of the first line, timestamp, hostname code and source code per entry, the ids are counted from 1 on.
+	Lines that are added to an entry are only skipped here, they are found again by _mapped_syslog when the message of the entry is requested.
+
+	Positional arguments:
+	mapping -- a logfileclasses.mapped_file object
+	start -- the byte offset of the first line
+	end -- the byte offset of the end of the last line
+	sources -- the logfileclasses.string_table the sources of all entries are added to
+	hostnames -- the logfileclasses.string_table the hostnames of all entries are added to
+
+	Keyword arguments:
+	time_offset -- a offset that shall be added to all timestamps without timezone information (default '+0000')
+	progress -- if set to True, the number of each parsed entry is printed (default True)
+	"""
+	data = mapping.open()
+	encoding = mapping.encoding
+	counter = 0
+	for position, line_end, _ in _line_ranges(data, start, end):
+		counter += 1
+		m, formatted_date = _match_syslog_line(data[position:line_end].decode(encoding), time_offset)
+		if progress:
+			_print_progress(counter)
+		if m:
+			yield counter, position, formatted_date, hostnames.add(m.group(2)), sources.add(m.group(3))
+		else:
+			counter -= 1
+
+def _iter_syslog(file, time_offset='+0000', sources=None, hostnames=None):
+	"""Reads in a file of the syslog format line by line.
+	Yields one logfileclasses.logfile_entry object after the other, without ever holding the whole file in memory.
+	Compressed files are decompressed as a stream.
+
+	Positional arguments:
+	file -- the name of the file to be read in as a string, here name euqals path to the file
+
+	Keyword arguments:
+	time_offset -- a offset that shall be added to all timestamps without timezone information (default '+0000')
+					'+0100' equals UTC plus one hour
+	sources -- the logfileclasses.string_table the sources of all entries are added to, if None a new one is used (default None)
+	hostnames -- the logfileclasses.string_table the hostnames of all entries are added to, if None a new one is used (default None)
+	"""
+	with _open_syslog(file) as f:
+		yield from _parse_syslog_lines(f, file, time_offset, sources=sources, hostnames=hostnames)
+	_delete_print()
+
+def _syslog_chunks(file, parts):
+	"""Splits a file into at most parts byte ranges, each one starting at the beginning of a line.
+	Returns a list of (start, end) tuples covering the whole file.
+
+	Positional arguments:
+	file -- the name of the file, here name euqals path to the file
+	parts -- the wanted amount of byte ranges
+	"""
+	size = os.path.getsize(file)
+	parts = max(1, min(parts, size // _MIN_CHUNK_SIZE))
+	starts = [0]
+	with open(file, 'rb') as f:
+		for i in range(1, parts):
+			f.seek(max(size * i // parts, starts[-1]))
+			f.readline()
+			position = f.tell()
+			if position >= size:
+				break
+			if position > starts[-1]:
+				starts.append(position)
+	return list(zip(starts, starts[1:] + [size]))
+
+def _parse_syslog_chunk(args):
+	"""Parses one byte range of a syslog file, executed by the worker processes of _readin_syslog_parallel.
+	Returns a tuple of the lines that belong to an entry of a prior chunk, a list of tuples holding the attributes of each entry
+	in the order of the logfileclasses.logfile_entry constructor without origin_name, hostname and source, with ids counted from 1 on,
+	and the values of the string tables of the sources and hostnames, which the codes of the entries refer to.
+	Plain tuples are returned, since they are transferred between processes a lot faster than objects.
+
+	Positional arguments:
+	args -- a tuple of the file name, the start and end of the byte range and the time_offset
+	"""
+	file, start, end, time_offset = args
+	with open(file, 'rb') as f:
+		f.seek(start)
+		data = f.read(end - start)
+	leading = []
+	sources = string_table()
+	hostnames = string_table()
+	# the same decoding and newline translation as open(file, 'r') is used
+	lines = io.TextIOWrapper(io.BytesIO(data))
+	content = [(x.id, x.message, x.structured_data, x.timestamp, x.hostname_code, x.source_code) for x in _parse_syslog_lines(lines, file, time_offset, leading=leading, progress=False, sources=sources, hostnames=hostnames)]
+	return leading, content, sources.values, hostnames.values
+
+def _parse_mapped_syslog_chunk(args):
+	"""Parses one byte range of a memory mapped syslog file, executed by the worker processes of _readin_syslog_parallel.
+	Returns a tuple of an empty list, since no lines need to be added to entries of a prior chunk,
+	the list of tuples yielded by _scan_mapped_syslog, with ids counted from 1 on,
+	and the values of the string tables of the sources and hostnames, which the codes of the entries refer to.
+
+	Positional arguments:
+	args -- a tuple of the file name, the start and end of the byte range and the time_offset
+	"""
+	file, start, end, time_offset = args
+	mapping = _mapped_syslog(file)
+	sources = string_table()
+	hostnames = string_table()
+	content = list(_scan_mapped_syslog(mapping, start, end, sources, hostnames, time_offset, progress=False))
+	mapping.close()
+	return [], content, sources.values, hostnames.values
+
+def _readin_syslog_parallel(file, time_offset='+0000', workers=2, mapped=False):
+	"""Reads in a file of the syslog format with multiple processes.
+	The file is split into byte ranges at line breaks, which are parsed in a process pool and merged afterwards.
+	Lines at the beginning of a range that belong to the last entry of the prior range are added to it,
+	the ids are shifted and the codes of the sources and hostnames of each range are translated,
+	so that the result is exactly the same as the one of _readin_syslog.
+	Returns a logfileclasses.logfile object containg all the data.
+
+	Positional arguments:
+	file -- the name of the file to be read in as a string, here name euqals path to the file
+
+	Keyword arguments:
+	time_offset -- a offset that shall be added to all timestamps without timezone information (default '+0000')
+	workers -- the amount of processes used (default 2)
+	mapped -- if set to True, logfileclasses.mapped_logfile_entry objects are created, see _readin_syslog_mapped (default False)
+	"""
+	chunks = _syslog_chunks(file, workers)
+	if len(chunks) < 2:
+		return _readin_syslog_mapped(file, time_offset) if mapped else _readin_syslog(file, time_offset)
+	content = []
+	sources = string_table()
+	hostnames = string_table()
+	mapping = _mapped_syslog(file)
+	with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+		for leading, chunk_content, chunk_sources, chunk_hostnames in executor.map(_parse_mapped_syslog_chunk if mapped else _parse_syslog_chunk, [(file, start, end, time_offset) for start, end in chunks]):
+			offset = len(content)
+			source_codes = [sources.add(x) for x in chunk_sources]
+			hostname_codes = [hostnames.add(x) for x in chunk_hostnames]
+			if mapped:
+				for id, location, timestamp, hostname_code, source_code in chunk_content:
+					hostname_code = hostname_codes[hostname_code]
+					source_code = source_codes[source_code]
+					content.append(mapped_logfile_entry(id + offset, file, mapping, location, timestamp, hostnames[hostname_code], sources[source_code], hostname_code, source_code))
 			else:
-				# in case no prior regex matches, the line is added to the line read before
-				if len(content) > 0:
-					content[-1].message += x
-					content[-1].structured_data += x
-					counter -= 1
-				else:
-					counter -= 1
-					pass
-	f.close()
+				if leading and content:
+					lines = ''.join(leading)
+					content[-1].message += lines
+					content[-1].structured_data += lines
+				for id, message, structured_data, timestamp, hostname_code, source_code in chunk_content:
+					hostname_code = hostname_codes[hostname_code]
+					source_code = source_codes[source_code]
+					content.append(logfile_entry(id + offset, file, message, structured_data, timestamp, hostnames[hostname_code], sources[source_code], hostname_code, source_code))
+			_print_progress(len(content))
+	_delete_print()
+	return logfile(file, len(content), 'syslog', content, sources, hostnames)
+
+def _readin_syslog(file, time_offset='+0000'):
+	"""Reads in a file of the syslog format.
+	Returns a logfileclasses.logfile object containg all the data.
+
+	Positional arguments:
+	file -- the name of the file to be read in as a string, here name euqals path to the file
+
+	Keyword arguments:
+	time_offset -- a offset that shall be added to all timestamps without timezone information (default '+0000')
+					'+0100' equals UTC plus one hour
+	"""
+	sources = string_table()
+	hostnames = string_table()
+	content = list(_iter_syslog(file, time_offset, sources, hostnames))
+	lf = logfile(file, len(content), 'syslog', content, sources, hostnames)
+	return lf
+
+def _readin_syslog_mapped(file, time_offset='+0000'):
+	"""Reads in a file of the syslog format through a memory map.
+	Returns a logfileclasses.logfile object containg logfileclasses.mapped_logfile_entry objects,
+	which only store the byte offset of their first line instead of their message and structured_data.
+	Therefore, the file must not be changed as long as the returned object is used.
+
+	Positional arguments:
+	file -- the name of the file to be read in as a string, here name euqals path to the file
+
+	Keyword arguments:
+	time_offset -- a offset that shall be added to all timestamps without timezone information (default '+0000')
+					'+0100' equals UTC plus one hour
+	"""
+	size = os.path.getsize(file)
+	if size == 0:
+		# empty files can not be mapped
+		return _readin_syslog(file, time_offset)
+	mapping = _mapped_syslog(file)
+	content = []
+	sources = string_table()
+	hostnames = string_table()
+	for id, location, timestamp, hostname_code, source_code in _scan_mapped_syslog(mapping, 0, size, sources, hostnames, time_offset):
+		content.append(mapped_logfile_entry(id, file, mapping, location, timestamp, hostnames[hostname_code], sources[source_code], hostname_code, source_code))
+	_delete_print()
+	return logfile(file, len(content), 'syslog', content, sources, hostnames)
+
+class _follow_state(object):
+	"""A class storing where a syslog file read in follow mode was read up to.
+	The file is kept open, so that lines appended to it are still read after it was rotated.
+
+	Attributes:
+	file -- the file object, opened for reading bytes
+	inode -- the inode of the open file, used to detect that the file was rotated
+	offset -- the byte offset behind the last complete line that was parsed
+	time_offset -- a offset that shall be added to all timestamps without timezone information
+	encoding -- the encoding used to decode the lines, the same that open() uses
+	"""
+	def __init__(self, file, time_offset):
+		self.file = open(file, 'rb')
+		self.inode = os.fstat(self.file.fileno()).st_ino
+		self.offset = 0
+		self.time_offset = time_offset
+		self.encoding = locale.getpreferredencoding(False)
+
+def _complete_lines(state):
+	"""Yields all complete lines of the file of a _follow_state behind its offset as strings and moves the offset behind each of them.
+	A last line without a line break is not yielded, since it may still be written.
+
+	Positional arguments:
+	state -- a _follow_state object
+	"""
+	state.file.seek(state.offset)
+	for raw in state.file:
+		if not raw.endswith(b'\n'):
+			break
+		state.offset += len(raw)
+		yield raw.decode(state.encoding).replace('\r\n', '\n')
+
+def _follow_syslog(lf, progress=False):
+	"""Parses the complete lines appended to the open file of lf.follow_state and adds the new entries to lf.
+	Lines at the beginning that continue the last entry are added to it and the ids continue the ones of lf.
+	If the file is smaller than the offset read up to, it was truncated and is read from its beginning again.
+
+	Positional arguments:
+	lf -- a logfileclasses.logfile object read in follow mode
+
+	Keyword arguments:
+	progress -- if set to True, the number of each parsed entry is printed (default False)
+	"""
+	state = lf.follow_state
+	if os.fstat(state.file.fileno()).st_size < state.offset:
+		state.offset = 0
+	leading = []
+	offset = lf.content[-1].id if lf.content else 0
+	new_entries = list(_parse_syslog_lines(_complete_lines(state), lf.name, state.time_offset, leading=leading, progress=progress, sources=lf.source_table, hostnames=lf.hostname_table))
+	if leading and lf.content:
+		lines = ''.join(leading)
+		lf.content[-1].message += lines
+		lf.content[-1].structured_data += lines
+	for x in new_entries:
+		x.id += offset
+	lf.content.extend(new_entries)
+	lf.lines = len(lf.content)
+	lf.invalidate()
+
+def _readin_syslog_follow(file, time_offset='+0000'):
+	"""Reads in a file of the syslog format in follow mode.
+	Returns a logfileclasses.logfile object containg all the data, its follow_state attribute remembers the byte offset and inode of the file,
+	so that refresh only needs to parse the lines appended later on.
+
+	Positional arguments:
+	file -- the name of the file to be read in as a string, here name euqals path to the file
+
+	Keyword arguments:
+	time_offset -- a offset that shall be added to all timestamps without timezone information (default '+0000')
+					'+0100' equals UTC plus one hour
+	"""
+	lf = logfile(file, 0, 'syslog', [], string_table(), string_table())
+	lf.follow_state = _follow_state(file, time_offset)
+	_follow_syslog(lf, progress=True)
 	_delete_print()
-	lf = logfile(file, counter, 'syslog', content,sources)
 	return lf
 
 def _readin_JSON(file):
@@ -108,15 +580,7 @@ def _readin_JSON(file):
 		if 'logfile' in obj:
 			return logfile(obj['logfile']['name'], obj['logfile']['lines'], obj['logfile']['type'], obj['logfile']['content'], obj['logfile']['sources'])
 		if 'logfile_entry' in obj:
-			if len(obj['logfile_entry']['timestamp']['datetime']) >= 20 :
-				date = datetime.datetime.strptime(obj['logfile_entry']['timestamp']['datetime'],"%Y-%m-%dT%H:%M:%S.%f")
-			elif obj['logfile_entry']['timestamp']['datetime'][-6:-5] != '+':
-				date = datetime.datetime.strptime(obj['logfile_entry']['timestamp']['datetime'],"%Y-%m-%dT%H:%M:%S")
-			else:
-				unformatted_date = obj['logfile_entry']['timestamp']['datetime']
-				unformatted_date = unformatted_date[:-3]+unformatted_date[-2:]
-				# once again, related to missing features in Python 3.6
-				date = datetime.datetime.strptime(unformatted_date,"%Y-%m-%dT%H:%M:%S.%f%z")
+			date = decode_iso_timestamp(obj['logfile_entry']['timestamp']['datetime'])
 			return logfile_entry(obj['logfile_entry']['id'], file, obj['logfile_entry']['message'], obj['logfile_entry']['structured_data'], date,obj['logfile_entry']['hostname'],obj['logfile_entry']['source'])
 		return obj
 
@@ -125,136 +589,775 @@ def _readin_JSON(file):
 	fp.close()
 	return lf
 
-def _readin_chrome_history(file):
-	"""Reads in a file of the SQLite format created by Google Chrome.
+def _iter_NDJSON(file, sources=None, hostnames=None):
+	"""Reads a line delimited JSON file created by a previous slogviz process line by line and yields one logfileclasses.logfile_entry per line.
+	The header line is skipped, see _readin_NDJSON.
+
+	Positional arguments:
+	file -- the name of the file to readin as a string, here name euqals path to the file
+
+	Keyword arguments:
+	sources -- a logfileclasses.string_table the sources are added to, the entries get their codes (default None)
+	hostnames -- a logfileclasses.string_table the hostnames are added to, the entries get their codes (default None)
+	"""
+	with open(file, 'r', encoding='utf-8') as fp:
+		fp.readline()
+		for line in fp:
+			if not line.strip():
+				continue
+			obj = json.loads(line)
+			date = decode_iso_timestamp(obj['timestamp'])
+			x = logfile_entry(obj['id'], file, obj['message'], obj['structured_data'], date, obj['hostname'], obj['source'])
+			if sources is not None and x.source:
+				x.source_code = sources.add(x.source)
+				x.source = sources[x.source_code]
+			if hostnames is not None:
+				x.hostname_code = hostnames.add(x.hostname)
+				x.hostname = hostnames[x.hostname_code]
+			yield x
+
+def _readin_NDJSON(file):
+	"""Reads in a line delimited JSON file created by a previous slogviz process.
+	The first line holds the name and type of the original file, each following line one entry.
 	Returns a logfileclasses.logfile object containg all the data.
 
 	Positional arguments:
 	file -- the name of the file to readin as a string, here name euqals path to the file
 	"""
-	con = lite.connect(file)
+	with open(file, 'r', encoding='utf-8') as fp:
+		header = json.loads(fp.readline())['logfile']
+	sources = string_table()
+	hostnames = string_table()
+	content = list(_iter_NDJSON(file, sources, hostnames))
+	return logfile(header['name'], len(content), header['type'], content, sources, hostnames)
+
+class _mapped_binary(mapped_file):
+	"""A logfileclasses.mapped_file of a binary columnar file written by logfileclasses.logfile.export_to_binary.
+	The location of an entry is its index, its message and structured_data are decoded from the heaps of the file when requested.
+	The columns are numpy arrays using the memory map as their buffer, so nothing is copied when they are read.
+	Linked structured_data fields are read from the original file through a mapped_file of the class named in the header.
+	"""
+	def __init__(self, name, encoding='utf-8'):
+		mapped_file.__init__(self, name, 'utf-8')
+		self.header = None
+		self._columns = None
+		self._linked = None
+		_BINARIES_IN_USE.add(os.path.abspath(name))
+
+	def close(self):
+		# the arrays must be released before the map can be closed
+		self._columns = None
+		if self._linked is not None:
+			self._linked.close()
+			self._linked = None
+		mapped_file.close(self)
+
+	def columns(self):
+		"""Returns a dict of the columns of the file as numpy arrays, the heaps are included as arrays of bytes."""
+		if self._columns is None:
+			import numpy
+			data = self.open()
+			if len(data) < _BINARY_PREFIX.size:
+				raise ValueError('{} is too short for a binary slogviz file'.format(self.name))
+			magic, version, header_size = _BINARY_PREFIX.unpack_from(data)
+			if magic != _BINARY_MAGIC or version != _BINARY_VERSION:
+				raise ValueError('{} is not a binary slogviz file of version {}'.format(self.name, _BINARY_VERSION))
+			self.header = json.loads(data[_BINARY_PREFIX.size:_BINARY_PREFIX.size + header_size].decode('utf-8'))
+			columns = {name: numpy.frombuffer(data, dtype=dtype, count=count, offset=offset) for name, (dtype, offset, count) in self.header['columns'].items()}
+			for name, (offset, size) in self.header['heaps'].items():
+				columns[name + '_heap'] = numpy.frombuffer(data, dtype=numpy.uint8, count=size, offset=offset)
+			self._columns = columns
+		return self._columns
+
+	def _text(self, field, location):
+		columns = self.columns()
+		offsets = columns[field]
+		return columns[field + '_heap'][offsets[location]:offsets[location + 1]].tobytes().decode('utf-8', 'surrogatepass')
+
+	def entry(self, location):
+		columns = self.columns()
+		kind = columns['structured_data_kind'][location]
+		if kind == _BINARY_LINKED:
+			if self._linked is None:
+				mapping_class, name, encoding = self.header['mapping']
+				self._linked = _LINKED_MAPPINGS[mapping_class](name, encoding)
+			structured_data = self._linked.entry(int(columns['location'][location]))[1]
+		else:
+			structured_data = self._text('structured_data', location)
+			if kind == _BINARY_TUPLE:
+				structured_data = tuple(json.loads(structured_data))
+		return self._text('message', location), structured_data
+
+def _readin_binary(file, origin_name=None):
+	"""Reads in a binary columnar file created by logfileclasses.logfile.export_to_binary.
+	Returns a logfileclasses.logfile object containg logfileclasses.mapped_logfile_entry objects,
+	whose message and structured_data are only decoded from the memory mapped file when needed.
+	Unless slogviz.config.columnar is False, the logfile object uses the columns of the file as its logfileclasses.entry_columns
+	and the entries are only created when they are accessed.
+
+	Positional arguments:
+	file -- the name of the file to readin as a string, here name euqals path to the file
+
+	Keyword arguments:
+	origin_name -- the origin_name of the entries, None means file (default None)
+	"""
+	mapping = _mapped_binary(file)
+	columns = mapping.columns()
+	header = mapping.header
+	sources = string_table(header['sources'])
+	hostnames = string_table(header['hostnames'])
+	origin_name = origin_name or file
+	if slogviz.config.columnar:
+		return logfile(header['name'], header['lines'], header['type'], None, sources, hostnames, columns=entry_columns.from_mapping(mapping, origin_name, hostnames, sources))
+	source_values = sources.values + ['']
+	hostname_values = hostnames.values
+	content = [mapped_logfile_entry(id, origin_name, mapping, location, timestamp, hostname_values[hostname_code], source_values[source_code], hostname_code, None if source_code < 0 else source_code)
+		for location, (id, timestamp, hostname_code, source_code) in enumerate(zip(columns['id'].tolist(), _datetimes(columns['timestamp'], columns['utcoffset']), columns['hostname'].tolist(), columns['source'].tolist()))]
+	return logfile(header['name'], len(content), header['type'], content, sources, hostnames)
+
+def _readin_browser_history(file, query, parameters):
+	"""Reads in the visits of a browser history stored in a SQLite file and returns a logfileclasses.logfile object containg all the data.
+	The rows are fetched in batches, each one consisting of the id of the visit, the url, the visit time in seconds since 1970 and all other columns.
+
+	Positional arguments:
+	file -- the name of the file to readin as a string, here name euqals path to the file
+	query -- the SQL query selecting the visits
+	parameters -- the parameters of the query
+	"""
+	import sqlite3
+	con = sqlite3.connect(file)
+	con.create_function('slogviz_source', 1, _url_source)
 	content = []
+	sources = string_table()
+	hostnames = string_table([''])
 	with con:
 		cur = con.cursor()
-		cur.execute("SELECT visits.id, urls.url, datetime(visits.visit_time / 1000000 + (strftime('%s', '1601-01-01')), 'unixepoch'), * FROM urls, visits WHERE urls.id = visits.url;")
-		rows = cur.fetchall()
-		sources = []
-		for row in rows:
-			_print_progress(rows.index(row))
-			date = datetime.datetime.strptime(row[2],"%Y-%m-%d %H:%M:%S")
-			source = ''
-			pattern = re.compile(r'.*(www\.|http[s]{0,1}:\/\/)([^\.]+)\..*')
-			m = pattern.match(row[1])
-			if m:
-				source = m.group(2)
-				if not source in sources:
-					sources.append(source)
-			content.append(logfile_entry(row[0], file, row[1], row[3:], date, '', source))
+		cur.execute(query, parameters)
+		rows = cur.fetchmany(_BATCH_SIZE)
+		while rows:
+			for row in rows:
+				source = _url_source(row[1])
+				source_code = None
+				if source:
+					source_code = sources.add(source)
+					source = sources[source_code]
+				content.append(logfile_entry(row[0], file, row[1], row[3:], decode_unix_timestamp(row[2]), '', source, 0, source_code))
+			_print_progress(len(content))
+			rows = cur.fetchmany(_BATCH_SIZE)
+	con.close()
 	_delete_print()
-	return logfile(file, len(content), 'firefox_sqlite', content, sources)
+	return logfile(file, len(content), 'firefox_sqlite', content, sources, hostnames)
 
-def _readin_moz_places(file):
-	"""Reads in a file of the SQLite format created by Mozilla Firefox.
+def _readin_chrome_history(file, since=None, until=None, sources=None):
+	"""Reads in a file of the SQLite format created by Google Chrome.
 	Returns a logfileclasses.logfile object containg all the data.
+	The time window and sources are part of the SQL query, so that only matching visits are read.
 
 	Positional arguments:
 	file -- the name of the file to readin as a string, here name euqals path to the file
+
+	Keyword arguments:
+	since -- a datetime object, only visits at or after this time are read, None means no lower bound (default None)
+	until -- a datetime object, only visits at or before this time are read, None means no upper bound (default None)
+	sources -- a list of strings, only visits of urls with these sources are read, if None or empty all visits are read (default None)
 	"""
-	con = lite.connect(file)
-	content = []
-	with con:
-		cur = con.cursor()
-		cur.execute("SELECT moz_historyvisits.id, moz_places.url, datetime(moz_historyvisits.visit_date/1000000,'unixepoch'), * FROM moz_places, moz_historyvisits WHERE moz_places.id = moz_historyvisits.place_id;")
-		rows = cur.fetchall()
-		sources = []
-		counter = 0
-		for row in rows:
-			_print_progress(counter)
-			counter += 1
-			date = datetime.datetime.strptime(row[2],"%Y-%m-%d %H:%M:%S")
-			source = ''
-			pattern = re.compile(r'.*(www\.|http[s]{0,1}:\/\/)([^\.]+)\..*')
-			m = pattern.match(row[1])
-			if m:
-				source = m.group(2)
-				if not source in sources:
-					sources.append(source)
-			content.append(logfile_entry(row[0], file, row[1], row[3:], date, '',source))
-		_delete_print()
-	return logfile(file, len(content), 'firefox_sqlite', content, sources)
+	conditions, parameters = _visit_conditions('visits.visit_time', _CHROME_EPOCH_OFFSET, 'urls.url', since, until, sources)
+	query = "SELECT visits.id, urls.url, visits.visit_time / 1000000 - ?, * FROM urls, visits WHERE urls.id = visits.url{};".format(conditions)
+	return _readin_browser_history(file, query, [_CHROME_EPOCH_OFFSET] + parameters)
 
-def _readin_evtx(file):
-	"""Reads in a file of the evtx format created by Microsoft Windows.
+def _readin_moz_places(file, since=None, until=None, sources=None):
+	"""Reads in a file of the SQLite format created by Mozilla Firefox.
 	Returns a logfileclasses.logfile object containg all the data.
+	The time window and sources are part of the SQL query, so that only matching visits are read.
 
 	Positional arguments:
 	file -- the name of the file to readin as a string, here name euqals path to the file
+
+	Keyword arguments:
+	since -- a datetime object, only visits at or after this time are read, None means no lower bound (default None)
+	until -- a datetime object, only visits at or before this time are read, None means no upper bound (default None)
+	sources -- a list of strings, only visits of urls with these sources are read, if None or empty all visits are read (default None)
 	"""
+	conditions, parameters = _visit_conditions('moz_historyvisits.visit_date', 0, 'moz_places.url', since, until, sources)
+	query = "SELECT moz_historyvisits.id, moz_places.url, moz_historyvisits.visit_date / 1000000, * FROM moz_places, moz_historyvisits WHERE moz_places.id = moz_historyvisits.place_id{};".format(conditions)
+	return _readin_browser_history(file, query, parameters)
+
+class _evtx_marker(object):
+	"""Stands in for the substitution at index, when the template of an evtx record is rendered by _evtx_template_fields."""
+	def __init__(self, index):
+		self.index = index
+
+	def string(self):
+		return _EVTX_MARKER.format(self.index)
+
+class _evtx_markers(object):
+	"""Stands in for the list of substitutions of an evtx record, any index yields an _evtx_marker."""
+	def __getitem__(self, index):
+		return _evtx_marker(index)
+
+def _local_name(tag):
+	"""Returns the name of an xml.etree element without its namespace."""
+	return tag.rpartition('}')[2]
+
+def _child(element, name):
+	"""Returns the first child of an xml.etree element with the name name, ignoring namespaces, or None."""
+	for child in element:
+		if _local_name(child.tag) == name:
+			return child
+	return None
+
+def _evtx_template_fields(root):
+	"""Finds out where the template of an evtx record keeps the fields that are read from the System element.
+	Returns a dict mapping the field names of _EVTX_FIELDS either to an integer, the index of the substitution holding the value,
+	or to a string, the value itself when it is part of the template. Returns None if a field is made up of several parts,
+	the records of such templates are parsed by untangle.
+
+	Positional arguments:
+	root -- the Evtx.Nodes.RootNode of a record
+	"""
+	try:
+		event = ElementTree.fromstring(evtx_views.render_root_node_with_subs(root, _evtx_markers()))
+	except ElementTree.ParseError:
+		return None
+	system = _child(event, 'System')
+	if system is None:
+		return None
+	fields = {}
+	for name, tag, attribute in _EVTX_FIELDS:
+		element = _child(system, tag)
+		if element is None:
+			if name != 'source':
+				return None
+			value = ''
+		elif attribute:
+			value = element.get(attribute, '')
+		elif len(element):
+			return None
+		else:
+			value = element.text or ''
+		m = _EVTX_SUBSTITUTION.match(value)
+		if m:
+			fields[name] = int(m.group(1))
+		elif '{slogviz:' in value:
+			return None
+		else:
+			fields[name] = value
+	return fields
+
+def _evtx_date(date):
+	"""Returns a datetime object without timezone information in UTC for the timestamp of an evtx record,
+	newer versions of python-evtx return timezone aware objects.
+	"""
+	if date.tzinfo is not None:
+		date = date.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+	return date
+
+def _evtx_record_fast(record, templates):
+	"""Reads the fields of an evtx record directly from the substitutions of its template, without rendering any XML.
+	Returns a tuple of the EventRecordID, EventID, timestamp, Computer and Provider Name of the record.
+	Raises an exception if the record can not be read this way.
+
+	Positional arguments:
+	record -- the Evtx.Evtx.Record object
+	templates -- a dict of the results of _evtx_template_fields by template offset, for the chunk of the record
+	"""
+	root = record.root()
+	offset = root.template_instance().template_offset()
+	fields = templates.get(offset, False)
+	if fields is False:
+		fields = templates[offset] = _evtx_template_fields(root)
+	if fields is None:
+		raise ValueError('unsupported template')
+	substitutions = root.substitutions()
+	values = {}
+	for name, field in fields.items():
+		if isinstance(field, int):
+			field = substitutions[field]
+			if isinstance(field, evtx_nodes.BXmlTypeNode):
+				raise ValueError('nested XML in field {}'.format(name))
+		values[name] = field
+	date = values['date']
+	if isinstance(date, evtx_nodes.FiletimeTypeNode):
+		date = date.filetime()
+	elif isinstance(date, evtx_nodes.SystemtimeTypeNode):
+		date = date.systemtime()
+	else:
+		date = decode_iso_timestamp(date if isinstance(date, str) else date.string())
+	text = {name: value if isinstance(value, str) else value.string() for name, value in values.items() if name != 'date'}
+	return int(text['id']), text['message'], _evtx_date(date), text['hostname'], text['source']
+
+def _evtx_record_untangle(record):
+	"""Reads the fields of an evtx record from its XML parsed by untangle, the fallback of _evtx_record_fast.
+	Returns a tuple of the EventRecordID, EventID, timestamp, Computer and Provider Name of the record.
+
+	Positional arguments:
+	record -- the Evtx.Evtx.Record object
+	"""
+	obj = untangle.parse(record.xml())#untangle can produce an OSError on Windows, since Windows uses a different format for timestamps
+	curr_obj = obj.Event.System
+	date = _evtx_date(decode_iso_timestamp(curr_obj.TimeCreated['SystemTime']))
+	source = ''
+	if hasattr(curr_obj,'Provider') and curr_obj.Provider['Name']:
+		source = curr_obj.Provider['Name']
+	return int(curr_obj.EventRecordID.cdata), curr_obj.EventID.cdata, date, curr_obj.Computer.cdata, source
+
+class _mapped_evtx(mapped_file):
+	"""A logfileclasses.mapped_file of an evtx file.
+	The location of an entry is the byte offset of its record, the XML of the record is only rendered when the structured_data is requested.
+	"""
+	def __init__(self, name, encoding=None):
+		mapped_file.__init__(self, name, encoding)
+		self._chunks = {}
+
+	def close(self):
+		self._chunks = {}
+		mapped_file.close(self)
+
+	def record(self, location):
+		"""Returns the Evtx.Evtx.Record object at the byte offset location."""
+		_import_evtx()
+		data = self.open()
+		header = self._chunks.get(None)
+		if header is None:
+			header = self._chunks[None] = evtx.FileHeader(data, 0)
+		first = header.header_chunk_size()
+		offset = first + (location - first) // _EVTX_CHUNK_SIZE * _EVTX_CHUNK_SIZE
+		chunk = self._chunks.get(offset)
+		if chunk is None:
+			chunk = self._chunks[offset] = evtx.ChunkHeader(data, offset)
+		return evtx.Record(data, location, chunk)
+
+	def entry(self, location):
+		record = self.record(location)
+		try:
+			message = _evtx_record_fast(record, {})[1]
+		except Exception:
+			message = _evtx_record_untangle(record)[1]
+		return message, record.xml()
+
+def _scan_evtx(file, sources, hostnames, first=0, last=None, progress=True):
+	"""Parses the records of the chunks first up to last, excluding last, of an evtx file.
+	The fields of most records are read directly from the substitutions of their templates, untangle is only used for the remaining records.
+	Returns a tuple of a list of tuples of EventRecordID, EventID, timestamp, hostname code, source code and byte offset per record,
+	in the order of the file, and the amount of records that could not be parsed.
+
+	Positional arguments:
+	file -- the name of the file as a string, here name euqals path to the file
+	sources -- the logfileclasses.string_table the sources of all records are added to
+	hostnames -- the logfileclasses.string_table the hostnames of all records are added to
+
+	Keyword arguments:
+	first -- the index of the first chunk (default 0)
+	last -- the index of the chunk behind the last one, None means up to the end of the file (default None)
+	progress -- if set to True, the number of each parsed record is printed (default True)
+	"""
+	_import_evtx()
 	content = []
 	unparsed_entries = 0
 	with evtx.Evtx(file) as log:
 		c = 0
-		sources = []
-		for record in log.records():
-			c += 1
-			_print_progress(c)
-			try:
-				obj = untangle.parse(record.xml())#untangle can produce an OSError on Windows, since Windows uses a different format for timestamps
-			except OSError:
-				c -= 1
-				unparsed_entries += 1
-				continue
-			curr_obj = obj.Event.System
-			date = curr_obj.TimeCreated['SystemTime']
-			if '.' in date:
-				date = datetime.datetime.strptime(date,"%Y-%m-%d %H:%M:%S.%f")
-			else:
-				date = datetime.datetime.strptime(date,"%Y-%m-%d %H:%M:%S")
-			full_line = record.xml()
-			if hasattr(curr_obj,'Provider'):
-				source = curr_obj.Provider['Name']
-			else:
-				source = ''
-			if ( (not source in sources) and (not sources == '')):
-				sources.append(source)
-			line_nr = curr_obj.EventRecordID.cdata
-			content.append(logfile_entry(int(line_nr), file, curr_obj.EventID.cdata, full_line, date, curr_obj.Computer.cdata, source))
-		_delete_print()
+		for chunk in itertools.islice(log.chunks(), first, last):
+			# template offsets are relative to their chunk
+			templates = {}
+			for record in chunk.records():
+				c += 1
+				if progress:
+					_print_progress(c)
+				try:
+					fields = _evtx_record_fast(record, templates)
+				except Exception:
+					# the fast path only knows the usual template layouts, everything else is left to untangle
+					try:
+						fields = _evtx_record_untangle(record)
+					except OSError:
+						c -= 1
+						unparsed_entries += 1
+						continue
+				line_nr, event_id, date, hostname, source = fields
+				source_code = sources.add(source) if source else None
+				content.append((line_nr, event_id, date, hostnames.add(hostname), source_code, record.offset()))
+	return content, unparsed_entries
+
+def _parse_evtx_chunks(args):
+	"""Parses a range of chunks of an evtx file, executed by the worker processes of _readin_evtx_parallel.
+	Returns a tuple of the records returned by _scan_evtx sorted by their EventRecordID, the amount of records that could not be parsed
+	and the values of the string tables of the sources and hostnames, which the codes of the records refer to.
+
+	Positional arguments:
+	args -- a tuple of the file name and the indices of the first chunk and the chunk behind the last one
+	"""
+	file, first, last = args
+	sources = string_table()
+	hostnames = string_table()
+	content, unparsed_entries = _scan_evtx(file, sources, hostnames, first, last, progress=False)
+	content.sort(key=operator.itemgetter(0))
+	return content, unparsed_entries, sources.values, hostnames.values
+
+def _evtx_logfile(file, content, sources, hostnames, unparsed_entries):
+	"""Returns a logfileclasses.logfile object holding the records returned by _scan_evtx,
+	whose XML is only rendered when the structured_data of an entry is accessed.
+	"""
 	if unparsed_entries > 0:
 		print('Unfortunately, {} entries could not be parsed. Please see the documentation'.format(unparsed_entries))
 		print()
-	return logfile(file, len(content), 'evtx', content, sources)
-#END internal functions
+	mapping = _mapped_evtx(file)
+	entries = [lazy_logfile_entry(id, file, event_id, mapping, location, date, hostnames[hostname_code], '' if source_code is None else sources[source_code], hostname_code, source_code) for id, event_id, date, hostname_code, source_code, location in content]
+	return logfile(file, len(entries), 'evtx', entries, sources, hostnames)
 
-#START exported functions
-def readin(file, time_offset='+0000'):
-	"""Reads in a file and stores the content.
+def _readin_evtx(file):
+	"""Reads in a file of the evtx format created by Microsoft Windows.
 	Returns a logfileclasses.logfile object containg all the data.
-	This function only checks if the file extension or the file name suits to one it might be able to parse.
-	It then chooses the respective function to parse the file and calls it.
+	The XML of a record, its structured_data, is only rendered when it is accessed.
 
 	Positional arguments:
 	file -- the name of the file to readin as a string, here name euqals path to the file
 	"""
-	p = re.compile(r'^.*log\.?(\d)*$')
-	if p.match(file):
+	sources = string_table()
+	hostnames = string_table()
+	content, unparsed_entries = _scan_evtx(file, sources, hostnames)
+	_delete_print()
+	return _evtx_logfile(file, content, sources, hostnames, unparsed_entries)
+
+def _readin_evtx_parallel(file, workers=2):
+	"""Reads in a file of the evtx format with multiple processes.
+	The 64 KB chunks of the file are independent of each other, so ranges of chunks are parsed in a process pool.
+	The records of all ranges are merged ordered by their EventRecordID, which is the order of the file unless the log wrapped around,
+	and the codes of the sources and hostnames of each range are translated.
+	Returns a logfileclasses.logfile object containg all the data.
+
+	Positional arguments:
+	file -- the name of the file to readin as a string, here name euqals path to the file
+
+	Keyword arguments:
+	workers -- the amount of processes used (default 2)
+	"""
+	_import_evtx()
+	with evtx.Evtx(file) as log:
+		chunk_count = sum(1 for _ in log.chunks())
+	if chunk_count < 2:
+		return _readin_evtx(file)
+	parts = min(workers, chunk_count)
+	bounds = [chunk_count * i // parts for i in range(parts + 1)]
+	ranges = []
+	unparsed_entries = 0
+	sources = string_table()
+	hostnames = string_table()
+	with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+		for part, part_unparsed, part_sources, part_hostnames in executor.map(_parse_evtx_chunks, [(file, bounds[i], bounds[i + 1]) for i in range(parts)]):
+			unparsed_entries += part_unparsed
+			source_codes = [sources.add(x) for x in part_sources]
+			hostname_codes = [hostnames.add(x) for x in part_hostnames]
+			ranges.append([(id, event_id, date, hostname_codes[hostname_code], None if source_code is None else source_codes[source_code], location) for id, event_id, date, hostname_code, source_code, location in part])
+			_print_progress(sum(len(x) for x in ranges))
+	_delete_print()
+	content = list(heapq.merge(*ranges, key=operator.itemgetter(0)))
+	return _evtx_logfile(file, content, sources, hostnames, unparsed_entries)
+
+def _readin(file, time_offset='+0000', workers=1, mapped=False, follow=False, since=None, until=None, sources=None):
+	"""Chooses the function parsing file by its name and calls it, see readin, which adds the parse cache.
+	Returns None if the file name suits to no supported format.
+	"""
+	if _is_syslog(file):
+		if (workers > 1 or mapped or follow) and _compression(file):
+			return _readin_syslog(file, time_offset)
+		if follow:
+			return _readin_syslog_follow(file, time_offset)
+		if workers > 1:
+			return _readin_syslog_parallel(file, time_offset, workers, mapped)
+		if mapped:
+			return _readin_syslog_mapped(file, time_offset)
 		return _readin_syslog(file, time_offset)
 	else:
 		p2 = re.compile(r'^.*\.slogviz\.json$')
 		if p2.match(file):
 			return _readin_JSON(file)
+		elif file.endswith('.slogviz.ndjson'):
+			return _readin_NDJSON(file)
+		elif file.endswith('.slogviz.bin'):
+			return _readin_binary(file)
 		else:
 			p3 = re.compile(r'^.*History$')
 			if p3.match(file):
-				return _readin_chrome_history(file)
+				return _readin_chrome_history(file, since, until, sources)
 			else:
 				p4 = re.compile(r'^.*places.*\.sqlite$')
 				if p4.match(file):
-					return _readin_moz_places(file)
+					return _readin_moz_places(file, since, until, sources)
 				else:
 					p5 = re.compile(r'^.*\.evtx$')
 					if p5.match(file):
-						return _readin_evtx(file)
+						return _readin_evtx_parallel(file, workers) if workers > 1 else _readin_evtx(file)
 					else:
 						return None
+
+def _cache_key(file, time_offset):
+	"""Returns the key of a file in the parse cache as a string of hex digits.
+	It is derived from the absolute path, size and modification time of the file, a hash of samples of its content,
+	the time_offset and _PARSER_VERSION, so that neither changed files nor other parser versions hit old results.
+	"""
+	stat = os.stat(file)
+	digest = hashlib.sha1(json.dumps([os.path.abspath(file), stat.st_size, stat.st_mtime_ns, time_offset, _PARSER_VERSION]).encode('utf-8'))
+	with open(file, 'rb') as f:
+		# samples keep hashing cheap even for files of several GB
+		for i in range(_CACHE_SAMPLES):
+			f.seek(stat.st_size * i // _CACHE_SAMPLES)
+			digest.update(f.read(_CACHE_SAMPLE_SIZE))
+		f.seek(max(stat.st_size - _CACHE_SAMPLE_SIZE, 0))
+		digest.update(f.read(_CACHE_SAMPLE_SIZE))
+	return digest.hexdigest()
+
+def _cache_files():
+	"""Returns a list of tuples of the modification time, size and path of all files in the parse cache."""
+	try:
+		names = os.listdir(slogviz.config.cache_dir)
+	except OSError:
+		return []
+	files = []
+	for name in names:
+		if name.endswith('.slogviz.bin'):
+			path = os.path.join(slogviz.config.cache_dir, name)
+			try:
+				stat = os.stat(path)
+			except OSError:
+				continue
+			files.append((stat.st_mtime, stat.st_size, path))
+	return files
+
+def _evict_cache(keep=None):
+	"""Removes the least recently used files of the parse cache until its size is within slogviz.config.cache_size.
+	The file keep, usually the one that was just added, and the files in _BINARIES_IN_USE, whose entries may still be accessed, are never removed.
+	"""
+	files = sorted(_cache_files())
+	size = sum(x[1] for x in files)
+	for _, file_size, path in files:
+		if size <= slogviz.config.cache_size:
+			break
+		if path == keep or os.path.abspath(path) in _BINARIES_IN_USE:
+			continue
+		try:
+			os.remove(path)
+		except OSError:
+			continue
+		size -= file_size
+
+def _readin_cached(file, time_offset, read):
+	"""Loads file from the parse cache or, if it is not found there, calls read and stores the returned logfileclasses.logfile object.
+	Files are stored in the binary columnar format, the structured_data of memory mapped entries, like the XML of evtx records,
+	is not stored but linked to the original file, which is unchanged as long as the key stays the same.
+	The modification time of a file found in the cache is updated, since it decides which files are removed first.
+	Problems of the cache itself never cause an error, the file is just parsed then.
+
+	Positional arguments:
+	file -- the name of the file to readin as a string, here name euqals path to the file
+	time_offset -- the time_offset passed to readin
+	read -- a function without arguments parsing the file
+	"""
+	try:
+		key = _cache_key(file, time_offset)
+	except OSError:
+		return read()
+	path = os.path.join(slogviz.config.cache_dir, key + '.slogviz.bin')
+	if os.path.isfile(path):
+		try:
+			lf = _readin_binary(path, origin_name=file)
+		except (OSError, ValueError, KeyError):
+			# damaged files are parsed again and replaced
+			pass
+		else:
+			lf.name = file
+			try:
+				os.utime(path)
+			except OSError:
+				pass
+			return lf
+	lf = read()
+	if lf:
+		temporary = None
+		try:
+			os.makedirs(slogviz.config.cache_dir, exist_ok=True)
+			handle, temporary = tempfile.mkstemp(suffix='.tmp', dir=slogviz.config.cache_dir)
+			os.close(handle)
+			_write_binary(lf.name, lf.type, lf.content, sources=lf.source_table.values, hostnames=lf.hostname_table.values, pathname=temporary, linked=True)
+			os.replace(temporary, path)
+			temporary = None
+			if _cache_eviction:
+				_evict_cache(keep=path)
+		except OSError:
+			pass
+		finally:
+			if temporary is not None and os.path.exists(temporary):
+				os.remove(temporary)
+	return lf
+
+# the mapped_file classes whose entries may be linked to by files of the parse cache, by class name
+_LINKED_MAPPINGS = {'_mapped_syslog': _mapped_syslog, '_mapped_evtx': _mapped_evtx}
+#END internal functions
+
+#START exported functions
+def readin(file, time_offset='+0000', workers=1, mapped=False, follow=False, since=None, until=None, sources=None):
+	"""Reads in a file and stores the content.
+	Returns a logfileclasses.logfile object containg all the data.
+	This function only checks if the file extension or the file name suits to one it might be able to parse.
+	It then chooses the respective function to parse the file and calls it.
+	Unless slogviz.config.cache is False, the result is stored in the parse cache and an unchanged file is loaded from there the next time,
+	read in with the same time_offset. Files read in follow mode and browser histories read with since, until or sources are never cached.
+	Compressed syslog files are always decompressed as a stream by one process, so workers, mapped and follow do not apply to them.
+	The time window given by since and until is part of the SQL query for browser histories, so other visits are never read.
+	All other files are sliced with logfileclasses.logfile.slice after they were read in or loaded from the parse cache,
+	binary columnar files, and therefore all files found in the parse cache, only create the entries within the window.
+
+	Positional arguments:
+	file -- the name of the file to readin as a string, here name euqals path to the file
+
+	Keyword arguments:
+	time_offset -- a offset that shall be added to all timestamps without timezone information (default '+0000')
+	workers -- the amount of processes used for parsing syslog and evtx files, if greater than 1 the file is split and parsed in parallel (default 1)
+	mapped -- if set to True, syslog files are memory mapped and the messages of their entries are only read from the file when needed (default False)
+	follow -- if set to True, syslog files are read in follow mode, so that lines appended later on can be added with refresh,
+		workers and mapped are not used then (default False)
+	since -- a datetime object, only entries at or after this time are returned, None means no lower bound, not used in follow mode (default None)
+	until -- a datetime object, only entries at or before this time are returned, None means no upper bound, not used in follow mode (default None)
+	sources -- a list of strings, only entries with these sources are read from browser histories, if None or empty all entries are read (default None)
+	"""
+	window = not follow and (since is not None or until is not None)
+	if _is_browser_history(file) and (window or sources):
+		return _readin(file, time_offset, workers, mapped, follow, since, until, sources)
+	if slogviz.config.cache and not follow and not file.endswith('.slogviz.bin') and os.path.isfile(file):
+		lf = _readin_cached(file, time_offset, functools.partial(_readin, file, time_offset, workers, mapped))
+	else:
+		lf = _readin(file, time_offset, workers, mapped, follow)
+	if lf and window:
+		return lf.slice(since, until)
+	return lf
+
+def is_compressed(file):
+	"""Returns True if file is compressed with gzip, bzip2 or xz, as logrotate does, detected by its magic bytes.
+
+	Positional arguments:
+	file -- the name of the file as a string, here name euqals path to the file
+	"""
+	return _compression(file) is not None
+
+def refresh(lf):
+	"""Adds all entries appended to the file of a logfileclasses.logfile object read in follow mode since it was read in or refreshed the last time.
+	Only the appended bytes are parsed, the ids and sources continue those of the entries read before.
+	When the file was truncated, it is read from its beginning again, when it was rotated, the rest of the old file is read
+	before the new file with the same name is read from its beginning. In both cases the new entries are added to the old ones.
+	Returns the amount of new entries, which is always 0 for logfile objects that were not read in follow mode.
+
+	Positional arguments:
+	lf -- the logfileclasses.logfile object
+	"""
+	state = lf.follow_state
+	if state is None:
+		return 0
+	lines = lf.lines
+	_follow_syslog(lf)
+	try:
+		inode = os.stat(lf.name).st_ino
+	except OSError:
+		# the file was moved away and not created again yet, the old one is kept open
+		inode = state.inode
+	if inode != state.inode:
+		state.file.close()
+		lf.follow_state = _follow_state(lf.name, state.time_offset)
+		_follow_syslog(lf)
+	return lf.lines - lines
+
+def readin_iter(file, time_offset='+0000'):
+	"""Reads in a file and yields its entries one by one as logfileclasses.logfile_entry objects.
+	Syslog files and line delimited JSON files are streamed, meaning that only the entry that is currently parsed is kept in memory.
+	All other file formats are read in completely by readin before their entries are yielded.
+
+	Positional arguments:
+	file -- the name of the file to readin as a string, here name euqals path to the file
+
+	Keyword arguments:
+	time_offset -- a offset that shall be added to all timestamps without timezone information (default '+0000')
+	"""
+	if _is_syslog(file):
+		yield from _iter_syslog(file, time_offset)
+	elif file.endswith('.slogviz.ndjson'):
+		yield from _iter_NDJSON(file)
+	else:
+		lf = readin(file, time_offset)
+		if lf:
+			yield from lf.content
+
+def export_to_JSON(file, time_offset='+0000', sparse=False):
+	"""Reads in a file and stores it as an JSON file with the name <file>.slogviz.json.
+	Syslog files are streamed from the original file to the JSON file, so that their size is not limited by the available memory.
+	Returns False if the file can not be parsed, otherwise True.
+
+	Positional arguments:
+	file -- the name of the file to readin as a string, here name euqals path to the file
+
+	Keyword arguments:
+	time_offset -- a offset that shall be added to all timestamps without timezone information (default '+0000')
+	sparse -- if set to True, the structured_data fields are not stored inside the JSON file in order to save space (default False)
+	"""
+	if _is_syslog(file):
+		_write_JSON(file, 'syslog', _iter_syslog(file, time_offset), sparse=sparse)
+		return True
+	lf = readin(file, time_offset)
+	if not lf:
+		return False
+	lf.export_to_JSON(sparse=sparse)
+	return True
+
+def clear_cache():
+	"""Removes all files of the parse cache used by readin, which is found in slogviz.config.cache_dir.
+	Returns the amount of removed files.
+	"""
+	removed = 0
+	for _, _, path in _cache_files():
+		try:
+			os.remove(path)
+			removed += 1
+		except OSError:
+			pass
+	return removed
+
+def export_to_NDJSON(file, time_offset='+0000', sparse=False, append=False):
+	"""Reads in a file and stores it as a line delimited JSON file with the name <file>.slogviz.ndjson, see logfileclasses.logfile.export_to_NDJSON.
+	Syslog files are streamed from the original file to the line delimited JSON file, so that their size is not limited by the available memory.
+	Returns False if the file can not be parsed, otherwise True.
+
+	Positional arguments:
+	file -- the name of the file to readin as a string, here name euqals path to the file
+
+	Keyword arguments:
+	time_offset -- a offset that shall be added to all timestamps without timezone information (default '+0000')
+	sparse -- if set to True, the structured_data fields are not stored inside the file in order to save space (default False)
+	append -- if set to True, only the entries with ids above the last id in an existing file are appended to it instead of replacing it (default False)
+	"""
+	if _is_syslog(file):
+		_write_NDJSON(file, 'syslog', _iter_syslog(file, time_offset), sparse=sparse, append=append)
+		return True
+	lf = readin(file, time_offset)
+	if not lf:
+		return False
+	lf.export_to_NDJSON(sparse=sparse, append=append)
+	return True
+
+def export_to_binary(file, time_offset='+0000', sparse=False):
+	"""Reads in a file and stores it as a binary columnar file with the name <file>.slogviz.bin, see logfileclasses.logfile.export_to_binary.
+	Syslog files are streamed from the original file to the binary file, only the columns of ids, timestamps and codes are held in memory.
+	Returns False if the file can not be parsed, otherwise True.
+
+	Positional arguments:
+	file -- the name of the file to readin as a string, here name euqals path to the file
+
+	Keyword arguments:
+	time_offset -- a offset that shall be added to all timestamps without timezone information (default '+0000')
+	sparse -- if set to True, the structured_data fields are not stored inside the binary file in order to save space (default False)
+	"""
+	if _is_syslog(file):
+		_write_binary(file, 'syslog', _iter_syslog(file, time_offset), sparse=sparse)
+		return True
+	lf = readin(file, time_offset)
+	if not lf:
+		return False
+	lf.export_to_binary(sparse=sparse)
+	return True
 #END exported functions
\ No newline at end of file
@@ -9,21 +9,49 @@ plot_single -- plots the timestamps of one logfile to the X-axis and the ids to
 plot_single_file_colored -- produces the same as plot_single, but data points are colored by their source attribute
 plot_timeline_overview -- plots the timestamps of a set of logfiles to the X-axis, where all loaded log files are split to different heights on the Y-axis
 plot_multiple_timeline -- produces a plot with the same axis as the plot_single function, but here all loaded log files are displayed in one set of coordinates
-plot_bar_chart -- produces a plot where the timestamps of logfile_entries are displayed on the X-axis, while the Y-axis is used to indicate the amount of entries
+plot_bar_chart -- produces a plot where the timestamps of logfile_entries are displayed on the X-axis, while the Y-axis is used to indicate the amount of entries,
+	the frames are counted again when zooming in or out
 superplot -- produces all plots at once
 plot_correlated -- takes a set of logfile_entries and plots them very similarly to the plot_timeline_overview
 """
 
-import matplotlib.pyplot as plt
-
+import bisect
 from datetime import timedelta
-from matplotlib.dates import DateFormatter
+
+from .timestampdecoder import unix_microseconds
+
+# matplotlib is imported by _import_matplotlib when the first plot is created,
+# since importing it takes longer than reading in most log files
+plt = None
+DateFormatter = None
+num2date = None
+
+# the frame sizes in seconds bar charts choose from when zooming, all of them whole multiples of a level of logfile.count_levels or shorter than a second
+_FRAME_SIZES = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 15, 30, 60, 120, 300, 600, 900, 1800,
+	3600, 7200, 10800, 21600, 43200, 86400, 2 * 86400, 7 * 86400, 14 * 86400, 28 * 86400, 91 * 86400, 182 * 86400, 364 * 86400)
+
+# the amount of bars a bar chart shows at most when it chooses the frame size itself
+_BARS = 100
 
 #from .logfileclasses import *
 # this import is not necessary because of the overall structure,
 # but keep in mind that classes defined there are used here
 
 #START internal functions
+def _import_matplotlib():
+	"""Imports matplotlib.pyplot as plt, matplotlib.dates.DateFormatter and matplotlib.dates.num2date into this module, if they are not imported yet."""
+	global plt, DateFormatter, num2date
+	if plt is None:
+		import matplotlib.pyplot as plt
+		from matplotlib.dates import DateFormatter, num2date
+
+def _frame_size(seconds):
+	"""Returns the smallest frame size in _FRAME_SIZES that divides a span of seconds into at most _BARS frames, or the largest one."""
+	for x in _FRAME_SIZES:
+		if seconds <= x * _BARS:
+			return x
+	return _FRAME_SIZES[-1]
+
 def _transform_select_string(select_string, logfile):
 	"""This function takes a string and a logfile and returns a list of strings.
 
@@ -37,7 +65,7 @@ def _transform_select_string(select_string, logfile):
 	selected_sources = []
 	tmp = select_string.split(',')
 	for s in tmp:
-		if s in logfile.sources and s not in selected_sources:
+		if s in logfile.source_table and s not in selected_sources:
 			selected_sources.append(s)
 	if len(selected_sources) == 0:
 		selected_sources = logfile.sources
@@ -54,6 +82,7 @@ def show():
 	"""Finally produces one ore multiple pyplot plots.
 	Has to be called once after one calling any of the other public functions in order to see a plot.
 	"""
+	_import_matplotlib()
 	plt.show()
 
 def plot_single(log, remove_redundant_entries, select_string):
@@ -67,6 +96,7 @@ def plot_single(log, remove_redundant_entries, select_string):
 	select_string -- a string that should contain sources, trailed by a ',',
 		used for filtering out all entries that have sources which are NOT in the select_string
 	"""
+	_import_matplotlib()
 	selected_sources = _transform_select_string(select_string,log)
 	plot_data , lines, dates, _ = log.give_plot_data(remove_redundant_entries=remove_redundant_entries, sources=selected_sources)
 	fig, ax = plt.subplots(figsize=(11,6))
@@ -91,11 +121,8 @@ def plot_single(log, remove_redundant_entries, select_string):
 	def update_annot(ind):
 		x,y = l.get_data()
 		annot.xy = (x[ind["ind"][0]], y[ind["ind"][0]])
-		if remove_redundant_entries == 1:
-			text = plot_data[y[ind["ind"][0]]-1]
-		else:
-			temp = [x for x in plot_data if x.id == y[ind["ind"][0]]]
-			text = temp[0]
+		# the points of the line are the entries of plot_data in the same order
+		text = plot_data[ind["ind"][0]]
 		annot.set_text(text)
 		annot.get_bbox_patch().set_alpha(0.4)
 
@@ -131,11 +158,12 @@ def plot_single_file_colored(log, remove_redundant_entries, select_string, rev=T
 	rev -- determines the order, in which the data points are drawn, True means that the most frequent sources are
 		drawn in the foreground (default True)
 	"""
+	_import_matplotlib()
 	selected_sources = _transform_select_string(select_string,log)
 
 	fig, ax = plt.subplots(figsize=(11,6))
 	fig.autofmt_xdate()
-	plot_data, _ , _ , _ = log.give_plot_data(sources=selected_sources, remove_redundant_entries=remove_redundant_entries)
+	plot_data, plot_ids, _ , _ = log.give_plot_data(sources=selected_sources, remove_redundant_entries=remove_redundant_entries)
 	color_map = plt.get_cmap('gist_ncar')
 	# see https://matplotlib.org/users/colormaps.html
 	color_index = [color_map(1.*i/len(selected_sources)) for i in range(0,len(selected_sources))]
@@ -146,12 +174,10 @@ def plot_single_file_colored(log, remove_redundant_entries, select_string, rev=T
 	all_names = []
 
 	ls = []
-	for s in selected_sources:
-		all_dates.append([x.timestamp for x in plot_data if x.source == s])
-		if remove_redundant_entries == 1:
-			all_lines.append([plot_data.index(x) for x in plot_data if x.source == s])
-		else:
-			all_lines.append([x.id for x in plot_data if x.source == s])
+	by_source = log.give_plot_data_by_source(sources=selected_sources, remove_redundant_entries=remove_redundant_entries)
+	for s, (dates, lines) in zip(selected_sources, by_source):
+		all_dates.append(dates)
+		all_lines.append(lines)
 		breakline_s = s
 		if len(breakline_s) >= 23:
 			for i in range(0,int(len(breakline_s)/23)):
@@ -189,8 +215,8 @@ def plot_single_file_colored(log, remove_redundant_entries, select_string, rev=T
 		if remove_redundant_entries == 1:
 			text = plot_data[y[ind["ind"][0]]]
 		else:
-			temp = [x for x in plot_data if x.id == y[ind["ind"][0]]]
-			text = temp[0]
+			# the ids of plot_data ascend, so the entry is found by a binary search
+			text = plot_data[bisect.bisect_left(plot_ids, y[ind["ind"][0]])]
 		annot.set_text(text)
 		annot.get_bbox_patch().set_alpha(0.4)
 
@@ -218,6 +244,7 @@ def plot_timeline_overview(logs):
 	Positional Arguments:
 	logs -- the logfile object to plot
 	"""
+	_import_matplotlib()
 	fig, ax = plt.subplots(figsize=(11,6))
 	fig.autofmt_xdate()
 	c = 0
@@ -279,6 +306,7 @@ def plot_multiple_timeline(logs, remove_redundant_entries, select_string):
 	select_string -- a string that should contain sources, trailed by a ',',
 		used for filtering out all entries that have sources which are NOT in the select_string
 	"""
+	_import_matplotlib()
 	fig, ax = plt.subplots(figsize=(11,6))
 	fig.autofmt_xdate()
 	line2D_array = []
@@ -308,11 +336,8 @@ def plot_multiple_timeline(logs, remove_redundant_entries, select_string):
 		plot_data = plot_data_dict[l.get_c()]
 		x,y = l.get_data()
 		annot.xy = (x[ind["ind"][0]], y[ind["ind"][0]])
-		if remove_redundant_entries == 1:
-			text = plot_data[y[ind["ind"][0]]-1]
-		else:
-			temp = [x for x in plot_data if x.id == y[ind["ind"][0]]]
-			text = temp[0]
+		# the points of the line are the entries of plot_data in the same order
+		text = plot_data[ind["ind"][0]]
 		annot.set_text(text)
 		annot.get_bbox_patch().set_alpha(0.4)
 
@@ -336,15 +361,20 @@ def plot_multiple_timeline(logs, remove_redundant_entries, select_string):
 def plot_bar_chart(log, frame_seconds=-1):
 	"""This function produces a plot where the timestamps of logfile_entries are displayed on the X-axis, while the Y-axis is used to indicate the amount of entries.
 	The timestamps are categorized in frames of a certain size and the data is then visualized in the form of bars.
+	If the frame size is not given, it is chosen from _FRAME_SIZES, so that there are at most _BARS bars in the visible part of the plot,
+	and whenever the user zooms or pans, the frames in the visible part are counted again with a frame size suiting to it.
+	The counts are taken from the count_levels of log, so this only depends on the amount of visible frames.
 
 	Positional Arguments:
 	log -- the logfile object to plot
 
 	Keyword Arguments:
-	frame_seconds -- the size of the time frames (default -1), if not given by the user, it will be calculated as seen below
+	frame_seconds -- the size of the time frames (default -1), if not given by the user or not positive, it is chosen as described above
 	"""
-	if frame_seconds == -1:
-		frame_seconds = (log.content[-1].timestamp - log.content[0].timestamp).total_seconds() / timedelta(seconds=100).total_seconds()
+	_import_matplotlib()
+	adapt = frame_seconds is None or frame_seconds <= 0
+	if adapt:
+		frame_seconds = _frame_size(log.give_time_span())
 	lines,dates,areas = log.give_plot_data_bar(frame_seconds=frame_seconds)
 	fig, ax = plt.subplots(figsize=(11,6))
 	fig.autofmt_xdate()
@@ -352,10 +382,26 @@ def plot_bar_chart(log, frame_seconds=-1):
 	ax.xaxis.set_major_formatter(myFmt)
 	ax.set_xlabel('timestamps in UTC')
 	ax.set_ylabel('amount of entries')
-	plt.title('Analysis of the file \"'+log.name+'\" \n with frame size ' + str(frame_seconds) +' seconds')
+	title = 'Analysis of the file \"'+log.name+'\" \n with frame size {} seconds'
+	plt.title(title.format(frame_seconds))
 
 	width = timedelta(seconds=frame_seconds).total_seconds() / timedelta(days=1).total_seconds()
-	normal = ax.bar(dates, areas, width, label='entries', edgecolor='k')
+	bars = [ax.bar(dates, areas, width, label='entries', edgecolor='k', align='edge')]
+
+	def rebin(ax):
+		"""Counts the frames in the visible part of the plot again and replaces the bars."""
+		start, end = [x.replace(tzinfo=None) for x in num2date(ax.get_xlim())]
+		frame = _frame_size((end - start).total_seconds())
+		dates, areas = log.give_frame_counts(frame, start, end)
+		bars[0].remove()
+		bars[0] = ax.bar(dates, areas, frame / timedelta(days=1).total_seconds(), label='entries', edgecolor='k', align='edge')
+		ax.set_ylim(0, max(areas, default=0) * 1.05 or 1)
+		ax.set_title(title.format(frame))
+
+	if adapt:
+		# fixes the visible part of the plot, otherwise each new set of bars would change it and cause the next one
+		ax.set_xlim(ax.get_xlim())
+		ax.callbacks.connect('xlim_changed', rebin)
 
 	plt.legend()
 	plt.subplots_adjust(left=0.15, bottom=0.2, right=0.9, top=0.9)
@@ -384,19 +430,21 @@ def plot_correlated(list_of_entries, logfiles, rule_name):
 	Very similar to plot_timeline_overview.
 
 	Positional Arguments:
-	list_of_entries -- the list of logfile_entries to plot
+	list_of_entries -- the list of logfile_entries to plot, it is not changed, its entries are ordered by their timestamps like in a logfileclasses.merged_timeline
 	logfiles -- the logfile objects from which elements from list_of_entries originate
 	rule_name -- the name of the correlation rule that returned the list_of_entries
 	"""
-	plot_data = list_of_entries
-	plot_data.sort(key=lambda x: x.id)
+	_import_matplotlib()
+	plot_data = sorted(list_of_entries, key=lambda x: unix_microseconds(x.timestamp))
 
+	entries = {log.name: [] for log in logfiles}
 	dates = {}
-	ids = {}
 	plot_data_dict = {}
+	for x in plot_data:
+		if x.origin_name in entries:
+			entries[x.origin_name].append(x)
 	for log in logfiles:
-		dates[log.name] = [x.timestamp for x in plot_data if x.origin_name == log.name]
-		ids[log.name] = [x.id for x in plot_data if x.origin_name == log.name]
+		dates[log.name] = [x.timestamp for x in entries[log.name]]
 
 	fig, ax = plt.subplots(figsize=(11,6))
 	fig.autofmt_xdate()
@@ -425,8 +473,7 @@ def plot_correlated(list_of_entries, logfiles, rule_name):
 		origin_name = plot_data_dict[l.get_c()]
 		x,y = l.get_data()
 		annot.xy = (x[ind["ind"][0]], y[ind["ind"][0]])
-		temp = [x for x in plot_data if x.id == ids[origin_name][ind["ind"][0]] and x.origin_name == origin_name]
-		text = temp[0]
+		text = entries[origin_name][ind["ind"][0]]
 		annot.set_text(text)
 		annot.get_bbox_patch().set_alpha(0.4)
 
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+"""The sub module of slogviz that turns the timestamps found in log files into datetime objects.
+Decoding timestamps with datetime.strptime is the main cost of parsing syslog files, therefore the common formats
+are decoded by hand and all results are kept in a bounded cache, since many consecutive entries share the same timestamp.
+Whenever a timestamp does not fit the expected form, datetime.strptime is used as a fallback.
+
+Exported variable:
+CACHE_SIZE -- the amount of decoded timestamps that are cached per format
+
+Exported functions:
+decode_syslog_timestamp -- decodes timestamps of the form 'Mar 23 22:17:40'
+decode_precise_timestamp -- decodes timestamps of the form '2017-03-23T22:17:40.123456+01:00'
+decode_iso_timestamp -- decodes timestamps created by datetime.isoformat(), as found in slogviz-created JSON files
+decode_unix_timestamp -- decodes seconds since 1970-01-01, as computed from the visit times of browser histories
+unix_microseconds -- the inverse of decode_unix_timestamp, returns the microseconds since 1970-01-01 of a datetime object
+"""
+
+import datetime
+import functools
+
+CACHE_SIZE = 4096
+
+_UNIX_EPOCH = datetime.datetime(1970, 1, 1)
+
+_MONTHS = {'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6, 'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12}
+
+#START internal functions
+@functools.lru_cache(maxsize=64)
+def _timezone(offset):
+	"""Returns a datetime.timezone object for an offset of the form '+0100' or '+01:00'.
+
+	Positional arguments:
+	offset -- a string, + or - followed by hours and minutes
+	"""
+	if offset[0] not in '+-':
+		raise ValueError('invalid offset {}'.format(offset))
+	delta = datetime.timedelta(hours=int(offset[1:3]), minutes=int(offset[-2:]))
+	if offset[0] == '-':
+		delta = -delta
+	return datetime.timezone(delta)
+
+def _decode_time(text, start):
+	"""Returns the hours, minutes and seconds of a time of the form 'HH:MM:SS' starting at the index start of text."""
+	if text[start+2] != ':' or text[start+5] != ':':
+		raise ValueError('invalid time {}'.format(text))
+	return int(text[start:start+2]), int(text[start+3:start+5]), int(text[start+6:start+8])
+
+def _decode_fraction(fraction):
+	"""Returns the microseconds of the digits following the decimal point of a timestamp, just as %f does."""
+	if not fraction.isdigit() or len(fraction) > 6:
+		raise ValueError('invalid fraction {}'.format(fraction))
+	return int(fraction.ljust(6, '0'))
+
+def _strptime_iso(text):
+	"""The fallback of decode_iso_timestamp, using datetime.strptime."""
+	if len(text) > 19 and text[-6:-5] in ('+', '-'):
+		text = text[:-3] + text[-2:]
+		# related to missing features in Python 3.6, see https://bugs.python.org/issue15873
+		if '.' in text:
+			return datetime.datetime.strptime(text, "%Y-%m-%dT%H:%M:%S.%f%z")
+		return datetime.datetime.strptime(text, "%Y-%m-%dT%H:%M:%S%z")
+	if len(text) >= 20:
+		return datetime.datetime.strptime(text, "%Y-%m-%dT%H:%M:%S.%f")
+	return datetime.datetime.strptime(text, "%Y-%m-%dT%H:%M:%S")
+#END internal functions
+
+#START exported functions
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def decode_syslog_timestamp(text, time_offset='+0000', year=2017):
+	"""Returns a timezone aware datetime object for a syslog timestamp like 'Mar 23 22:17:40'.
+	Since such timestamps do not contain a year, the year argument is used.
+
+	Positional arguments:
+	text -- the timestamp as a string
+
+	Keyword arguments:
+	time_offset -- the offset from UTC of the timestamp (default '+0000'), '+0100' equals UTC plus one hour
+	year -- the year assigned to the timestamp (default 2017)
+	"""
+	try:
+		hour, minute, second = _decode_time(text, len(text) - 8)
+		return datetime.datetime(year, _MONTHS[text[:3]], int(text[3:-9]), hour, minute, second, tzinfo=_timezone(time_offset))
+	except (KeyError, ValueError, IndexError):
+		return datetime.datetime.strptime('{} {}{}'.format(year, text, time_offset), "%Y %b %d %H:%M:%S%z")
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def decode_precise_timestamp(text):
+	"""Returns a timezone aware datetime object for a precise syslog timestamp like '2017-03-23T22:17:40.123456+01:00'.
+
+	Positional arguments:
+	text -- the timestamp as a string
+	"""
+	try:
+		if text[4] != '-' or text[7] != '-' or text[19] != '.':
+			raise ValueError('invalid timestamp {}'.format(text))
+		hour, minute, second = _decode_time(text, 11)
+		return datetime.datetime(int(text[0:4]), int(text[5:7]), int(text[8:10]), hour, minute, second, _decode_fraction(text[20:-6]), tzinfo=_timezone(text[-6:]))
+	except (ValueError, IndexError):
+		unformatted_date = text[:-3] + text[-2:]
+		# this hack around is not needed in Python 3.7, see https://bugs.python.org/issue15873
+		return datetime.datetime.strptime(unformatted_date, "%Y-%m-%dT%H:%M:%S.%f%z")
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def decode_iso_timestamp(text):
+	"""Returns a datetime object for a timestamp created by datetime.isoformat(), like '2017-03-23T22:17:40' or '2017-03-23T22:17:40.123456+01:00'.
+	The returned object is only timezone aware, if the timestamp contains an offset.
+	Timestamps using a space instead of the 'T', as found in evtx files, are accepted as well.
+
+	Positional arguments:
+	text -- the timestamp as a string
+	"""
+	try:
+		if text[4] != '-' or text[7] != '-':
+			raise ValueError('invalid timestamp {}'.format(text))
+		hour, minute, second = _decode_time(text, 11)
+		microsecond = 0
+		tzinfo = None
+		end = len(text)
+		if end > 19 and text[-6] in '+-' and text[-3] == ':':
+			tzinfo = _timezone(text[-6:])
+			end -= 6
+		if end > 19:
+			if text[19] != '.':
+				raise ValueError('invalid timestamp {}'.format(text))
+			microsecond = _decode_fraction(text[20:end])
+		return datetime.datetime(int(text[0:4]), int(text[5:7]), int(text[8:10]), hour, minute, second, microsecond, tzinfo=tzinfo)
+	except (ValueError, IndexError):
+		return _strptime_iso(text)
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def decode_unix_timestamp(seconds):
+	"""Returns a datetime object without timezone information, in UTC, for an amount of seconds since 1970-01-01 00:00:00.
+
+	Positional arguments:
+	seconds -- the amount of seconds as an integer
+	"""
+	return _UNIX_EPOCH + datetime.timedelta(seconds=seconds)
+
+def unix_microseconds(timestamp):
+	"""Returns the amount of microseconds since 1970-01-01 00:00:00 UTC of a datetime object as an integer.
+	Timestamps without timezone information are assumed to be in UTC, just like all timestamps slogviz creates without it.
+
+	Positional arguments:
+	timestamp -- the datetime object
+	"""
+	if timestamp.tzinfo is not None:
+		timestamp = timestamp.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+	delta = timestamp - _UNIX_EPOCH
+	return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+#END exported functions
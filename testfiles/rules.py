@@ -2,6 +2,8 @@
 This file is an example for how SLogVIZ can correlate log file entries.
 In order to define your own correlation rule, simply add a function,
 that takes a list of logfileclasses.logfile_entry objects, and returns a subset of them.
+The entries are given ordered by their timestamps across all loaded files. The functions of the slogviz.correlate module
+find entries that have or lack related entries within a time tolerance, they should be used instead of nested loops over all entries.
 The returned list is meant to represent all entries that are interesting, meaning they are in some way correlated, consistent or
 inconsistent.
 
@@ -15,6 +17,8 @@ In this file, there are three sample rules:
 
 from datetime import timedelta
 
+from slogviz.correlate import not_within, union
+
 def the_first_50_entries(list_of_entries):
 	"""Simply returns the first 50 entries."""
 	return list_of_entries[0:50]
@@ -35,33 +39,11 @@ def _Q(x):
 	"""
 	return x.message == "event A" and x.origin_name == "b.log"
 
-def _G(x,y):
-	"""Helper function.
-	returns True when the timestamps of x and y are within 5 seconds."""
-	return abs((x.timestamp - y.timestamp).total_seconds()) <= 5
-
 def eventA_rule_break(list_of_entries):
 	"""
 	This correlation function returns all entries in the list_of_entries, that have the message "event A",
-	the origin_name "a.log" and no counterpart with the same message with the origin_name "a.log" within 5 seconds and vice versa.
+	the origin_name "a.log" and no counterpart with the same message with the origin_name "b.log" within 5 seconds and vice versa.
+	It is built from the functions of slogviz.correlate, which sort the entries once instead of comparing all pairs of them.
 	"""
-	ret = []
-	for x in list_of_entries:
-		if _P(x):
-			found = False
-			for y in list_of_entries:
-				if _Q(y) and _G(x,y):
-					found = True
-					break
-			if not found:
-				ret.append(x)
-		elif _Q(x):
-			found = False
-			for y in list_of_entries:
-				if _P(y) and _G(x,y):
-					found = True
-					break
-			if not found:
-				ret.append(x)
-	return ret
-
+	tolerance = timedelta(seconds=5)
+	return union(not_within(list_of_entries, _P, _Q, tolerance), not_within(list_of_entries, _Q, _P, tolerance))
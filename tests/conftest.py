@@ -0,0 +1,50 @@
+"""The fixtures shared by the tests of slogviz."""
+
+import os
+import random
+import shutil
+
+import pytest
+
+import slogviz.config
+from slogviz.logfileparser import readin
+
+TESTFILES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'testfiles')
+
+# the messages of the generated syslog file, chosen so that words, phrases and numbers overlap
+_MESSAGES = ('event A', 'event B', 'event C', 'Failed password for root from 10.0.0.{}', 'Accepted publickey for admin from 10.0.1.{}',
+	'number 12', 'number 123', 'service number 12 stopped', 'Event a was seen')
+
+@pytest.fixture(autouse=True)
+def config(monkeypatch, tmp_path):
+	"""Keeps progress output quiet and the parse cache inside the temporary directory of each test."""
+	monkeypatch.setattr(slogviz.config, 'interactive', False)
+	monkeypatch.setattr(slogviz.config, 'cache', False)
+	monkeypatch.setattr(slogviz.config, 'cache_dir', str(tmp_path / 'cache'))
+
+@pytest.fixture
+def sample_files(monkeypatch, tmp_path):
+	"""Changes into the temporary directory, copies a.log and b.log of the testfiles directory there
+	and writes c.log, a syslog file of 3000 random entries, whose timestamps are not ordered everywhere.
+	Returns the list of the three file names, which are the origin_names of their entries, like in testfiles/rules.json.
+	"""
+	monkeypatch.chdir(str(tmp_path))
+	for name in ('a.log', 'b.log'):
+		shutil.copy(os.path.join(TESTFILES, name), name)
+	generator = random.Random(0)
+	seconds = 22 * 3600
+	with open('c.log', 'w') as f:
+		for _ in range(3000):
+			seconds += generator.choice((0, 0, 1, 2, 3, 5, 30, 200))
+			# some entries are written late, with a timestamp before the ones of their predecessors
+			time = seconds - (generator.choice((1, 4, 70)) if generator.random() < 0.05 else 0)
+			message = generator.choice(_MESSAGES).format(generator.randint(1, 20))
+			f.write('Mar {} {:02}:{:02}:{:02} {} {}: {}\n'.format(23 + time // 86400, time // 3600 % 24, time // 60 % 60, time % 60,
+				generator.choice(('hostA', 'hostB')), generator.choice(('sourceA', 'sourceB', 'sourceC', 'sourceD')), message))
+	return ['a.log', 'b.log', 'c.log']
+
+@pytest.fixture(params=[True, False], ids=['columnar', 'lists'])
+def sample_logfiles(request, monkeypatch, sample_files):
+	"""Returns the logfile objects of the sample_files, read in with and without the columnar storage of the logfileclasses sub module."""
+	monkeypatch.setattr(slogviz.config, 'columnar', request.param)
+	return [readin(x) for x in sample_files]
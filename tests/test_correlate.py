@@ -0,0 +1,153 @@
+"""Tests that the joins of the correlate sub module and the rule_set compiled from a rule file
+find the same entries as comparing all pairs of entries of the merged sample files.
+"""
+
+import datetime
+import importlib.util
+import json
+import os
+
+import pytest
+
+from slogviz.correlate import within, not_within, followed_by, count_in_window, union, load_rules
+from slogviz.logfileclasses import merged_timeline
+from slogviz.timestampdecoder import unix_microseconds
+
+from conftest import TESTFILES
+
+# tolerances in seconds, each one is also given as a datetime.timedelta
+TOLERANCES = (0, 1, 5, 60)
+
+#START internal functions
+def _keys(entries):
+	"""Returns a list of tuples identifying the entries."""
+	return [(x.origin_name, x.id) for x in entries]
+
+def _event_a(entry):
+	return entry.message == 'event A'
+
+def _source_b(entry):
+	return entry.source == 'sourceB'
+
+def _event(entry):
+	return entry.message.startswith('event')
+
+def _in_a(entry):
+	return entry.message == 'event A' and entry.origin_name == 'a.log'
+
+def _in_b(entry):
+	return entry.message == 'event A' and entry.origin_name == 'b.log'
+
+def _partners(entries, first, second, before, after):
+	"""Returns a list of tuples of the timestamp, the position, the entry and whether another entry matching second exists
+	at most before seconds before and at most after seconds after it, for each entry matching first, found by comparing all pairs,
+	ordered by the timestamps.
+	"""
+	times = [unix_microseconds(x.timestamp) for x in entries]
+	ret = []
+	for i, x in enumerate(entries):
+		if first(x):
+			found = any(j != i and second(y) and -before * 1000000 <= times[j] - times[i] <= after * 1000000 for j, y in enumerate(entries))
+			ret.append((times[i], i, x, found))
+	ret.sort(key=lambda x: x[:2])
+	return ret
+
+def _counted(entries, predicate, seconds, minimum):
+	"""Returns the keys of the entries matching predicate, which lie in a window of seconds holding at least minimum such entries,
+	found by counting the entries of the window ending at each matching entry, ordered by their timestamps.
+	"""
+	matching = sorted((unix_microseconds(x.timestamp), i, x) for i, x in enumerate(entries) if predicate(x))
+	times = [x[0] for x in matching]
+	full = [t for t in times if sum(1 for u in times if t - seconds * 1000000 <= u <= t) >= minimum]
+	return _keys(x for t, _, x in matching if any(u - seconds * 1000000 <= t <= u for u in full))
+#END internal functions
+
+@pytest.fixture
+def entries(sample_logfiles):
+	"""Returns a list of the entries of the sample files ordered by their timestamps."""
+	return list(merged_timeline(sample_logfiles))
+
+@pytest.mark.parametrize('seconds', TOLERANCES)
+@pytest.mark.parametrize('first, second', [(_event_a, _source_b), (_source_b, _event_a), (_event, _event), (_in_a, _in_b)])
+def test_joins(entries, first, second, seconds):
+	tolerance = datetime.timedelta(seconds=seconds)
+	around = _partners(entries, first, second, seconds, seconds)
+	assert _keys(within(entries, first, second, tolerance)) == _keys(x for _, _, x, found in around if found)
+	assert _keys(not_within(entries, first, second, seconds)) == _keys(x for _, _, x, found in around if not found)
+	later = _partners(entries, first, second, 0, seconds)
+	assert _keys(followed_by(entries, first, second, tolerance)) == _keys(x for _, _, x, found in later if found)
+
+@pytest.mark.parametrize('seconds, minimum', [(0, 2), (1, 3), (10, 2), (60, 5), (3600, 1)])
+def test_count_in_window(entries, seconds, minimum):
+	for predicate in (_event_a, _source_b):
+		assert _keys(count_in_window(entries, predicate, datetime.timedelta(seconds=seconds), minimum)) == _counted(entries, predicate, seconds, minimum)
+
+def test_union(entries):
+	first = within(entries, _event_a, _source_b, 5)
+	second = followed_by(entries, _source_b, _event_a, 60)
+	result = union(first, second)
+	# entries with the same timestamp are ordered by the result they are taken from
+	assert sorted(_keys(result)) == sorted(set(_keys(first)) | set(_keys(second)))
+	times = [unix_microseconds(x.timestamp) for x in result]
+	assert times == sorted(times)
+
+def test_sample_rules_file(entries, sample_logfiles):
+	results = load_rules(os.path.join(TESTFILES, 'rules.json')).evaluate(merged_timeline(sample_logfiles))
+	event_a = lambda x: x.message == 'event A'
+	assert _keys(results['eventA_in_a_without_b']) == _keys(x for _, _, x, found in _partners(entries, _in_a, _in_b, 5, 5) if not found)
+	assert _keys(results['eventA_in_b_without_a']) == _keys(x for _, _, x, found in _partners(entries, _in_b, _in_a, 5, 5) if not found)
+	assert _keys(results['eventA_followed_by_sourceB']) == _keys(x for _, _, x, found in _partners(entries, event_a, _source_b, 0, 60) if found)
+	assert _keys(results['bursts_of_eventA']) == _counted(entries, event_a, 10, 2)
+
+def test_sample_rules_module(entries):
+	spec = importlib.util.spec_from_file_location('rules', os.path.join(TESTFILES, 'rules.py'))
+	rules = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(rules)
+	expected = [x for _, _, x, found in _partners(entries, _in_a, _in_b, 5, 5) + _partners(entries, _in_b, _in_a, 5, 5) if not found]
+	assert sorted(_keys(rules.eventA_rule_break(entries))) == sorted(_keys(expected))
+	assert _keys(rules.the_first_50_entries(entries)) == _keys(entries[:50])
+
+def test_rule_file_matches_functions(entries, tmp_path):
+	predicates = {
+		'failed': {'message': 'Failed password', 'hostname': 'hostA'},
+		'accepted': {'message': '^Accepted', 'source': ['sourceA', 'sourceC']},
+	}
+	rules = [
+		{'name': 'failed', 'match': 'failed'},
+		{'name': 'failed_within', 'match': 'failed', 'within': {'match': 'accepted', 'seconds': 5}},
+		{'name': 'failed_not_within', 'match': 'failed', 'not_within': {'match': 'accepted', 'seconds': 5}},
+		{'name': 'failed_followed_by', 'match': 'failed', 'followed_by': {'match': 'accepted', 'seconds': 30}},
+		{'name': 'accepted_followed_by_itself', 'match': 'accepted', 'followed_by': {'match': 'accepted', 'seconds': 2}},
+		{'name': 'failed_bursts', 'match': {'message': 'Failed password', 'hostname': 'hostA'}, 'count_in_window': {'seconds': 30, 'minimum': 3}},
+	]
+	with open(str(tmp_path / 'rules.json'), 'w') as f:
+		json.dump({'predicates': predicates, 'rules': rules}, f)
+	rule_set = load_rules(str(tmp_path / 'rules.json'))
+	assert rule_set.names == [x['name'] for x in rules]
+	# both predicates are only evaluated once, even though the rule failed_bursts repeats one
+	assert len(rule_set.predicates) == 2
+	results = rule_set.evaluate(iter(entries))
+	failed = lambda x: 'Failed password' in x.message and x.hostname == 'hostA'
+	accepted = lambda x: x.message.startswith('Accepted') and x.source in ('sourceA', 'sourceC')
+	assert _keys(results['failed']) == _keys(x for x in entries if failed(x))
+	assert _keys(results['failed_within']) == _keys(within(entries, failed, accepted, 5))
+	assert _keys(results['failed_not_within']) == _keys(not_within(entries, failed, accepted, 5))
+	assert _keys(results['failed_followed_by']) == _keys(followed_by(entries, failed, accepted, 30))
+	assert _keys(results['accepted_followed_by_itself']) == _keys(followed_by(entries, accepted, accepted, 2))
+	assert _keys(results['failed_bursts']) == _keys(count_in_window(entries, failed, 30, 3))
+	assert all(results[x['name']] for x in rules)
+
+@pytest.mark.parametrize('document', [
+	{'rules': [{'name': 'x', 'match': {'source': 'a'}}, {'name': 'x', 'match': {'source': 'b'}}]},
+	{'rules': [{'name': 'x', 'match': 'unknown'}]},
+	{'rules': [{'name': 'x', 'match': {'color': 'red'}}]},
+	{'rules': [{'name': 'x', 'match': {'message': '('}}]},
+	{'rules': [{'name': 'x', 'match': {'source': 'a'}, 'within': {'seconds': 5}}]},
+	{'rules': [{'name': 'x', 'match': {'source': 'a'}, 'within': {'match': {'source': 'b'}, 'seconds': 5}, 'followed_by': {'match': {'source': 'b'}, 'seconds': 5}}]},
+	{'predicates': {}},
+])
+def test_invalid_rule_files(tmp_path, document):
+	with open(str(tmp_path / 'rules.json'), 'w') as f:
+		json.dump(document, f)
+	with pytest.raises(ValueError):
+		load_rules(str(tmp_path / 'rules.json'))
@@ -0,0 +1,122 @@
+"""Tests that the indexes of the logfile class, the time_index, the message_index and the count_levels,
+give the same results as going through all entries, with and without the columnar storage.
+"""
+
+import datetime
+import re
+from collections import Counter
+
+import pytest
+
+from slogviz.logfileclasses import merged_timeline
+from slogviz.timestampdecoder import unix_microseconds
+
+# the frame sizes in seconds the frame counts are compared for, whole multiples of the count_levels and others
+FRAME_SECONDS = (0.5, 1, 7, 60, 90, 3600, 7200, 86400, 172800)
+
+#START internal functions
+def _keys(entries):
+	"""Returns a list of tuples identifying the entries."""
+	return [(x.origin_name, x.id) for x in entries]
+
+def _windows(lf):
+	"""Returns a list of tuples of start and end, None or datetime objects, around and inside of the timestamps of lf."""
+	times = sorted(x.timestamp for x in lf.content)
+	middle = times[len(times) // 2]
+	quarter = times[len(times) // 4]
+	utc_plus_one = datetime.timezone(datetime.timedelta(hours=1))
+	return [(None, None), (middle, None), (None, middle), (quarter, middle), (middle, middle),
+		(quarter.astimezone(utc_plus_one), middle.replace(tzinfo=None)), (times[-1] + datetime.timedelta(seconds=1), None)]
+
+def _frame_starts(dates):
+	"""Returns a list of the microseconds since 1970 of a list of datetime objects without timezone information or of a numpy datetime64 array."""
+	if hasattr(dates, 'astype'):
+		return dates.astype('datetime64[us]').astype('int64').tolist()
+	return [(x - datetime.datetime(1970, 1, 1)) // datetime.timedelta(microseconds=1) for x in dates]
+
+def _words(message):
+	"""Returns the set of the words in message in lower case."""
+	return set(re.findall(r'\w+', message.lower()))
+
+def _phrase(text):
+	"""Returns a function finding text case insensitively between word boundaries in a message."""
+	pattern = re.compile(r'\b' + re.escape(text) + r'\b', re.IGNORECASE)
+	return lambda message: pattern.search(message) is not None
+#END internal functions
+
+# queries of the message_index and functions deciding the same for a message
+QUERIES = [
+	('event', lambda x: 'event' in _words(x)),
+	('EVENT a', lambda x: {'event', 'a'} <= _words(x)),
+	('"event A"', _phrase('event A')),
+	('"vent A"', lambda x: False),
+	('number 12', lambda x: {'number', '12'} <= _words(x)),
+	('"number 12"', _phrase('number 12')),
+	('password OR publickey', lambda x: 'password' in _words(x) or 'publickey' in _words(x)),
+	('Failed AND root "from 10.0.0.1"', lambda x: {'failed', 'root'} <= _words(x) and _phrase('from 10.0.0.1')(x)),
+	('/from 10\\.0\\.[01]\\.1\\d/', lambda x: re.search(r'from 10\.0\.[01]\.1\d', x) is not None),
+	('10.0.1.7 OR "event C"', lambda x: _phrase('10.0.1.7')(x) or _phrase('event C')(x)),
+	('missingword', lambda x: False),
+]
+
+def test_time_index(sample_logfiles):
+	for lf in sample_logfiles:
+		times = [unix_microseconds(x.timestamp) for x in lf.content]
+		positions = sorted(range(len(times)), key=lambda x: (times[x], x))
+		keys, index = lf.time_index()
+		assert list(index) == positions
+		assert list(keys) == [times[x] for x in positions]
+
+def test_time_span(sample_logfiles):
+	for lf in sample_logfiles:
+		times = [unix_microseconds(x.timestamp) for x in lf.content]
+		assert lf.give_time_span() == (max(times) - min(times)) / 1000000
+
+def test_slice(sample_logfiles):
+	for lf in sample_logfiles:
+		for start, end in _windows(lf):
+			expected = [x for x in lf.content if (start is None or unix_microseconds(x.timestamp) >= unix_microseconds(start))
+				and (end is None or unix_microseconds(x.timestamp) <= unix_microseconds(end))]
+			result = lf.slice(start, end)
+			assert result.lines == len(expected)
+			assert _keys(result.content) == _keys(expected)
+
+@pytest.mark.parametrize('query, matches', QUERIES, ids=[x for x, _ in QUERIES])
+def test_grep(sample_logfiles, query, matches):
+	found = 0
+	for lf in sample_logfiles:
+		expected = [x for x in lf.content if matches(x.message)]
+		assert _keys(lf.grep(query).content) == _keys(expected)
+		found += len(expected)
+	if query not in ('"vent A"', 'missingword'):
+		assert found > 0
+
+def test_grep_of_slice(sample_logfiles):
+	lf = sample_logfiles[2]
+	start, end = _windows(lf)[3]
+	expected = [x for x in lf.slice(start, end).content if {'number', '12'} <= _words(x.message)]
+	assert _keys(lf.slice(start, end).grep('number 12').content) == _keys(expected)
+
+@pytest.mark.parametrize('frame_seconds', FRAME_SECONDS)
+def test_frame_counts(sample_logfiles, frame_seconds):
+	frame = max(int(round(frame_seconds * 1000000)), 1)
+	for lf in sample_logfiles:
+		counts = Counter(unix_microseconds(x.timestamp) // frame for x in lf.content)
+		for start, end in _windows(lf):
+			first = None if start is None else unix_microseconds(start) // frame
+			last = None if end is None else unix_microseconds(end) // frame
+			expected = sorted(x for x in counts.items() if (first is None or x[0] >= first) and (last is None or x[0] <= last))
+			dates, amounts = lf.give_frame_counts(frame_seconds, start, end)
+			assert _frame_starts(dates) == [x * frame for x, _ in expected]
+			assert [int(x) for x in amounts] == [x for _, x in expected]
+
+def test_merged_timeline(sample_logfiles):
+	expected = sorted(((unix_microseconds(x.timestamp), number, position), x) for number, lf in enumerate(sample_logfiles) for position, x in enumerate(lf.content))
+	expected = _keys(x for _, x in expected)
+	merged = merged_timeline(sample_logfiles)
+	assert len(merged) == len(expected)
+	assert _keys(merged) == expected
+	assert _keys(reversed(merged)) == expected[::-1]
+	for index in (slice(0, 50), slice(-50, None), slice(100, 400, 7), slice(None, None, -97), slice(5, 5)):
+		assert _keys(merged[index]) == expected[index]
+	assert _keys([merged[0], merged[1234], merged[-1]]) == [expected[0], expected[1234], expected[-1]]
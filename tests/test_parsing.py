@@ -0,0 +1,220 @@
+"""Tests that the logfile objects read in by the logfileparser sub module do not depend on how they were read in.
+The files of the testfiles directory, and a larger file built from them, are parsed serially and by several processes,
+exported to the JSON, binary and line delimited JSON formats and read in again, and loaded from the parse cache.
+The entries of all of these logfile objects have to be equal.
+The records of testfiles/c.evtx, read directly from the substitutions of their templates, are compared with their XML,
+and the entries of a syslog file read in follow mode with the lines written to it, while it is appended to, truncated and rotated.
+"""
+
+import os
+import pickle
+import shutil
+
+import pytest
+
+import slogviz.config
+from slogviz import logfileparser
+from slogviz.logfileparser import readin, refresh
+
+from conftest import TESTFILES
+
+#START internal functions
+def _fields(lf):
+	"""Returns a list of tuples holding the attributes of each entry of the logfile object lf, which do not depend on the file it was read from."""
+	return [(x.id, x.timestamp, x.message, x.hostname, x.source) for x in lf.content]
+
+def _structured_data(lf):
+	"""Returns a list of the structured_data of each entry of the logfile object lf."""
+	return [x.structured_data for x in lf.content]
+#END internal functions
+
+@pytest.fixture(params=['a.log', 'b.log', 'large.log'])
+def syslog(request, tmp_path):
+	"""Returns the path of a copy of a syslog file of the testfiles directory, or of a file made of many copies of their lines,
+	so that exported files are written into the temporary directory.
+	"""
+	path = tmp_path / request.param
+	if request.param == 'large.log':
+		lines = []
+		for name in ('a.log', 'b.log'):
+			with open(os.path.join(TESTFILES, name)) as f:
+				lines += f.read().splitlines()
+		with open(str(path), 'w') as f:
+			for i in range(2000):
+				f.write(lines[i % len(lines)] + ' ' + str(i) + '\n')
+	else:
+		shutil.copy(os.path.join(TESTFILES, request.param), str(path))
+	return str(path)
+
+def test_parallel_parsing(syslog, monkeypatch):
+	serial = readin(syslog)
+	assert serial.lines > 0
+	# chunks of 64 bytes, so that even the small files are split among the processes
+	monkeypatch.setattr(logfileparser, '_MIN_CHUNK_SIZE', 64)
+	for workers in (2, 3):
+		parallel = readin(syslog, workers=workers)
+		assert parallel.lines == serial.lines
+		assert _fields(parallel) == _fields(serial)
+		assert _structured_data(parallel) == _structured_data(serial)
+
+def test_mapped_parsing(syslog):
+	mapped = readin(syslog, mapped=True)
+	assert _fields(mapped) == _fields(readin(syslog))
+	assert not hasattr(mapped.content[0], '__dict__')
+	# mapped entries are passed to other processes without their messages
+	assert _fields(pickle.loads(pickle.dumps(mapped))) == _fields(mapped)
+
+@pytest.mark.parametrize('export, extension', [
+	('export_to_JSON', '.slogviz.json'),
+	('export_to_binary', '.slogviz.bin'),
+	('export_to_NDJSON', '.slogviz.ndjson')])
+def test_export_round_trip(syslog, export, extension):
+	lf = readin(syslog)
+	getattr(lf, export)()
+	exported = readin(syslog + extension)
+	assert exported.lines == lf.lines
+	assert _fields(exported) == _fields(lf)
+	assert _structured_data(exported) == _structured_data(lf)
+	assert exported.sources == lf.sources
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_streamed_export_round_trip(syslog, sparse):
+	lf = readin(syslog)
+	for export, extension in ((logfileparser.export_to_binary, '.slogviz.bin'), (logfileparser.export_to_NDJSON, '.slogviz.ndjson')):
+		assert export(syslog, sparse=sparse)
+		assert _fields(readin(syslog + extension)) == _fields(lf)
+
+def test_NDJSON_append(syslog):
+	lf = readin(syslog)
+	lf.export_to_NDJSON()
+	lf.export_to_NDJSON(append=True)
+	assert _fields(readin(syslog + '.slogviz.ndjson')) == _fields(lf)
+
+def test_cache_hit(syslog, monkeypatch, tmp_path):
+	monkeypatch.setattr(slogviz.config, 'cache', True)
+	parsed = readin(syslog)
+	assert os.listdir(str(tmp_path / 'cache'))
+	# the file must not be parsed again
+	def _readin(*args):
+		raise AssertionError('the cached file was parsed again')
+	monkeypatch.setattr(logfileparser, '_readin', _readin)
+	cached = readin(syslog)
+	assert cached.lines == parsed.lines
+	assert _fields(cached) == _fields(parsed)
+	assert _structured_data(cached) == _structured_data(parsed)
+	assert cached.sources == parsed.sources
+
+def test_truncated_cache_file(syslog, monkeypatch, tmp_path):
+	monkeypatch.setattr(slogviz.config, 'cache', True)
+	parsed = readin(syslog)
+	cache = tmp_path / 'cache'
+	for name in os.listdir(str(cache)):
+		with open(str(cache / name), 'r+b') as f:
+			f.truncate(5)
+	assert _fields(readin(syslog)) == _fields(parsed)
+	# the damaged file was replaced
+	assert all(os.path.getsize(str(cache / x)) > 5 for x in os.listdir(str(cache)))
+	assert _fields(readin(syslog)) == _fields(parsed)
+
+def test_cache_eviction_keeps_files_in_use(monkeypatch, tmp_path):
+	monkeypatch.setattr(slogviz.config, 'cache', True)
+	monkeypatch.setattr(logfileparser, '_BINARIES_IN_USE', set())
+	names = []
+	for name in ('a.log', 'b.log'):
+		shutil.copy(os.path.join(TESTFILES, name), str(tmp_path / name))
+		names.append(str(tmp_path / name))
+	readin(names[0])
+	# loaded from the cache, its entries read their messages from the cached file
+	cached = readin(names[0])
+	monkeypatch.setattr(slogviz.config, 'cache_size', 1)
+	readin(names[1])
+	assert len(os.listdir(str(tmp_path / 'cache'))) == 2
+	# when no file is in use, all files except the one just written are removed, b.log gets a new key by its new modification time
+	monkeypatch.setattr(logfileparser, '_BINARIES_IN_USE', set())
+	os.utime(names[1], (0, 0))
+	readin(names[1])
+	assert len(os.listdir(str(tmp_path / 'cache'))) == 1
+	assert _fields(cached) == _fields(readin(os.path.join(TESTFILES, 'a.log')))
+
+def test_evtx_fast_path():
+	pytest.importorskip('Evtx')
+	pytest.importorskip('untangle')
+	logfileparser._import_evtx()
+	records = 0
+	with logfileparser.evtx.Evtx(os.path.join(TESTFILES, 'c.evtx')) as log:
+		for chunk in log.chunks():
+			templates = {}
+			for record in chunk.records():
+				# every record of the file has one of the usual template layouts, which the fast path reads without rendering XML
+				assert logfileparser._evtx_record_fast(record, templates) == logfileparser._evtx_record_untangle(record)
+				records += 1
+	assert records == 600
+
+@pytest.fixture(scope='module')
+def evtx_records():
+	"""Returns a list of the fields of each record of testfiles/c.evtx read from its XML by untangle,
+	followed by the XML of every 25th record, since rendering it takes most of the time.
+	"""
+	pytest.importorskip('Evtx')
+	pytest.importorskip('untangle')
+	logfileparser._import_evtx()
+	with logfileparser.evtx.Evtx(os.path.join(TESTFILES, 'c.evtx')) as log:
+		return [logfileparser._evtx_record_untangle(x) + ((x.xml(),) if i % 25 == 0 else ()) for i, x in enumerate(log.records())]
+
+def _evtx_fields(lf):
+	"""Returns a list of the fields of the entries of lf in the format of evtx_records."""
+	return [(x.id, x.message, x.timestamp, x.hostname, x.source) + ((x.structured_data,) if i % 25 == 0 else ()) for i, x in enumerate(lf.content)]
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_evtx_parsing(evtx_records, workers, monkeypatch, tmp_path):
+	path = str(tmp_path / 'c.evtx')
+	shutil.copy(os.path.join(TESTFILES, 'c.evtx'), path)
+	assert _evtx_fields(readin(path, workers=workers)) == evtx_records
+	# the parse cache links the XML to the original file
+	monkeypatch.setattr(slogviz.config, 'cache', True)
+	readin(path)
+	assert _evtx_fields(readin(path)) == evtx_records
+
+def test_follow(tmp_path):
+	path = str(tmp_path / 'follow.log')
+	with open(os.path.join(TESTFILES, 'b.log')) as f:
+		lines = [x + '\n' for x in f.read().splitlines()]
+	written = []
+
+	def write(new_lines, mode='a'):
+		with open(path, mode) as f:
+			f.writelines(new_lines)
+		written.extend(new_lines)
+
+	def expected():
+		"""Returns the fields of the entries of all lines written so far, with ids counted on through all of them."""
+		with open(str(tmp_path / 'expected.log'), 'w') as f:
+			f.writelines(written)
+		return _fields(readin(str(tmp_path / 'expected.log')))
+
+	write(lines[:3], 'w')
+	lf = readin(path, follow=True)
+	assert _fields(lf) == expected()
+	assert refresh(lf) == 0
+	# a line without a line break may still be written, it is only read once it is complete
+	write(lines[3:5])
+	with open(path, 'a') as f:
+		f.write(lines[5][:10])
+	assert refresh(lf) == 2
+	assert _fields(lf) == expected()
+	with open(path, 'a') as f:
+		f.write(lines[5][10:])
+	written.append(lines[5])
+	assert refresh(lf) == 1
+	assert _fields(lf) == expected()
+	# truncated, the file is read from its beginning again
+	write(lines[6:7], 'w')
+	assert refresh(lf) == 1
+	assert _fields(lf) == expected()
+	# rotated, the rest of the old file is read before the new one
+	write(lines[7:8])
+	os.rename(path, path + '.1')
+	write(lines[:2], 'w')
+	assert refresh(lf) == 3
+	assert _fields(lf) == expected()
+	lf.follow_state.file.close()